@@ -1,9 +1,23 @@
 # app.py
 import os
 import logging
-from flask import Flask, request, jsonify, send_from_directory
-from config import VERIFY_TOKEN
+from flask import Flask, request, jsonify
+from config import (
+    VERIFY_TOKEN, WEBHOOK_QUEUE_PATH, WEBHOOK_WORKERS, WEBHOOK_MAX_ATTEMPTS, WEBHOOK_RETRY_BACKOFF,
+    WEBHOOK_MAX_BACKOFF, DEDUP_STORE_TTL, OUTBOX_ENABLED, OUTBOX_GLOBAL_RATE, OUTBOX_PER_NUMBER_RATE,
+    OUTBOX_PER_NUMBER_BURST, PDF_RENDER_WORKERS, UPLOADS_SERVE_MODE, UPLOADS_REQUIRE_SIGNED_URLS
+)
 from conversation import ConversationManager
+from dedup import SeenMessages, message_id
+from statuses import StatusRecorder, iter_statuses
+from database import SessionLocal, ScopedSession
+from outbox import OutboxDeliveryWorker
+from render_service import get_render_service
+from evidence_store import get_evidence_ingestor
+from file_serving import serve_upload, verify_signature
+from unit_of_work import turn_metrics
+from state_cache import get_state_cache
+from work_queue import WorkQueue, QueueWorkerPool
 
 # Configure logging with security in mind
 logging.basicConfig(
@@ -30,7 +44,71 @@ class SensitiveDataFilter(logging.Filter):
 logger.addFilter(SensitiveDataFilter())
 
 app = Flask(__name__)
-conv_manager = ConversationManager()
+# Let the front-end server send file bodies when configured to
+app.use_x_sendfile = UPLOADS_SERVE_MODE == 'x-sendfile'
+
+# Message ids this process queued recently, to drop redelivery bursts early
+seen_messages = SeenMessages()
+
+# Built by start_background_workers in each server process, after any fork,
+# so the queue's SQLite connection and the Graph API session are never
+# inherited from the gunicorn master that imported this module.
+# Webhook events are persisted in webhook_queue and processed by background
+# workers, so the POST handler can acknowledge WhatsApp immediately
+webhook_queue = None
+webhook_workers = None
+# Delivery and read receipts, written in bulk
+status_recorder = None
+# Delivers messages the conversation logic recorded in the outbox
+outbox_worker = None
+
+
+def start_background_workers(processes=1):
+    """
+    Create and start the threads that drain the webhook queue and the outbox,
+    and flush receipts.
+    :param processes: Server processes on this host; each gets its share of
+                      the outbox rate limits and of the PDF render workers
+    """
+    global webhook_queue, webhook_workers, status_recorder, outbox_worker
+    if webhook_workers is not None:
+        return
+    webhook_queue = WorkQueue(WEBHOOK_QUEUE_PATH, max_attempts=WEBHOOK_MAX_ATTEMPTS, dedup_ttl=DEDUP_STORE_TTL,
+                              retry_backoff=WEBHOOK_RETRY_BACKOFF, max_backoff=WEBHOOK_MAX_BACKOFF)
+    webhook_workers = QueueWorkerPool(
+        webhook_queue,
+        # Each worker thread gets its own ConversationManager and scoped DB session
+        lambda: ConversationManager(db=ScopedSession()).handle_incoming,
+        workers=WEBHOOK_WORKERS
+    )
+    status_recorder = StatusRecorder(SessionLocal)
+    if OUTBOX_ENABLED:
+        outbox_worker = OutboxDeliveryWorker(
+            SessionLocal,
+            global_rate=OUTBOX_GLOBAL_RATE / processes,
+            per_number_rate=OUTBOX_PER_NUMBER_RATE / processes,
+            per_number_burst=max(1, OUTBOX_PER_NUMBER_BURST // processes)
+        )
+    # The render pool is created on first use, so this takes effect
+    get_render_service().workers = max(1, PDF_RENDER_WORKERS // processes)
+
+    webhook_workers.start()
+    status_recorder.start()
+    if outbox_worker:
+        outbox_worker.start()
+
+
+def stop_background_workers(timeout=30.0):
+    """
+    Stop claiming new work and let in-flight webhook events, outbox sends
+    and PDF renders finish. Called on graceful shutdown.
+    """
+    if webhook_workers is not None:
+        webhook_workers.stop(timeout)
+        status_recorder.stop(timeout)
+    if outbox_worker:
+        outbox_worker.stop(timeout)
+    get_render_service().shutdown(wait=True)
 
 logger.info("CyberComplaintBot application started")
 
@@ -60,19 +138,48 @@ def webhook():
         data = request.get_json()
         logger.info("Received webhook event")
         
-        # Pass data to the conversation manager for processing
-        conv_manager.handle_incoming(data)
+        # Only persist the events, one per message keyed by sender so each
+        # citizen's messages stay ordered; queue workers run the conversation logic.
+        # Redelivered messages are dropped by id before any further work
+        for from_number, payload in ConversationManager.split_by_sender(data):
+            msg_id = message_id(payload)
+            if msg_id and seen_messages.seen(msg_id):
+                continue
+            webhook_queue.enqueue(payload, partition_key=from_number, dedup_key=msg_id)
+            if msg_id:
+                seen_messages.add(msg_id)
+        status_recorder.record(iter_statuses(data))
         
         return jsonify(status='received'), 200
     except Exception as e:
         logger.error(f"Error processing webhook: {str(e)}", exc_info=True)
         return jsonify(status='error'), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Expose queue depth, per-event latency and outbox delivery counters.
+    """
+    stats = {
+        "webhook_queue": webhook_queue.stats(),
+        "webhook_dedup": seen_messages.stats(),
+        "message_status": status_recorder.stats(),
+        "pdf_render": get_render_service().stats(),
+        "evidence": get_evidence_ingestor().stats(),
+        "conversation_turns": turn_metrics.stats(),
+        "state_cache": get_state_cache().stats(),
+    }
+    if outbox_worker:
+        stats["outbox"] = outbox_worker.stats()
+    return jsonify(stats), 200
+
 @app.route('/uploads/<filename>', methods=['GET'])
 def serve_uploads(filename):
     """
     Serve uploaded files (PDFs and attachments) from the uploads directory.
     This enables serving PDFs and attachments via ngrok URL.
+    Supports conditional (304) and Range requests, optional sendfile/X-Accel
+    offload and, when UPLOADS_REQUIRE_SIGNED_URLS is set, signed expiring links.
     Security: Only serve files from the uploads directory, validate file exists.
     """
     try:
@@ -80,14 +187,25 @@ def serve_uploads(filename):
         if '..' in filename or '/' in filename or '\\' in filename:
             logger.warning(f"Suspicious file access attempt: {filename}")
             return 'Invalid filename', 400
+
+        if UPLOADS_REQUIRE_SIGNED_URLS and not verify_signature(
+            filename, request.args.get('exp'), request.args.get('sig')
+        ):
+            logger.warning(f"Rejected unsigned or expired link for: {filename}")
+            return 'Link expired or invalid', 403
         
         logger.info(f"Serving file: {filename}")
-        return send_from_directory('uploads', filename)
+        return serve_upload(filename)
     except Exception as e:
         logger.error(f"Error serving file {filename}: {str(e)}")
         return 'File not found', 404
 
 if __name__ == '__main__':
+    # Development server only; use serve.py in production
     port = int(os.getenv('PORT', 3000))
-    logger.info(f"Starting Flask server on port {port}")
-    app.run(host='0.0.0.0', port=port, debug=True)
+    debug = os.getenv('FLASK_DEBUG') == '1'
+    logger.info(f"Starting Flask development server on port {port}")
+    # With the debug reloader the parent only watches files; the child serves
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_workers()
+    app.run(host='0.0.0.0', port=port, debug=debug)
@@ -0,0 +1,434 @@
+# backup.py
+"""
+Online, incremental backups of the complaints database, uploads and the
+retention archive.
+
+The live database is copied with SQLite's online backup API, in a single
+step so the copy is one consistent read transaction; under WAL that does
+not block the bot's writers. The copy and every file under UPLOADS_DIR and
+RETENTION_ARCHIVE_DIR (the conversations and cold-stored uploads that
+retention.py moved out) are split into BACKUP_CHUNK_SIZE chunks, each stored once, zlib-compressed,
+under its SHA-256:
+
+    backups/objects/ab/ab12...        compressed chunks
+    backups/snapshots/<id>.json       manifest: chunk lists of the database and each file
+
+Database pages change in place, so a nightly snapshot only writes the
+chunks that changed since the last one; uploads are deduplicated by content
+and files whose size and mtime are unchanged are not even re-read.
+
+    python backup.py create [--prune]
+    python backup.py list
+    python backup.py verify [SNAPSHOT] [--deep]
+    python backup.py restore SNAPSHOT --db restored.db [--uploads restored_uploads] [--archive restored_archive]
+    python backup.py prune [--keep-last 7] [--keep-days 30]
+
+Objects and manifests are written to a temp name and renamed, and the
+manifest goes last, so an interrupted backup leaves at most unreferenced
+chunks, which prune removes. Run prune after create in the same job
+(create --prune), not alongside another create: a chunk being reused by a
+running backup is not referenced by a manifest yet.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.engine import make_url
+
+from database import DATABASE_URL, SQLITE_BUSY_TIMEOUT_MS
+from config import BACKUP_DIR, BACKUP_CHUNK_SIZE, BACKUP_KEEP_LAST, BACKUP_KEEP_DAYS, UPLOADS_DIR, RETENTION_ARCHIVE_DIR
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ID_FORMAT = "%Y%m%dT%H%M%SZ"
+# In-flight writes of the evidence store and renderer
+SKIP_DIRS = {os.path.join("evidence", "tmp")}
+SKIP_SUFFIXES = (".tmp",)
+
+
+class BackupError(Exception):
+    """Raised when a snapshot is missing, corrupt or cannot be restored."""
+
+
+def sqlite_path(url: str = DATABASE_URL) -> str:
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in (None, "", ":memory:"):
+        raise BackupError(f"backup.py backs up SQLite files; use the server's tools for {parsed.drivername}")
+    return parsed.database
+
+
+def copy_database(source_path: str, target_path: str):
+    """
+    Consistent copy of a live SQLite database through the online backup API.
+    All pages are copied in one step (pages=-1): a stepped backup restarts
+    whenever another connection writes, which on a busy bot may never finish.
+    """
+    source = sqlite3.connect(source_path, timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+
+
+class BackupRepository:
+    def __init__(self, root: str = BACKUP_DIR, chunk_size: int = BACKUP_CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.objects_dir = os.path.join(root, "objects")
+        self.snapshots_dir = os.path.join(root, "snapshots")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+
+    # Objects
+
+    def object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put_chunk(self, data: bytes, stats: dict) -> str:
+        """Store a chunk unless it is already stored. :return: Its SHA-256"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            stats["reused_chunks"] += 1
+            return digest
+        compressed = zlib.compress(data, 6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        stats["new_chunks"] += 1
+        stats["bytes_written"] += len(compressed)
+        return digest
+
+    def get_chunk(self, digest: str) -> bytes:
+        path = self.object_path(digest)
+        try:
+            with open(path, "rb") as f:
+                data = zlib.decompress(f.read())
+        except FileNotFoundError:
+            raise BackupError(f"Missing chunk {digest}")
+        except zlib.error:
+            raise BackupError(f"Corrupt chunk {digest}")
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise BackupError(f"Corrupt chunk {digest}")
+        return data
+
+    def put_file(self, path: str, stats: dict) -> dict:
+        """:return: Manifest entry: size, whole-file sha256 and chunk digests"""
+        whole = hashlib.sha256()
+        chunks = []
+        size = 0
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                whole.update(data)
+                size += len(data)
+                chunks.append(self.put_chunk(data, stats))
+        return {"size": size, "sha256": whole.hexdigest(), "chunks": chunks}
+
+    def write_file(self, entry: dict, target: str):
+        """Reassemble a manifest entry into `target`, checking the whole-file hash."""
+        whole = hashlib.sha256()
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            for digest in entry["chunks"]:
+                data = self.get_chunk(digest)
+                whole.update(data)
+                f.write(data)
+        if whole.hexdigest() != entry["sha256"]:
+            os.remove(tmp_path)
+            raise BackupError(f"Restored {target} does not match its recorded hash")
+        os.replace(tmp_path, target)
+
+    # Snapshots
+
+    def snapshots(self) -> list:
+        """:return: Snapshot ids, oldest first"""
+        return sorted(name[:-5] for name in os.listdir(self.snapshots_dir) if name.endswith(".json"))
+
+    def load(self, snapshot_id: str = None) -> dict:
+        """:param snapshot_id: Defaults to the newest snapshot"""
+        if snapshot_id is None:
+            existing = self.snapshots()
+            if not existing:
+                raise BackupError("No snapshots")
+            snapshot_id = existing[-1]
+        try:
+            with open(os.path.join(self.snapshots_dir, f"{snapshot_id}.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise BackupError(f"No snapshot {snapshot_id}")
+
+    def _save(self, manifest: dict):
+        path = os.path.join(self.snapshots_dir, f"{manifest['id']}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def put_tree(self, directory: str, known: dict, stats: dict):
+        """
+        Store every file under `directory`.
+        :param known: rel_path -> entry from the previous snapshot
+        :return: (rel_path -> entry, number of files reused unchanged)
+        """
+        entries = {}
+        unchanged = 0
+        if not directory or not os.path.isdir(directory):
+            return entries, unchanged
+        for rel_path, path in iter_uploads(directory):
+            st = os.stat(path)
+            entry = known.get(rel_path)
+            if entry and entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns \
+                    and all(os.path.exists(self.object_path(d)) for d in entry["chunks"]):
+                # Same size and mtime as last time: reuse without reading
+                entries[rel_path] = entry
+                unchanged += 1
+                continue
+            entry = self.put_file(path, stats)
+            entry["mtime_ns"] = st.st_mtime_ns
+            entries[rel_path] = entry
+        return entries, unchanged
+
+    def create(self, db_path: str = None, uploads_dir: str = UPLOADS_DIR,
+               archive_dir: str = RETENTION_ARCHIVE_DIR) -> dict:
+        """
+        Take a snapshot of the database, the uploads directory and the retention archive.
+        :param db_path: SQLite file; defaults to DATABASE_URL's
+        :param uploads_dir: Directory to include; None to skip uploads
+        :param archive_dir: Retention archive to include; None to skip it
+        :return: Summary dict
+        """
+        started = time.perf_counter()
+        db_path = db_path or sqlite_path()
+        stats = {"new_chunks": 0, "reused_chunks": 0, "bytes_written": 0}
+        now = datetime.now(timezone.utc)
+        snapshot_id = now.strftime(SNAPSHOT_ID_FORMAT)
+        existing = self.snapshots()
+        if snapshot_id in existing:
+            snapshot_id = f"{snapshot_id}-{len(existing)}"
+        previous = self.load(existing[-1]) if existing else None
+
+        with tempfile.TemporaryDirectory(dir=self.root) as tmp:
+            copy_path = os.path.join(tmp, "complaints.db")
+            copy_database(db_path, copy_path)
+            database = self.put_file(copy_path, stats)
+
+        uploads, unchanged = self.put_tree(uploads_dir, previous["uploads"] if previous else {}, stats)
+        archive, archive_unchanged = self.put_tree(archive_dir, previous.get("archive", {}) if previous else {}, stats)
+
+        manifest = {
+            "id": snapshot_id,
+            "created_at": now.isoformat(),
+            "database": database,
+            "uploads": uploads,
+            "archive": archive,
+        }
+        self._save(manifest)
+        summary = dict(
+            stats,
+            snapshot=snapshot_id,
+            database_bytes=database["size"],
+            files=len(uploads),
+            unchanged_files=unchanged,
+            archive_files=len(archive),
+            unchanged_archive_files=archive_unchanged,
+            seconds=round(time.perf_counter() - started, 2),
+        )
+        logger.info(f"Backup {snapshot_id}: {stats['new_chunks']} new chunks, "
+                    f"{stats['reused_chunks']} reused, {stats['bytes_written']} bytes written")
+        return summary
+
+    def verify(self, snapshot_id: str = None, deep: bool = False) -> dict:
+        """
+        Check that every chunk of a snapshot is present and intact.
+        :param deep: Also restore the database to a temp file and run PRAGMA integrity_check
+        :raises BackupError: On the first problem found
+        :return: Summary dict
+        """
+        manifest = self.load(snapshot_id)
+        checked = set()
+        # Snapshots taken before the archive was backed up have no "archive"
+        archive = manifest.get("archive", {})
+        for entry in [manifest["database"], *manifest["uploads"].values(), *archive.values()]:
+            for digest in entry["chunks"]:
+                if digest not in checked:
+                    self.get_chunk(digest)
+                    checked.add(digest)
+        if deep:
+            with tempfile.TemporaryDirectory(dir=self.root) as tmp:
+                path = os.path.join(tmp, "verify.db")
+                self.write_file(manifest["database"], path)
+                conn = sqlite3.connect(path)
+                try:
+                    result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+                finally:
+                    conn.close()
+                if result != "ok":
+                    raise BackupError(f"Snapshot {manifest['id']} database fails integrity_check: {result}")
+        return {"snapshot": manifest["id"], "chunks": len(checked), "files": len(manifest["uploads"]),
+                "archive_files": len(archive)}
+
+    def restore(self, snapshot_id: str, db_target: str = None, uploads_target: str = None,
+                force: bool = False, archive_target: str = None) -> dict:
+        """
+        Restore a snapshot's database, uploads and/or retention archive. Existing
+        targets are only overwritten with force=True; never restore over a running bot's files.
+        :return: Summary dict
+        """
+        manifest = self.load(snapshot_id)
+        restored = {"snapshot": manifest["id"], "database": None, "files": 0, "archive_files": 0}
+        if db_target:
+            if os.path.exists(db_target) and not force:
+                raise BackupError(f"{db_target} exists; pass --force to overwrite")
+            self.write_file(manifest["database"], db_target)
+            # A stale WAL next to the restored file would be replayed into it
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(db_target + suffix):
+                    os.remove(db_target + suffix)
+            restored["database"] = db_target
+        if uploads_target:
+            restored["files"] = self.write_tree(manifest["uploads"], uploads_target, force)
+        if archive_target:
+            restored["archive_files"] = self.write_tree(manifest.get("archive", {}), archive_target, force)
+        return restored
+
+    def write_tree(self, entries: dict, directory: str, force: bool) -> int:
+        """Write each rel_path -> entry under `directory`. :return: Number of files written"""
+        for rel_path, entry in entries.items():
+            target = os.path.join(directory, rel_path)
+            if os.path.exists(target) and not force:
+                raise BackupError(f"{target} exists; pass --force to overwrite")
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            self.write_file(entry, target)
+        return len(entries)
+
+    def prune(self, keep_last: int = BACKUP_KEEP_LAST, keep_days: int = BACKUP_KEEP_DAYS) -> dict:
+        """
+        Delete snapshots beyond the newest `keep_last` that are older than
+        `keep_days`, then the chunks no remaining snapshot references.
+        :return: Summary dict
+        """
+        existing = self.snapshots()
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime(SNAPSHOT_ID_FORMAT)
+        keep = set(existing[-keep_last:]) if keep_last > 0 else set()
+        if keep_days > 0:
+            keep.update(s for s in existing if s >= cutoff)
+        removed = [s for s in existing if s not in keep]
+        for snapshot_id in removed:
+            os.remove(os.path.join(self.snapshots_dir, f"{snapshot_id}.json"))
+
+        referenced = set()
+        for snapshot_id in keep:
+            manifest = self.load(snapshot_id)
+            referenced.update(manifest["database"]["chunks"])
+            for entry in [*manifest["uploads"].values(), *manifest.get("archive", {}).values()]:
+                referenced.update(entry["chunks"])
+        deleted = 0
+        freed = 0
+        for prefix in os.listdir(self.objects_dir):
+            directory = os.path.join(self.objects_dir, prefix)
+            for name in os.listdir(directory):
+                # Unreferenced, or a temp file left by an interrupted backup
+                if name not in referenced:
+                    path = os.path.join(directory, name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    deleted += 1
+        return {"removed_snapshots": removed, "kept": len(keep), "deleted_chunks": deleted, "freed_bytes": freed}
+
+
+def iter_uploads(uploads_dir: str):
+    """Yield (relative path, absolute path) of every stored upload, skipping in-flight temp files."""
+    for dirpath, dirnames, filenames in os.walk(uploads_dir):
+        rel_dir = os.path.relpath(dirpath, uploads_dir)
+        dirnames[:] = sorted(d for d in dirnames if os.path.normpath(os.path.join(rel_dir, d)) not in SKIP_DIRS)
+        for name in sorted(filenames):
+            if name.endswith(SKIP_SUFFIXES):
+                continue
+            rel_path = os.path.normpath(os.path.join(rel_dir, name))
+            yield rel_path.replace(os.sep, "/"), os.path.join(dirpath, name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Online backups of the complaints database, uploads and archive.")
+    parser.add_argument("--repo", default=BACKUP_DIR, help="Backup directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    create = commands.add_parser("create", help="Take a snapshot")
+    create.add_argument("--db", help="SQLite file (default: from DATABASE_URL)")
+    create.add_argument("--uploads", default=UPLOADS_DIR)
+    create.add_argument("--no-uploads", action="store_true")
+    create.add_argument("--archive", default=RETENTION_ARCHIVE_DIR, help="Retention archive directory")
+    create.add_argument("--no-archive", action="store_true")
+    create.add_argument("--prune", action="store_true", help="Apply retention afterwards")
+
+    commands.add_parser("list", help="List snapshots")
+
+    verify = commands.add_parser("verify", help="Check a snapshot's chunks (default: newest)")
+    verify.add_argument("snapshot", nargs="?")
+    verify.add_argument("--deep", action="store_true", help="Also run integrity_check on the database")
+
+    restore = commands.add_parser("restore", help="Restore a snapshot")
+    restore.add_argument("snapshot")
+    restore.add_argument("--db", help="Write the database here")
+    restore.add_argument("--uploads", help="Write the uploads under this directory")
+    restore.add_argument("--archive", help="Write the retention archive under this directory")
+    restore.add_argument("--force", action="store_true", help="Overwrite existing files")
+
+    for command in (create, commands.add_parser("prune", help="Apply retention")):
+        command.add_argument("--keep-last", type=int, default=BACKUP_KEEP_LAST)
+        command.add_argument("--keep-days", type=int, default=BACKUP_KEEP_DAYS)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        repo = BackupRepository(args.repo)
+        if args.command == "create":
+            result = repo.create(args.db, None if args.no_uploads else args.uploads,
+                                 None if args.no_archive else args.archive)
+            print(f"Snapshot {result['snapshot']}: database {result['database_bytes']} bytes, "
+                  f"{result['files']} files ({result['unchanged_files']} unchanged), "
+                  f"{result['archive_files']} archive files ({result['unchanged_archive_files']} unchanged), "
+                  f"{result['new_chunks']} new chunks ({result['bytes_written']} bytes), "
+                  f"{result['reused_chunks']} reused, {result['seconds']}s")
+            if args.prune:
+                pruned = repo.prune(args.keep_last, args.keep_days)
+                print(f"Pruned {len(pruned['removed_snapshots'])} snapshots, {pruned['deleted_chunks']} chunks")
+        elif args.command == "list":
+            for snapshot_id in repo.snapshots():
+                manifest = repo.load(snapshot_id)
+                print(f"{snapshot_id}  database {manifest['database']['size']} bytes  "
+                      f"{len(manifest['uploads'])} files  {len(manifest.get('archive', {}))} archive files")
+        elif args.command == "verify":
+            result = repo.verify(args.snapshot, deep=args.deep)
+            print(f"Snapshot {result['snapshot']} OK: {result['chunks']} chunks, {result['files']} files, "
+                  f"{result['archive_files']} archive files")
+        elif args.command == "restore":
+            if not args.db and not args.uploads and not args.archive:
+                parser.error("restore needs --db, --uploads and/or --archive")
+            result = repo.restore(args.snapshot, args.db, args.uploads, force=args.force, archive_target=args.archive)
+            print(f"Restored snapshot {result['snapshot']}: database {result['database'] or '-'}, "
+                  f"{result['files']} files, {result['archive_files']} archive files")
+        else:
+            pruned = repo.prune(args.keep_last, args.keep_days)
+            print(f"Pruned {len(pruned['removed_snapshots'])} snapshots, kept {pruned['kept']}, "
+                  f"deleted {pruned['deleted_chunks']} chunks ({pruned['freed_bytes']} bytes)")
+    except BackupError as e:
+        parser.exit(1, f"backup: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
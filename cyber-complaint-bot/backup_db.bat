@@ -1,28 +1,25 @@
 @echo off
 REM Database Backup Script for CyberComplaintBot
-REM Schedule this script with Windows Task Scheduler for nightly backups
+REM Schedule this script with Windows Task Scheduler for nightly backups.
+REM The work is done by backup.py (online SQLite backup, incremental and
+REM compressed, uploads included); on Linux/macOS run it from cron:
+REM   0 2 * * * cd /path/to/cyber-complaint-bot && python backup.py create --prune
 
-REM Create backups directory if it doesn't exist
-if not exist "backups" mkdir backups
+cd /d "%~dp0"
 
-REM Get current date and time in format YYYY-MM-DD_HH-MM-SS
-for /f "tokens=2 delims==" %%a in ('wmic OS Get localdatetime /value') do set "dt=%%a"
-set "YY=%dt:~2,2%" & set "YYYY=%dt:~0,4%" & set "MM=%dt:~4,2%" & set "DD=%dt:~6,2%"
-set "HH=%dt:~8,2%" & set "Min=%dt:~10,2%" & set "Sec=%dt:~12,2%"
-set "timestamp=%YYYY%-%MM%-%DD%_%HH%-%Min%-%Sec%"
-
-REM Copy database with timestamp
-if exist "complaints.db" (
-    copy "complaints.db" "backups\complaints_%timestamp%.db"
-    echo Backup created: complaints_%timestamp%.db
-    echo Backup completed successfully at %date% %time%
-) else (
-    echo ERROR: complaints.db not found!
+REM Take a snapshot, then apply retention (BACKUP_KEEP_LAST / BACKUP_KEEP_DAYS)
+python backup.py create --prune
+if errorlevel 1 (
+    echo ERROR: backup failed!
+    exit /b 1
 )
 
-REM Optional: Keep only last 30 days of backups (cleanup old backups)
-forfiles /p "backups" /m complaints_*.db /d -30 /c "cmd /c del @path" 2>nul
+REM Check the new snapshot's chunks
+python backup.py verify
+if errorlevel 1 (
+    echo ERROR: backup verification failed!
+    exit /b 1
+)
 
 echo.
 echo Backup process complete.
-pause
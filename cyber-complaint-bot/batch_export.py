@@ -0,0 +1,267 @@
+# batch_export.py
+"""
+Bulk PDF export of complaints for police portals.
+
+Streams matching Complaint rows in keyset-paginated chunks, renders them in
+parallel on a process pool and writes either a zip of per-complaint PDFs or
+merged PDF volumes. Only a bounded window of rows and documents is held in
+memory at any time.
+
+Usage:
+    python batch_export.py --from 2024-01-01 --to 2024-02-01 --format zip --out export.zip
+    python batch_export.py --category "Cyber Fraud" --format merged --out export.pdf
+"""
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from database import SessionLocal
+from models import Complaint
+from pdf_generator import PDFGenerator, PDF_FIELDS
+from config import PDF_RENDER_WORKERS
+
+logger = logging.getLogger(__name__)
+
+
+def _render_to_file(data: dict, path: str) -> str:
+    # Runs in a pool process
+    return PDFGenerator().generate(data, path=path)
+
+
+def build_query(db, start=None, end=None, category=None, status=None):
+    query = db.query(Complaint)
+    if start is not None:
+        query = query.filter(Complaint.created_at >= start)
+    if end is not None:
+        query = query.filter(Complaint.created_at < end)
+    if category is not None:
+        query = query.filter(Complaint.category == category)
+    if status is not None:
+        query = query.filter(Complaint.status == status)
+    return query
+
+
+def iter_complaints(db, query, chunk_size: int):
+    """
+    Yield complaint field dicts in id order, one keyset-paginated chunk at a
+    time, so neither the ORM nor the DB cursor holds the whole result set.
+    """
+    last_id = 0
+    while True:
+        rows = query.filter(Complaint.id > last_id).order_by(Complaint.id).limit(chunk_size).all()
+        if not rows:
+            return
+        for row in rows:
+            data = {f: getattr(row, f, None) for f in PDF_FIELDS}
+            data["created_at"] = row.created_at
+            yield data
+        last_id = rows[-1].id
+        # Drop the chunk's ORM objects before fetching the next one
+        db.expunge_all()
+
+
+class ExportProgress:
+    """Logs progress and throughput at most every `interval` seconds."""
+
+    def __init__(self, total: int, interval: float = 2.0, stream=sys.stderr):
+        self.total = total
+        self.interval = interval
+        self.stream = stream
+        self.done = 0
+        self.skipped = 0
+        self.started = time.monotonic()
+        self._last = 0.0
+
+    def update(self, count: int = 1, force: bool = False):
+        self.done += count
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return
+        self._last = now
+        elapsed = max(now - self.started, 1e-9)
+        rate = self.done / elapsed
+        eta = (self.total - self.done) / rate if rate else 0
+        self.stream.write(
+            f"\r{self.done}/{self.total} complaints  {rate:.1f} docs/s  "
+            f"elapsed {elapsed:.0f}s  eta {eta:.0f}s"
+        )
+        self.stream.flush()
+
+    def summary(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "exported": self.done - self.skipped,
+            "skipped": self.skipped,
+            "seconds": round(elapsed, 2),
+            "docs_per_s": round(self.done / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+class ZipWriter:
+    def __init__(self, out_path: str):
+        self.zip = zipfile.ZipFile(out_path, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def add(self, complaint_id: str, pdf_path: str):
+        self.zip.write(pdf_path, arcname=f"{complaint_id}.pdf")
+
+    def close(self):
+        self.zip.close()
+
+
+class MergedWriter:
+    """
+    Appends PDFs into merged volumes of at most `volume_size` complaints
+    (export.pdf, export-0002.pdf, ...). pypdf keeps a volume in memory until
+    it is written, so the volume size bounds memory; 0 means one file.
+    """
+
+    def __init__(self, out_path: str, volume_size: int):
+        from pypdf import PdfWriter
+        self._writer_cls = PdfWriter
+        self.base, self.ext = os.path.splitext(out_path)
+        self.volume_size = volume_size
+        self.volume = 0
+        self.count = 0
+        self.writer = None
+        self.paths = []
+
+    def _volume_path(self) -> str:
+        if self.volume == 1:
+            return f"{self.base}{self.ext or '.pdf'}"
+        return f"{self.base}-{self.volume:04d}{self.ext or '.pdf'}"
+
+    def add(self, complaint_id: str, pdf_path: str):
+        if self.writer is None:
+            self.volume += 1
+            self.writer = self._writer_cls()
+        self.writer.append(pdf_path, outline_item=complaint_id)
+        self.count += 1
+        if self.volume_size and self.count % self.volume_size == 0:
+            self._flush()
+
+    def _flush(self):
+        if self.writer is None:
+            return
+        path = self._volume_path()
+        with open(path, "wb") as f:
+            self.writer.write(f)
+        self.writer.close()
+        self.writer = None
+        self.paths.append(path)
+
+    def close(self):
+        self._flush()
+
+
+def export_complaints(out_path: str, fmt: str = "zip", start=None, end=None, category=None,
+                      status=None, workers: int = PDF_RENDER_WORKERS, chunk_size: int = 500,
+                      volume_size: int = 1000, progress_interval: float = 2.0) -> dict:
+    """
+    Export matching complaints to PDF.
+    :param out_path: Zip file, or merged PDF path (volumes get a -NNNN suffix)
+    :param fmt: "zip" or "merged"
+    :param start: Include complaints created at or after this datetime
+    :param end: Include complaints created before this datetime
+    :param category: Only this complaint category
+    :param status: Only this status (e.g. "submitted")
+    :param workers: Render processes
+    :param chunk_size: Rows fetched from the DB per query
+    :param volume_size: Complaints per merged PDF volume (0 = single file)
+    :return: Summary dict with counts and throughput; complaints whose PDF
+             failed to render are left out and listed under "failed"
+    """
+    db = SessionLocal()
+    tmp_dir = None
+    try:
+        query = build_query(db, start, end, category, status)
+        total = query.count()
+        if not total:
+            raise ValueError("No complaints match the export filters; nothing was written")
+        tmp_dir = tempfile.mkdtemp(prefix="complaint-export-")
+        writer = ZipWriter(out_path) if fmt == "zip" else MergedWriter(out_path, volume_size)
+        progress = ExportProgress(total, interval=progress_interval)
+        failed = []
+        # Bounded window of in-flight renders keeps memory flat and output ordered
+        window = max(1, workers) * 4
+        pending = deque()
+
+        def drain_one():
+            complaint_id, future = pending.popleft()
+            try:
+                pdf_path = future.result()
+            except Exception as e:
+                # One bad complaint must not abort a long export
+                logger.error(f"Skipping complaint {complaint_id}, PDF render failed: {str(e)}")
+                failed.append(complaint_id)
+                progress.skipped += 1
+            else:
+                writer.add(complaint_id, pdf_path)
+                os.remove(pdf_path)
+            progress.update()
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for n, data in enumerate(iter_complaints(db, query, chunk_size)):
+                pdf_path = os.path.join(tmp_dir, f"{n}.pdf")
+                pending.append((data["complaint_id"], pool.submit(_render_to_file, data, pdf_path)))
+                if len(pending) >= window:
+                    drain_one()
+            while pending:
+                drain_one()
+
+        writer.close()
+        progress.update(0, force=True)
+        progress.stream.write("\n")
+        summary = progress.summary()
+        summary["output"] = writer.paths if fmt == "merged" else [out_path]
+        summary["failed"] = failed
+        return summary
+    finally:
+        db.close()
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export complaints as PDFs.")
+    parser.add_argument("--from", dest="start", type=_parse_date, help="Created at or after (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="end", type=_parse_date, help="Created before (YYYY-MM-DD)")
+    parser.add_argument("--category")
+    parser.add_argument("--status")
+    parser.add_argument("--format", dest="fmt", choices=["zip", "merged"], default="zip")
+    parser.add_argument("--out", required=True, help="Output .zip or .pdf path")
+    parser.add_argument("--workers", type=int, default=PDF_RENDER_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--volume-size", type=int, default=1000,
+                        help="Complaints per merged PDF volume; 0 writes a single file")
+    args = parser.parse_args(argv)
+
+    try:
+        summary = export_complaints(
+            args.out, fmt=args.fmt, start=args.start, end=args.end, category=args.category,
+            status=args.status, workers=args.workers, chunk_size=args.chunk_size,
+            volume_size=args.volume_size
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(
+        f"Exported {summary['exported']} complaints in {summary['seconds']}s "
+        f"({summary['docs_per_s']} docs/s): {', '.join(summary['output']) or 'no file written'}"
+    )
+    if summary["failed"]:
+        print(f"Skipped {summary['skipped']} complaints whose PDF failed to render: {', '.join(summary['failed'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_backup.py
+"""
+Full vs incremental backup snapshots, and writer latency during a backup.
+
+Usage:
+    python benchmarks/bench_backup.py [--rows 200000] [--uploads 500]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert
+
+from backup import BackupRepository
+from database import Base, make_engine
+from models import Complaint
+
+
+def complaint_rows(rng: random.Random, start: int, count: int) -> list:
+    return [{
+        "complaint_id": f"C{n:09d}",
+        "phone_number": f"91{9000000000 + rng.randrange(400000)}",
+        "category": "cyber_fraud",
+        "name": "Test Citizen",
+        "address": "Chennai",
+        "description": "Caller posing as bank staff took an OTP and debited the account.",
+        "status": "submitted",
+    } for n in range(start, start + count)]
+
+
+def write_uploads(rng: random.Random, uploads: str, start: int, count: int):
+    for n in range(start, start + count):
+        with open(os.path.join(uploads, f"complaint_{n}.pdf"), "wb") as f:
+            f.write(rng.randbytes(20000))
+
+
+def report(label: str, result: dict, database_size: int):
+    print(f"{label}: {result['seconds']}s, {result['bytes_written'] / 2 ** 20:.1f} MB written "
+          f"({result['new_chunks']} new / {result['reused_chunks']} reused chunks, "
+          f"{result['unchanged_files']} unchanged files; database {database_size / 2 ** 20:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--uploads", type=int, default=500)
+    args = parser.parse_args()
+    rng = random.Random(5)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "complaints.db")
+        uploads = os.path.join(tmp, "uploads")
+        os.makedirs(uploads)
+        engine = make_engine(f"sqlite:///{db_path}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for offset in range(0, args.rows, 20000):
+                conn.execute(insert(Complaint), complaint_rows(rng, offset, min(20000, args.rows - offset)))
+        write_uploads(rng, uploads, 0, args.uploads)
+        repo = BackupRepository(os.path.join(tmp, "backups"))
+
+        report("Full snapshot", repo.create(db_path, uploads, archive_dir=None), os.path.getsize(db_path))
+
+        # A day's worth of changes: 1% more complaints and a few new PDFs
+        extra = max(1, args.rows // 100)
+        with engine.begin() as conn:
+            conn.execute(insert(Complaint), complaint_rows(rng, args.rows, extra))
+        write_uploads(rng, uploads, args.uploads, max(1, args.uploads // 100))
+        report("Incremental snapshot", repo.create(db_path, uploads, archive_dir=None), os.path.getsize(db_path))
+
+        # Writer latency while a snapshot runs
+        latencies = []
+        done = threading.Event()
+
+        def writer():
+            n = args.rows + extra
+            while not done.is_set():
+                started = time.perf_counter()
+                with engine.begin() as conn:
+                    conn.execute(insert(Complaint), complaint_rows(rng, n, 1))
+                latencies.append((time.perf_counter() - started) * 1000)
+                n += 1
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        repo.create(db_path, uploads, archive_dir=None)
+        done.set()
+        thread.join()
+        latencies.sort()
+        print(f"Writes during backup: {len(latencies)}, p50 {latencies[len(latencies) // 2]:.2f} ms, "
+              f"max {latencies[-1]:.2f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
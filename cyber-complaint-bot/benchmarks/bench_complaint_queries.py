@@ -0,0 +1,117 @@
+# benchmarks/bench_complaint_queries.py
+"""
+Officer lookup latency over a large complaints table.
+
+Fills a temporary SQLite database with synthetic complaints, then times the
+complaint_queries access patterns (first page, and a page deep into the
+results via keyset vs OFFSET). Run once with --no-index to see the
+full-table scans the secondary indexes replace.
+
+Usage:
+    python benchmarks/bench_complaint_queries.py [--rows 1000000] [--no-index]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import Complaint
+from complaint_queries import find_complaints, build_query
+
+CATEGORIES = ["cyber_fraud", "identity_theft", "online_harassment"]
+STATUSES = ["draft", "submitted", "submitted", "submitted", "closed"]
+IFSC_CODES = [f"SBIN{n:07d}" for n in range(2000)]
+
+
+def populate(engine, rows: int, batch: int = 20000):
+    rng = random.Random(7)
+    start = datetime(2024, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(insert(Complaint), [
+                {
+                    "complaint_id": f"C{n:09d}",
+                    "phone_number": f"91{9000000000 + rng.randrange(rows // 5 or 1)}",
+                    "category": rng.choice(CATEGORIES),
+                    "name": "Test Citizen",
+                    "address": "Chennai",
+                    "description": "UPI fraud reported via WhatsApp",
+                    "status": rng.choice(STATUSES),
+                    "ifsc": rng.choice(IFSC_CODES),
+                    "sender_txn_id": f"T{rng.randrange(10 ** 12):012d}",
+                    "created_at": start + timedelta(seconds=n * 30),
+                }
+                for n in range(offset, min(offset + batch, rows))
+            ])
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """:return: Best-of-`repeat` wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--depth", type=int, default=200, help="Page number for the deep-page test")
+    parser.add_argument("--no-index", action="store_true", help="Drop the secondary indexes first")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        started = time.perf_counter()
+        populate(engine, args.rows)
+        print(f"Inserted {args.rows} rows in {time.perf_counter() - started:.1f}s")
+        if args.no_index:
+            with engine.begin() as conn:
+                for index in Complaint.__table__.indexes:
+                    if index.name.startswith("ix_complaints_") and index.name != "ix_complaints_complaint_id":
+                        conn.execute(text(f"DROP INDEX {index.name}"))
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+        db = sessionmaker(bind=engine)()
+        sample = db.query(Complaint).filter(Complaint.id == args.rows // 2).one()
+        day = datetime(2024, 3, 1)
+        patterns = {
+            "by phone": {"phone_number": sample.phone_number},
+            "by status": {"status": "submitted"},
+            "by category": {"category": "identity_theft"},
+            "by date range": {"created_from": day, "created_to": day + timedelta(days=1)},
+            "by ifsc": {"ifsc": sample.ifsc},
+            "by txn id": {"txn_id": sample.sender_txn_id},
+        }
+        for label, filters in patterns.items():
+            first = timed(lambda: find_complaints(db, limit=50, **filters))
+            print(f"{label:<14} first page {first:8.2f} ms")
+
+        # Walk to a deep page once to get its cursor, then compare the two ways of reaching it
+        cursor = None
+        for _ in range(args.depth):
+            cursor = find_complaints(db, limit=50, cursor=cursor, status="submitted").next_cursor
+        keyset = timed(lambda: find_complaints(db, limit=50, cursor=cursor, status="submitted"))
+        offset = timed(lambda: build_query(db, status="submitted")
+                       .order_by(Complaint.created_at.desc(), Complaint.id.desc())
+                       .offset(args.depth * 50).limit(50).all())
+        print(f"page {args.depth:<5} keyset {keyset:8.2f} ms   OFFSET {offset:8.2f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
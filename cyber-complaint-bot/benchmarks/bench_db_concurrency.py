@@ -0,0 +1,99 @@
+# benchmarks/bench_db_concurrency.py
+"""
+Webhook-write throughput at 1, 8 and 32 concurrent senders.
+
+Each simulated turn does what a conversation step does: read the sender's
+ConversationState, update it, record an outbox message and commit. The
+SQLite defaults (rollback journal, pysqlite transactions) are compared with
+the tuned engine from database.make_engine.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py [--turns 2000] [--url postgresql+psycopg2://...]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, begin_write, make_engine
+from models import ConversationState, OutboxMessage
+
+
+def run_turns(Session, phone, turns, errors):
+    for n in range(turns):
+        db = Session()
+        try:
+            # As in UnitOfWork: the turn reads then writes, so it begins IMMEDIATE
+            begin_write(db)
+            state = db.get(ConversationState, phone)
+            if state is None:
+                state = ConversationState(phone_number=phone, current_step="start", temp_data={})
+                db.add(state)
+            state.current_step = f"step_{n % 10}"
+            state.temp_data = {"n": n, "name": "Test Citizen"}
+            db.add(OutboxMessage(
+                idempotency_key=f"{phone}:{n}", to_number=phone,
+                payload=json.dumps({"text": {"body": "next prompt"}})
+            ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            errors.append(1)
+        finally:
+            db.close()
+
+
+def bench(engine, senders, total_turns):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    errors = []
+    per_sender = max(1, total_turns // senders)
+    threads = [
+        threading.Thread(target=run_turns, args=(Session, f"91{9000000000 + i}", per_sender, errors))
+        for i in range(senders)
+    ]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    done = per_sender * senders - len(errors)
+    return done / elapsed, len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000, help="Total turns per run")
+    parser.add_argument("--url", help="Benchmark this database instead of temporary SQLite files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.url:
+            engines = {"tuned": lambda: make_engine(args.url)}
+        else:
+            engines = {
+                "sqlite default": lambda: create_engine(
+                    f"sqlite:///{tmp}/default.db", connect_args={"check_same_thread": False}
+                ),
+                "sqlite tuned": lambda: make_engine(f"sqlite:///{tmp}/tuned.db"),
+            }
+        for label, factory in engines.items():
+            for senders in (1, 8, 32):
+                engine = factory()
+                rate, errors = bench(engine, senders, args.turns)
+                engine.dispose()
+                print(f"{label:<15} {senders:>3} senders  {rate:9.1f} turns/s  {errors} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_linkage.py
+"""
+Linkage index at scale: batch rebuild time, incremental add latency, and
+"how many complaints share this account" via link_counts vs a self-join.
+
+Synthetic complaints reuse a pool of mule accounts and suspect phones, so a
+fraction of them link into clusters.
+
+Usage:
+    python benchmarks/bench_linkage.py [--rows 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import aliased, sessionmaker
+
+from database import Base, make_engine
+from models import Complaint
+from linkage import LinkageIndex, rebuild
+
+
+def complaint_row(rng: random.Random, n: int, mules: int) -> dict:
+    shared = rng.random() < 0.3
+    return {
+        "complaint_id": f"C{n:09d}",
+        "phone_number": f"91{9000000000 + n}",
+        "name": "Test Citizen",
+        "address": "Chennai",
+        "description": "Fraud",
+        "status": "submitted",
+        "receiver_txn_id": f"mule{rng.randrange(mules)}@ybl" if shared else f"{rng.randrange(10 ** 11):011d}",
+        "sender_txn_id": f"T{n:012d}",
+        "ifsc": f"SBIN{rng.randrange(5000):07d}",
+        "suspect_details": f"Called from {9700000000 + rng.randrange(mules * 4)}" if rng.random() < 0.2 else None,
+    }
+
+
+def timed(fn, repeat: int = 20) -> float:
+    """:return: Mean wall time in milliseconds"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--mules", type=int, default=20000, help="Distinct shared accounts")
+    args = parser.parse_args()
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        with engine.begin() as conn:
+            for offset in range(0, args.rows, 20000):
+                conn.execute(insert(Complaint), [
+                    complaint_row(rng, n, args.mules) for n in range(offset, min(offset + 20000, args.rows))
+                ])
+
+        summary = rebuild(Session)
+        print(f"Rebuild: {summary['complaints']} complaints in {summary['seconds']}s, "
+              f"{summary['linked_complaints']} linked into {summary['clusters']} clusters")
+
+        db = Session()
+        next_n = [args.rows]
+
+        def add_one():
+            row = complaint_row(rng, next_n[0], args.mules)
+            next_n[0] += 1
+            complaint = Complaint(**row)
+            db.add(complaint)
+            LinkageIndex(db).add_complaint(complaint)
+            db.commit()
+
+        print(f"Incremental add (incl. insert + commit): {timed(add_one, repeat=200):.2f} ms")
+
+        index = LinkageIndex(db)
+        account = f"mule{args.mules // 2}@ybl"
+        lookup = timed(lambda: index.shared_count("upi", account), repeat=1000)
+        other = aliased(Complaint)
+        self_join = timed(lambda: db.execute(
+            select(func.count(func.distinct(other.id)))
+            .select_from(Complaint)
+            .join(other, (other.receiver_txn_id == Complaint.receiver_txn_id) & (other.id != Complaint.id))
+            .where(Complaint.receiver_txn_id == account)
+        ).scalar())
+        print(f"Shared-account count: link_counts {lookup:.3f} ms   self-join {self_join:.2f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# benchmarks/bench_pdf_backends.py
+"""
+Compare per-document render time and memory for the ReportLab and
+WeasyPrint (HTML template) PDF backends.
+
+Usage:
+    python benchmarks/bench_pdf_backends.py [--docs 200]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    # Unix only; the RSS line is skipped on Windows
+    resource = None
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from pdf_generator import PDFGenerator, get_html_renderer
+
+
+def sample_complaint(n):
+    return {
+        "complaint_id": f"BENCH{n:05d}",
+        "name": "Test Citizen",
+        "phone_number": "919876543210",
+        "address": "12 MG Road, Bengaluru",
+        "description": "Received a call claiming to be from the bank and lost money via UPI. " * 5,
+        "transaction_count": 2,
+        "sender_txn_id": f"TXN{n:010d}",
+        "receiver_txn_id": f"RCV{n:010d}",
+        "ifsc": "SBIN0001234",
+        "timestamp_evidence": "2024-01-01 10:00",
+        "suspect_name": "Unknown",
+        "suspect_details": "fraudster@upi",
+    }
+
+
+def bench(backend, docs, out_dir):
+    generator = PDFGenerator(backend=backend)
+    # Warm-up render: loads the template, stylesheet and fonts once
+    generator.generate(sample_complaint(0), path=os.path.join(out_dir, "warmup.pdf"))
+
+    timings = []
+    peak = 0
+    for n in range(1, docs + 1):
+        tracemalloc.start()
+        started = time.perf_counter()
+        generator.generate(sample_complaint(n), path=os.path.join(out_dir, f"{backend}-{n}.pdf"))
+        timings.append(time.perf_counter() - started)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "mean_ms": sum(timings) / len(timings) * 1000,
+        "p95_ms": timings[int(0.95 * (len(timings) - 1))] * 1000,
+        "docs_per_s": len(timings) / sum(timings),
+        "peak_alloc_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200)
+    args = parser.parse_args()
+
+    backends = ["reportlab"]
+    if get_html_renderer() is not None:
+        backends.append("weasyprint")
+    else:
+        print("weasyprint: skipped (WeasyPrint native libraries not available)")
+
+    with tempfile.TemporaryDirectory() as out_dir:
+        for backend in backends:
+            r = bench(backend, args.docs, out_dir)
+            print(
+                f"{backend:<11} mean {r['mean_ms']:7.2f} ms  p95 {r['p95_ms']:7.2f} ms  "
+                f"{r['docs_per_s']:7.1f} docs/s  peak alloc/doc {r['peak_alloc_kb']:8.1f} KiB"
+            )
+    if resource is not None:
+        print(f"process max RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
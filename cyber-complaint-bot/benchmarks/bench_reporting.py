@@ -0,0 +1,107 @@
+# benchmarks/bench_reporting.py
+"""
+Dashboard statistics from the rollup counters vs GROUP BY over complaints,
+and streaming export throughput and memory.
+
+Usage:
+    python benchmarks/bench_reporting.py [--rows 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import Complaint
+import rollups
+from reporting import export, summary
+
+CATEGORIES = ["cyber_fraud", "identity_theft", "online_harassment"]
+
+
+def complaint_row(rng: random.Random, n: int, start: datetime) -> dict:
+    return {
+        "complaint_id": f"C{n:09d}",
+        "phone_number": f"91{9000000000 + rng.randrange(400000)}",
+        "category": rng.choice(CATEGORIES),
+        "name": "Test Citizen",
+        "address": "Chennai",
+        "description": "Caller posing as bank staff took an OTP and debited the account.",
+        "status": "draft" if rng.random() < 0.1 else "submitted",
+        "created_at": start + timedelta(seconds=n * 30),
+    }
+
+
+def group_by_stats(engine) -> dict:
+    c = Complaint.__table__.c
+    submitted = c.status != "draft"
+    day = func.strftime("%Y-%m-%d", c.created_at)
+    hour = func.strftime("%Y-%m-%d %H", c.created_at)
+    with engine.connect() as conn:
+        return {
+            "by_status": dict(conn.execute(select(c.status, func.count()).group_by(c.status)).all()),
+            "by_category": dict(conn.execute(select(c.category, func.count()).where(submitted).group_by(c.category)).all()),
+            "by_day": dict(conn.execute(select(day, func.count()).where(submitted).group_by(day)).all()),
+            "by_hour": dict(conn.execute(select(hour, func.count()).where(submitted).group_by(hour)).all()),
+            "repeat_reporters": dict(conn.execute(
+                select(c.phone_number, func.count()).where(submitted).group_by(c.phone_number)
+                .having(func.count() >= 2).order_by(func.count().desc()).limit(100)
+            ).all()),
+        }
+
+
+def timed(fn, repeat: int = 3) -> float:
+    """:return: Mean wall time in milliseconds"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+    rng = random.Random(11)
+    start = datetime(2024, 1, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{tmp}/bench.db"
+        engine = make_engine(url)
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for offset in range(0, args.rows, 20000):
+                conn.execute(insert(Complaint), [
+                    complaint_row(rng, n, start) for n in range(offset, min(offset + 20000, args.rows))
+                ])
+        built = rollups.rebuild(sessionmaker(bind=engine))
+        print(f"Rollup rebuild: {built['counters']} counters in {built['seconds']}s")
+
+        read_only = make_engine(url, read_only=True)
+        print(f"Dashboard stats: GROUP BY {timed(lambda: group_by_stats(read_only)):.0f} ms   "
+              f"rollups {timed(lambda: summary(read_only), repeat=50):.2f} ms")
+
+        for fmt in ("csv", "jsonl"):
+            result = export(os.path.join(tmp, f"out.{fmt}"), fmt, engine=read_only)
+            print(f"Export {fmt}: {result['exported']} rows, {result['rows_per_s']:,} rows/s")
+        # Separate pass: tracing allocations slows the export down
+        tracemalloc.start()
+        export(os.path.join(tmp, "traced.csv"), "csv", engine=read_only)
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"Export csv peak Python memory: {peak:.1f} MB")
+        read_only.dispose()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_retention.py
+"""
+Writer latency while expiring conversation_state: batched retention vs one DELETE.
+
+Usage:
+    python benchmarks/bench_retention.py [--sessions 200000] [--batch-size 500]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import ConversationState
+from retention import RetentionEngine
+
+NOW = datetime(2024, 3, 20, 12, 0, tzinfo=timezone.utc)
+
+
+def seed(engine, sessions: int):
+    """Half the sessions ended two days ago, the rest are active."""
+    temp = {"category": "cyber_fraud", "name": "Test Citizen", "address": "Chennai",
+            "description": "Caller posing as bank staff took an OTP and debited the account."}
+    with engine.begin() as conn:
+        conn.execute(delete(ConversationState))
+        for offset in range(0, sessions, 20000):
+            conn.execute(insert(ConversationState), [{
+                "phone_number": f"91{9000000000 + n}",
+                "current_step": "end" if n % 2 else "await_description",
+                "temp_data": dict(temp, complaint_id=f"C{n:08d}") if n % 2 else temp,
+                "updated_at": NOW - (timedelta(days=2) if n % 2 else timedelta(minutes=n % 600)),
+            } for n in range(offset, min(offset + 20000, sessions))])
+
+
+def with_writer(engine, sessions: int, fn):
+    """Run fn while a thread updates active sessions. :return: (fn result, sorted latencies in ms)"""
+    latencies = []
+    done = threading.Event()
+
+    def writer():
+        n = 0
+        table = ConversationState.__table__
+        while not done.is_set():
+            started = time.perf_counter()
+            with engine.begin() as conn:
+                conn.execute(update(table).where(table.c.phone_number == f"91{9000000000 + n}")
+                             .values(current_step="await_evidence"))
+            latencies.append((time.perf_counter() - started) * 1000)
+            n = (n + 2) % sessions
+            time.sleep(0.001)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        result = fn()
+    finally:
+        done.set()
+        thread.join()
+    return result, sorted(latencies)
+
+
+def report(label: str, seconds: float, latencies: list):
+    print(f"{label}: {seconds:.2f}s, {len(latencies)} concurrent writes, "
+          f"p50 {latencies[len(latencies) // 2]:.2f} ms, p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms, "
+          f"max {latencies[-1]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        table = ConversationState.__table__
+
+        seed(engine, args.sessions)
+
+        def single_delete():
+            with engine.begin() as conn:
+                return conn.execute(delete(table).where(
+                    table.c.current_step == "end", table.c.updated_at < NOW - timedelta(hours=24)
+                )).rowcount
+
+        started = time.perf_counter()
+        deleted, latencies = with_writer(engine, args.sessions, single_delete)
+        report(f"Single DELETE ({deleted} rows, no archive)", time.perf_counter() - started, latencies)
+
+        seed(engine, args.sessions)
+        retention = RetentionEngine(sessionmaker(bind=engine), uploads_dir=os.path.join(tmp, "uploads"),
+                                    archive_dir=os.path.join(tmp, "archive"), batch_size=args.batch_size)
+        started = time.perf_counter()
+        result, latencies = with_writer(engine, args.sessions, lambda: retention.expire_sessions(now=NOW))
+        report(f"Batched retention ({result['expired']} rows, {result['archived']} archived, "
+               f"{result['batches']} batches)", time.perf_counter() - started, latencies)
+
+        vacuum = retention.incremental_vacuum()
+        print(f"Incremental vacuum: {vacuum['freed_pages']} pages freed in {vacuum['seconds']}s")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
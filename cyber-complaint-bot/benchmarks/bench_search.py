@@ -0,0 +1,105 @@
+# benchmarks/bench_search.py
+"""
+Full-text search latency over a large complaints table.
+
+Fills a temporary SQLite database with synthetic complaints, builds the
+FTS5 index, and times search_complaints against the LIKE '%...%' scan it
+replaces.
+
+Usage:
+    python benchmarks/bench_search.py [--rows 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import Complaint
+from search import ensure_search_index, search_complaints
+
+WORDS = (
+    "paid money transferred account bank fake call job offer loan app kyc update "
+    "otp shared link clicked refund lottery prize investment crypto trading group "
+    "instagram whatsapp telegram profile harassment threat photos blackmail courier"
+).split()
+HANDLES = ["okaxis", "ybl", "paytm", "oksbi", "ibl"]
+
+
+def description(rng: random.Random, n: int) -> str:
+    words = rng.choices(WORDS, k=25)
+    words.insert(rng.randrange(25), f"user{n % 50000}@{rng.choice(HANDLES)}")
+    return " ".join(words)
+
+
+def populate(engine, rows: int, batch: int = 20000):
+    rng = random.Random(11)
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(insert(Complaint), [
+                {
+                    "complaint_id": f"C{n:09d}",
+                    "phone_number": f"91{9000000000 + n}",
+                    "name": "Test Citizen",
+                    "address": "Chennai",
+                    "description": description(rng, n),
+                    "suspect_details": f"Caller {9800000000 + rng.randrange(10 ** 6)}",
+                    "status": "submitted",
+                }
+                for n in range(offset, min(offset + batch, rows))
+            ])
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """:return: Best-of-`repeat` wall time in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(f"sqlite:///{tmp}/bench.db")
+        Base.metadata.create_all(bind=engine)
+        started = time.perf_counter()
+        populate(engine, args.rows)
+        print(f"Inserted {args.rows} rows in {time.perf_counter() - started:.1f}s")
+        started = time.perf_counter()
+        ensure_search_index(engine)
+        print(f"Built the FTS index in {time.perf_counter() - started:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        queries = {
+            "UPI handle": "user4242@okaxis",
+            "phone prefix": "9800123*",
+            "two terms": "crypto blackmail",
+            "common term": "paid",
+        }
+        for label, query in queries.items():
+            fts = timed(lambda: search_complaints(db, query, limit=20))
+            # The LIKE scan has to read every row whenever there are fewer than 20 matches
+            like = query.rstrip("*").split()[0]
+            scan = timed(lambda: db.query(Complaint).filter(or_(
+                Complaint.description.like(f"%{like}%"), Complaint.suspect_details.like(f"%{like}%")
+            )).limit(20).all(), repeat=1)
+            print(f"{label:<13} FTS {fts:8.2f} ms   LIKE {scan:9.2f} ms")
+        db.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
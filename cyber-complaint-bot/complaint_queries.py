@@ -0,0 +1,99 @@
+# complaint_queries.py
+"""
+Officer lookups over complaints, newest first, with keyset pagination.
+
+Each page is fetched with `WHERE (created_at, id) < (cursor)` instead of
+OFFSET, so page 1000 costs the same as page 1. The filters line up with
+the composite indexes on models.Complaint.
+
+    page = find_complaints(db, status="submitted", limit=50)
+    next_page = find_complaints(db, status="submitted", cursor=page.next_cursor)
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import select, tuple_, union
+
+from models import Complaint
+
+MAX_PAGE_SIZE = 500
+
+
+@dataclass
+class ComplaintPage:
+    items: List[Complaint] = field(default_factory=list)
+    next_cursor: Optional[str] = None  # None on the last page
+
+
+def encode_cursor(created_at: datetime, complaint_pk: int) -> str:
+    raw = json.dumps([created_at.isoformat() if created_at else None, complaint_pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """
+    :return: (created_at, id) of the last row on the previous page
+    :raises ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, complaint_pk = json.loads(base64.urlsafe_b64decode(padded))
+        return (datetime.fromisoformat(created_at) if created_at else None), int(complaint_pk)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def build_query(db, phone_number=None, status=None, category=None, created_from=None,
+                created_to=None, ifsc=None, txn_id=None):
+    """
+    Filtered complaint query; every argument is optional.
+    :param created_from: Inclusive lower bound on created_at
+    :param created_to: Exclusive upper bound on created_at
+    :param txn_id: Matches either the sender or the receiver transaction id
+    """
+    query = db.query(Complaint)
+    if phone_number is not None:
+        query = query.filter(Complaint.phone_number == phone_number)
+    if status is not None:
+        query = query.filter(Complaint.status == status)
+    if category is not None:
+        query = query.filter(Complaint.category == category)
+    if created_from is not None:
+        query = query.filter(Complaint.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(Complaint.created_at < created_to)
+    if ifsc is not None:
+        query = query.filter(Complaint.ifsc == ifsc.upper())
+    if txn_id is not None:
+        # A union of two index lookups; with OR the planner may walk the
+        # created_at index instead
+        matches = union(
+            select(Complaint.id).where(Complaint.sender_txn_id == txn_id),
+            select(Complaint.id).where(Complaint.receiver_txn_id == txn_id),
+        )
+        query = query.filter(Complaint.id.in_(matches))
+    return query
+
+
+def find_complaints(db, limit: int = 50, cursor: str = None, **filters) -> ComplaintPage:
+    """
+    One page of complaints matching `filters` (see build_query), newest first.
+    :param limit: Page size, capped at MAX_PAGE_SIZE
+    :param cursor: next_cursor from the previous page, or None for the first page
+    :return: ComplaintPage
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    query = build_query(db, **filters)
+    if cursor:
+        created_at, complaint_pk = decode_cursor(cursor)
+        query = query.filter(tuple_(Complaint.created_at, Complaint.id) < (created_at, complaint_pk))
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(Complaint.created_at.desc(), Complaint.id.desc()).limit(limit + 1).all()
+    page = ComplaintPage(items=rows[:limit])
+    if len(rows) > limit:
+        last = page.items[-1]
+        page.next_cursor = encode_cursor(last.created_at, last.id)
+    return page
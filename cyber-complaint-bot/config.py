@@ -9,6 +9,107 @@ WHATSAPP_TOKEN = os.getenv("WHATSAPP_TOKEN")
 PHONE_NUMBER_ID = os.getenv("PHONE_NUMBER_ID")
 VERIFY_TOKEN = os.getenv("VERIFY_TOKEN")
 
+# Outbound Graph API client
+GRAPH_API_URL = os.getenv("GRAPH_API_URL", "https://graph.facebook.com/v16.0")
+WHATSAPP_POOL_SIZE = int(os.getenv("WHATSAPP_POOL_SIZE", "10"))
+WHATSAPP_CONNECT_TIMEOUT = float(os.getenv("WHATSAPP_CONNECT_TIMEOUT", "3.05"))
+WHATSAPP_READ_TIMEOUT = float(os.getenv("WHATSAPP_READ_TIMEOUT", "10"))
+WHATSAPP_MAX_RETRIES = int(os.getenv("WHATSAPP_MAX_RETRIES", "3"))
+WHATSAPP_BACKOFF = float(os.getenv("WHATSAPP_BACKOFF", "0.5"))
+WHATSAPP_MAX_BACKOFF = float(os.getenv("WHATSAPP_MAX_BACKOFF", "30"))
+
+# Outbound message outbox. Rates and burst are per host; serve.py splits
+# them between its worker processes
+OUTBOX_ENABLED = os.getenv("OUTBOX_ENABLED", "1") == "1"
+OUTBOX_GLOBAL_RATE = float(os.getenv("OUTBOX_GLOBAL_RATE", "80"))  # messages/second
+OUTBOX_PER_NUMBER_RATE = float(os.getenv("OUTBOX_PER_NUMBER_RATE", "1"))  # messages/second/recipient
+OUTBOX_PER_NUMBER_BURST = int(os.getenv("OUTBOX_PER_NUMBER_BURST", "3"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+
+# Conversation prompts (see steps.PROMPTS for the available languages)
+DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "en")
+
+# Hot conversation-state cache
+STATE_CACHE_ENABLED = os.getenv("STATE_CACHE_ENABLED", "1") == "1"
+STATE_CACHE_SIZE = int(os.getenv("STATE_CACHE_SIZE", "10000"))
+STATE_CACHE_TTL = int(os.getenv("STATE_CACHE_TTL", "600"))  # seconds idle before eviction
+STATE_COMPRESS_MIN_BYTES = int(os.getenv("STATE_COMPRESS_MIN_BYTES", "512"))  # compress cached state above this
+
+# Complaint search: rank only the newest N matches of a query, so common
+# terms cost the same as rare ones
+SEARCH_RANK_WINDOW = int(os.getenv("SEARCH_RANK_WINDOW", "5000"))
+
+# Webhook ingestion queue
+WEBHOOK_QUEUE_PATH = os.getenv("WEBHOOK_QUEUE_PATH", "webhook_queue.db")
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "5"))
+# A failed item waits WEBHOOK_RETRY_BACKOFF * 2^(attempt - 1) seconds, capped
+# at WEBHOOK_MAX_BACKOFF, so a short outage does not use up its attempts
+WEBHOOK_RETRY_BACKOFF = float(os.getenv("WEBHOOK_RETRY_BACKOFF", "2"))
+WEBHOOK_MAX_BACKOFF = float(os.getenv("WEBHOOK_MAX_BACKOFF", "300"))
+# Redelivered webhooks are dropped by WhatsApp message id: a bounded
+# in-memory front, then a durable check in the queue file. Meta retries
+# failed deliveries for up to 7 days
+DEDUP_MEMORY_SIZE = int(os.getenv("DEDUP_MEMORY_SIZE", "100000"))
+DEDUP_MEMORY_TTL = int(os.getenv("DEDUP_MEMORY_TTL", "3600"))
+DEDUP_STORE_TTL = int(os.getenv("DEDUP_STORE_TTL", str(7 * 24 * 3600)))
+# Delivery/read receipts are buffered and written in bulk
+STATUS_BATCH_SIZE = int(os.getenv("STATUS_BATCH_SIZE", "500"))
+STATUS_FLUSH_INTERVAL = float(os.getenv("STATUS_FLUSH_INTERVAL", "1.0"))  # seconds
+
+# Bulk complaint import (importer.py): records per transaction
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+
+# File storage and PDF rendering. PDF_RENDER_WORKERS is per host, split
+# between server processes like the outbox rates
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "uploads"))
+EVIDENCE_MAX_BYTES = int(os.getenv("EVIDENCE_MAX_BYTES", str(16 * 1024 * 1024)))
+EVIDENCE_WORKERS = int(os.getenv("EVIDENCE_WORKERS", "4"))
+PDF_BACKEND = os.getenv("PDF_BACKEND", "reportlab")  # "reportlab" or "weasyprint"
+PDF_RENDER_WORKERS = int(os.getenv("PDF_RENDER_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Backups (backup.py): content-addressed, compressed chunks of the database
+# and uploads; snapshots kept are the newest BACKUP_KEEP_LAST plus all from
+# the last BACKUP_KEEP_DAYS days
+BACKUP_DIR = os.getenv("BACKUP_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "backups"))
+BACKUP_CHUNK_SIZE = int(os.getenv("BACKUP_CHUNK_SIZE", str(64 * 1024)))
+BACKUP_KEEP_LAST = int(os.getenv("BACKUP_KEEP_LAST", "7"))
+BACKUP_KEEP_DAYS = int(os.getenv("BACKUP_KEEP_DAYS", "30"))
+
+# Retention (retention.py): finished conversations are dropped after
+# RETENTION_ENDED_HOURS, idle ones after RETENTION_IDLE_DAYS, and uploads
+# older than RETENTION_UPLOADS_DAYS move to compressed cold storage
+RETENTION_ARCHIVE_DIR = os.getenv(
+    "RETENTION_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+)
+RETENTION_ENDED_HOURS = int(os.getenv("RETENTION_ENDED_HOURS", "24"))
+RETENTION_IDLE_DAYS = int(os.getenv("RETENTION_IDLE_DAYS", "7"))
+RETENTION_UPLOADS_DAYS = int(os.getenv("RETENTION_UPLOADS_DAYS", "90"))
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))  # rows or files per transaction
+RETENTION_PAUSE = float(os.getenv("RETENTION_PAUSE", "0.05"))  # seconds between batches
+RETENTION_VACUUM_PAGES = int(os.getenv("RETENTION_VACUUM_PAGES", "1000"))  # pages freed per transaction
+
+# Serving /uploads
+BASE_URL = os.getenv("BASE_URL")
+UPLOADS_SERVE_MODE = os.getenv("UPLOADS_SERVE_MODE", "app")  # "app", "x-sendfile" or "x-accel"
+UPLOADS_ACCEL_PREFIX = os.getenv("UPLOADS_ACCEL_PREFIX", "/protected-uploads")  # nginx internal location
+UPLOADS_MAX_AGE = int(os.getenv("UPLOADS_MAX_AGE", "86400"))
+UPLOADS_REQUIRE_SIGNED_URLS = os.getenv("UPLOADS_REQUIRE_SIGNED_URLS", "0") == "1"
+UPLOADS_SIGNING_KEY = os.getenv("UPLOADS_SIGNING_KEY") or os.getenv("SECRET_KEY")
+if UPLOADS_REQUIRE_SIGNED_URLS and UPLOADS_SIGNING_KEY in (None, "", "dev-secret-key"):
+    # The development default is public, so links signed with it protect nothing
+    raise RuntimeError("UPLOADS_REQUIRE_SIGNED_URLS is on: set UPLOADS_SIGNING_KEY (or SECRET_KEY) to a secret value")
+UPLOADS_SIGNING_KEY = UPLOADS_SIGNING_KEY or "dev-secret-key"
+UPLOADS_URL_TTL = int(os.getenv("UPLOADS_URL_TTL", str(7 * 24 * 3600)))
+
+# Production server (serve.py)
+SERVER_BIND = os.getenv("SERVER_BIND", f"0.0.0.0:{os.getenv('PORT', '3000')}")
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 2)))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "8"))
+SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", "60"))
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
 # Existing database configuration
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
@@ -1,35 +1,172 @@
 # conversation.py
-import json
 import uuid
-import requests
-import os
+from datetime import datetime
+from functools import partial
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.exc import StaleDataError
 from whatsapp_handler import WhatsAppHandler
 from database import SessionLocal
 from models import Complaint, ConversationState
-from pdf_generator import PDFGenerator
-from validators import InputValidator
-from config import WHATSAPP_TOKEN
+from render_service import get_render_service
+from outbox import OutboxSender
+from evidence_store import get_evidence_ingestor
+from file_serving import upload_url
+from unit_of_work import UnitOfWork
+from state_cache import get_state_cache
+from linkage import LinkageIndex
+import rollups
+from steps import FLOW, LANGUAGE_KEYWORDS
+from validators import REQUIRED, TOO_LONG
+from config import OUTBOX_ENABLED, STATE_CACHE_ENABLED
+
+def send_pdf(phone, link, filename):
+    """Push a rendered complaint PDF; runs on the render service's callback thread."""
+    caption = "Your complaint draft"
+    if not OUTBOX_ENABLED:
+        WhatsAppHandler().send_document(phone, link, filename, caption)
+        return
+    db = SessionLocal()
+    try:
+        OutboxSender(db).send_document(phone, link, filename, caption)
+        db.commit()
+    finally:
+        db.close()
+
+
+def send_pdf_failed(phone, lang):
+    """Tell the citizen their draft PDF could not be generated; runs on the render callback thread."""
+    body = FLOW.text(lang, "draft_failed")
+    if not OUTBOX_ENABLED:
+        WhatsAppHandler().send_text(phone, body)
+        return
+    db = SessionLocal()
+    try:
+        OutboxSender(db).send_text(phone, body)
+        db.commit()
+    finally:
+        db.close()
+
 
 class ConversationManager:
-    def __init__(self):
-        self.whatsapp = WhatsAppHandler()
-        self.db = SessionLocal()
-        self.pdf = PDFGenerator()
-        self.validator = InputValidator()
+    def __init__(self, db=None):
+        # Pass a session when running on a worker thread; never share one across threads
+        self.db = db if db is not None else SessionLocal()
+        # With the outbox, sends are recorded in the same transaction as the
+        # state change and delivered by OutboxDeliveryWorker
+        self.whatsapp = OutboxSender(self.db) if OUTBOX_ENABLED else WhatsAppHandler()
+        self.renderer = get_render_service()
+        self.evidence = get_evidence_ingestor()
+        self.state_cache = get_state_cache() if STATE_CACHE_ENABLED else None
+        # Step -> handler(phone, text, raw_msg, state, temp); field steps come from the flow table
+        self.handlers = {
+            "start": self.start_conversation,
+            "await_category": self.collect_category,
+            "await_evidence": self.collect_evidence,
+            "await_edit_choice": self.handle_edit_choice,
+            "await_edit_field": self.handle_edit_field,
+        }
+        for step, field_step in FLOW.steps.items():
+            self.handlers[step] = partial(self.collect_field, field_step)
+        # Steps whose question is repeated after a language switch
+        self.prompt_handlers = {step: partial(self.ask, step=step) for step in FLOW.steps}
+        self.prompt_handlers["await_category"] = self.prompt_category
+        self.prompt_handlers["await_evidence"] = partial(self.ask, step="await_evidence")
+        # UnitOfWork for the message being processed
+        self.uow = None
 
-    def handle_incoming(self, data):
-        # Process each message event
+    @staticmethod
+    def iter_messages(data):
+        # Yield every message event in a webhook payload; Meta may batch
+        # several messages and entries into one POST
         for entry in data.get("entry", []):
             for change in entry.get("changes", []):
-                if "messages" in change["value"]:
-                    msg = change["value"]["messages"][0]
-                    from_number = msg["from"]
-                    text = msg.get("text", {}).get("body")
-                    self.process_message(from_number, text, msg)
+                yield from change.get("value", {}).get("messages", [])
+
+    @staticmethod
+    def split_by_sender(data):
+        """
+        Split a webhook payload into one single-message payload per message.
+        Each sender's messages are kept in timestamp order; queued with the
+        sender as partition key, one sender's messages run in that order
+        while different senders are processed concurrently.
+        :return: List of (from_number, payload), grouped by sender
+        """
+        groups = {}
+        for msg in ConversationManager.iter_messages(data):
+            groups.setdefault(msg["from"], []).append(msg)
+        return [
+            (sender, {"entry": [{"changes": [{"value": {"messages": [msg]}}]}]})
+            for sender, messages in groups.items()
+            for msg in sorted(messages, key=lambda m: int(m.get("timestamp") or 0))
+        ]
+
+    @staticmethod
+    def message_text(msg):
+        # Typed text, or the id of the button / list row the user tapped
+        if "text" in msg:
+            return msg["text"].get("body")
+        interactive = msg.get("interactive", {})
+        reply = interactive.get("button_reply") or interactive.get("list_reply")
+        return reply.get("id") if reply else None
+
+    def handle_incoming(self, data):
+        # Process each message event
+        for msg in self.iter_messages(data):
+            from_number = msg["from"]
+            text = self.message_text(msg)
+            self.process_message(from_number, text, msg)
 
     def process_message(self, phone, text, raw_msg):
+        # The whole turn (state change, complaint rows, outbox messages)
+        # commits once at the end, or rolls back together on any error
+        try:
+            with UnitOfWork(self.db) as self.uow:
+                self.route_message(phone, text, raw_msg)
+        except StaleDataError:
+            # The state we started from was outdated (stale cache entry or a
+            # concurrent writer); reload it from the DB and replay the turn once
+            if self.state_cache is not None:
+                self.state_cache.evict(phone, stale=True)
+            with UnitOfWork(self.db) as self.uow:
+                self.route_message(phone, text, raw_msg)
+
+    def load_state(self, phone):
+        # Serve hot sessions from the cache without a SELECT
+        cached = self.state_cache.get(phone) if self.state_cache is not None else None
+        if cached is None:
+            return self.db.get(ConversationState, phone)
+        state = ConversationState(
+            phone_number=phone,
+            current_step=cached.current_step,
+            temp_data=cached.temp_data,
+            version=cached.version
+        )
+        # Treat the snapshot as loaded so updates are version-checked UPDATEs
+        make_transient_to_detached(state)
+        return self.db.merge(state, load=False)
+
+    def cache_after_turn(self, phone, state):
+        # Refresh the cache with the values this turn commits
+        snapshot = {}
+
+        def capture():
+            snapshot.update(step=state.current_step, temp=state.temp_data, version=state.version)
+
+        def publish():
+            if snapshot["step"] == "end":
+                self.state_cache.evict(phone)
+            else:
+                self.state_cache.put(phone, snapshot["step"], snapshot["temp"], snapshot["version"])
+
+        self.uow.before_commit(capture)
+        self.uow.after_commit(publish)
+
+    def route_message(self, phone, text, raw_msg):
+        if OUTBOX_ENABLED:
+            self.whatsapp.begin_turn(raw_msg.get("id"))
+
         # Retrieve or create conversation state
-        state = self.db.query(ConversationState).get(phone)
+        state = self.load_state(phone)
         if not state:
             state = ConversationState(
                 phone_number=phone,
@@ -37,260 +174,191 @@ class ConversationManager:
                 temp_data={}
             )
             self.db.add(state)
-            self.db.commit()
+        if self.state_cache is not None:
+            self.cache_after_turn(phone, state)
 
         temp = state.temp_data
         step = state.current_step
 
-        # Route based on current step
-        if step == "start":
-            self.start_conversation(phone, state)
-        elif step == "await_category":
-            self.collect_category(phone, text, state, temp)
-        elif step == "await_name":
-            self.collect_name(phone, text, state, temp)
-        elif step == "await_address":
-            self.collect_address(phone, text, state, temp)
-        elif step == "await_phone":
-            self.collect_phone(phone, text, state, temp)
-        elif step == "await_email":
-            self.collect_email(phone, text, state, temp)
-        elif step == "await_description":
-            self.collect_description(phone, text, state, temp)
-        elif step == "await_evidence":
-            self.collect_evidence(phone, raw_msg, state, temp)
-        elif step == "await_edit_choice":
-            self.handle_edit_choice(phone, text, state, temp)
-        elif step == "await_edit_field":
-            self.handle_edit_field(phone, text, state, temp)
-
-    def start_conversation(self, phone, state):
+        # A language keyword switches the prompts and repeats the question
+        lang = LANGUAGE_KEYWORDS.get((text or "").strip().lower())
+        if lang and step in self.prompt_handlers:
+            temp["lang"] = lang
+            self.prompt_handlers[step](phone, state, temp)
+            return
+
+        handler = self.handlers.get(step)
+        if handler is not None:
+            handler(phone, text, raw_msg, state, temp)
+
+    def send(self, phone, temp, key, **kwargs):
+        self.whatsapp.send_text(phone, FLOW.text(temp.get("lang"), key, **kwargs))
+
+    def start_conversation(self, phone, text, raw_msg, state, temp):
         # Welcome message and category selection
-        buttons = [
-            {"type": "reply", "reply": {"id": "cyber_fraud", "title": "Cyber Fraud"}},
-            {"type": "reply", "reply": {"id": "identity_theft", "title": "Identity Theft"}},
-            {"type": "reply", "reply": {"id": "online_harassment", "title": "Online Harassment"}}
-        ]
-        self.whatsapp.send_buttons(
-            phone,
-            "Welcome to Cyber Crime Complaint System. Please select your complaint category:",
-            buttons
-        )
+        self.prompt_category(phone, state, temp)
+
+    def prompt_category(self, phone, state, temp):
+        lang = temp.get("lang")
+        options = [(c, FLOW.text(lang, f"category_{c}")) for c in FLOW.categories]
+        body = FLOW.text(lang, "welcome")
+        if len(options) <= 3:
+            buttons = [{"type": "reply", "reply": {"id": c, "title": title}} for c, title in options]
+            self.whatsapp.send_buttons(phone, body, buttons)
+        else:
+            rows = [{"id": c, "title": title[:24]} for c, title in options]
+            self.whatsapp.send_list(phone, body, FLOW.text(lang, "edit_button"), rows)
         state.current_step = "await_category"
-        self.db.commit()
 
-    def collect_category(self, phone, text, state, temp):
-        # Store category and ask for name
+    def collect_category(self, phone, text, raw_msg, state, temp):
+        # Store category and ask the first question of its flow
         temp["category"] = text
-        state.temp_data = temp
-        self.whatsapp.send_text(phone, "Please enter your full name:")
-        state.current_step = "await_name"
-        self.db.commit()
-
-    def collect_name(self, phone, text, state, temp):
-        # Validate and store name
-        if not self.validator.validate_name(text):
-            self.whatsapp.send_text(phone, "Invalid name. Please enter a valid full name:")
-            return
-        temp["name"] = text
-        state.temp_data = temp
-        
-        # Check if this is an edit flow - if complaint_id exists, go to review
-        if "complaint_id" in temp:
-            self.prompt_review(phone, state)
-        else:
-            self.whatsapp.send_text(phone, "Please enter your address:")
-            state.current_step = "await_address"
-            self.db.commit()
-
-    def collect_address(self, phone, text, state, temp):
-        # Store address and ask for phone
-        temp["address"] = text
-        state.temp_data = temp
-        
-        # Check if this is an edit flow
-        if "complaint_id" in temp:
-            self.prompt_review(phone, state)
-        else:
-            self.whatsapp.send_text(phone, "Please enter your phone number:")
-            state.current_step = "await_phone"
-            self.db.commit()
-
-    def collect_phone(self, phone, text, state, temp):
-        # Validate and store phone
-        if not self.validator.validate_phone(text):
-            self.whatsapp.send_text(phone, "Invalid phone number. Please enter a valid phone number:")
-            return
-        temp["phone"] = text
-        state.temp_data = temp
-        
-        # Check if this is an edit flow
-        if "complaint_id" in temp:
-            self.prompt_review(phone, state)
+        self.ask(phone, state, temp, FLOW.next_step(text, "await_category"))
+
+    def ask(self, phone, state, temp, step, edit=False):
+        # Send the question for a step and wait for its answer
+        if step == "await_evidence":
+            self.send(phone, temp, "evidence")
         else:
-            self.whatsapp.send_text(phone, "Please enter your email address:")
-            state.current_step = "await_email"
-            self.db.commit()
-
-    def collect_email(self, phone, text, state, temp):
-        # Validate and store email
-        if not self.validator.validate_email(text):
-            self.whatsapp.send_text(phone, "Invalid email. Please enter a valid email address:")
-            return
-        temp["email"] = text
-        state.temp_data = temp
-        
-        # Check if this is an edit flow
-        if "complaint_id" in temp:
-            self.prompt_review(phone, state)
+            field = FLOW.steps[step].field
+            self.send(phone, temp, f"{field}_edit" if edit else field)
+        state.current_step = step
+
+    def collect_field(self, field_step, phone, text, raw_msg, state, temp):
+        # Validate and store one answer, then move to the next step of the flow
+        value = (text or "").strip()
+        if field_step.optional and value.lower() == "skip":
+            value = None
         else:
-            self.whatsapp.send_text(phone, "Please describe your complaint in detail:")
-            state.current_step = "await_description"
-            self.db.commit()
-
-    def collect_description(self, phone, text, state, temp):
-        # Store description and ask for evidence
-        temp["description"] = text
-        state.temp_data = temp
-        
-        # Check if this is an edit flow
+            error = field_step.check(value) if value else REQUIRED
+            if error is not None:
+                self.send(phone, temp, "too_long" if error == TOO_LONG else f"{field_step.field}_invalid")
+                return
+        temp[field_step.field] = value
+
+        # In the edit flow (draft already created) go straight back to review
         if "complaint_id" in temp:
-            self.prompt_review(phone, state)
+            self.prompt_review(phone, state, temp)
         else:
-            self.whatsapp.send_text(phone, "Please upload any evidence (images, documents). Type 'skip' if you don't have any.")
-            state.current_step = "await_evidence"
-            self.db.commit()
-
-    def collect_evidence(self, phone, raw_msg, state, temp):
-        # Handle evidence upload
-        if "image" in raw_msg or "document" in raw_msg:
-            # Save media file
-            media_url = self.get_media_url(raw_msg)
-            if media_url:
-                temp["evidence_url"] = media_url
-                state.temp_data = temp
+            self.ask(phone, state, temp, FLOW.next_step(temp.get("category"), field_step.step))
+
+    def complaint_fields(self, temp):
+        # Complaint columns collected for this category's flow
+        fields = {field: temp.get(field) for field in FLOW.flow_for(temp.get("category"))}
+        fields["category"] = temp.get("category")
+        return fields
+
+    def collect_evidence(self, phone, text, raw_msg, state, temp):
+        # Handle evidence upload; the file itself is downloaded in the background
+        media_id = self.get_media_id(raw_msg)
+        if media_id:
+            temp["evidence_media_id"] = media_id
         
         # Generate complaint ID if not exists
         if "complaint_id" not in temp:
             temp["complaint_id"] = str(uuid.uuid4())[:8].upper()
-            state.temp_data = temp
             
             # Create complaint record
             complaint = Complaint(
                 complaint_id=temp["complaint_id"],
                 phone_number=phone,
-                category=temp.get("category"),
-                name=temp.get("name"),
-                address=temp.get("address"),
-                phone=temp.get("phone"),
-                email=temp.get("email"),
-                description=temp.get("description"),
-                evidence_url=temp.get("evidence_url"),
-                status="draft"
+                status="draft",
+                **self.complaint_fields(temp)
             )
             self.db.add(complaint)
-            self.db.commit()
+            rollups.status_changed(self.db, complaint, None)
         
-        # Generate PDF
-        pdf_path = self.pdf.generate(temp)
-        pdf_url = f"{os.getenv('BASE_URL')}/uploads/{os.path.basename(pdf_path)}"
+        # The draft date is part of the PDF, so it is fixed once rather than
+        # taken from the clock at each render
+        temp.setdefault("created_at", datetime.now().isoformat(timespec="seconds"))
+        # Render the PDF in the background; the file name is known up front
+        render_data = dict(temp, phone_number=phone)
+        pdf_name = self.renderer.output_name(render_data)
+        pdf_url = upload_url(pdf_name)
         temp["pdf_url"] = pdf_url
-        state.temp_data = temp
-        self.db.commit()
+        # Only download and render once the draft is committed
+        if media_id:
+            complaint_id = temp["complaint_id"]
+            self.uow.after_commit(lambda: self.evidence.submit(media_id, phone, complaint_id))
+        lang = temp.get("lang")
+        self.uow.after_commit(
+            lambda: self.renderer.submit(
+                render_data,
+                lambda path: send_pdf(phone, pdf_url, pdf_name),
+                on_error=lambda error: send_pdf_failed(phone, lang)
+            )
+        )
         
-        # Send PDF and prompt for review
-        self.whatsapp.send_text(phone, f"Your complaint draft has been generated. PDF: {pdf_url}")
-        self.prompt_review(phone, state)
+        # The PDF is pushed as a document once rendered; prompt for review now
+        self.send(phone, temp, "draft_generating")
+        self.prompt_review(phone, state, temp)
 
-    def get_media_url(self, raw_msg):
-        # Extract media URL from message
-        media_id = None
+    def get_media_id(self, raw_msg):
+        # Extract the WhatsApp media id from an image or document message
         if "image" in raw_msg:
-            media_id = raw_msg["image"]["id"]
+            return raw_msg["image"]["id"]
         elif "document" in raw_msg:
-            media_id = raw_msg["document"]["id"]
-        
-        if media_id:
-            # Download media from WhatsApp
-            headers = {"Authorization": f"Bearer {WHATSAPP_TOKEN}"}
-            response = requests.get(f"https://graph.facebook.com/v17.0/{media_id}", headers=headers)
-            if response.status_code == 200:
-                return response.json().get("url")
+            return raw_msg["document"]["id"]
         return None
 
-    def prompt_review(self, phone, state):
+    def prompt_review(self, phone, state, temp):
         # Prompt user to review and edit
+        lang = temp.get("lang")
         buttons = [
-            {"type": "reply", "reply": {"id": "yes_edit", "title": "Yes"}},
-            {"type": "reply", "reply": {"id": "no_edit", "title": "No"}}
+            {"type": "reply", "reply": {"id": "yes_edit", "title": FLOW.text(lang, "yes")}},
+            {"type": "reply", "reply": {"id": "no_edit", "title": FLOW.text(lang, "no")}}
         ]
-        self.whatsapp.send_buttons(
-            phone,
-            "Do you want to edit any details before final submission?",
-            buttons
-        )
+        self.whatsapp.send_buttons(phone, FLOW.text(lang, "review"), buttons)
         state.current_step = "await_edit_choice"
-        self.db.commit()
-
-    def handle_edit_choice(self, phone, text, state, temp):
-        # Handle user's choice to edit or finalize
-        if text.lower() in ["yes", "yes_edit"]:
-            # Ask which field to edit
-            options = [
-                {"type": "reply", "reply": {"id": "edit_name", "title": "Name"}},
-                {"type": "reply", "reply": {"id": "edit_address", "title": "Address"}},
-                {"type": "reply", "reply": {"id": "edit_phone", "title": "Phone"}},
-                {"type": "reply", "reply": {"id": "edit_email", "title": "Email"}},
-                {"type": "reply", "reply": {"id": "edit_description", "title": "Description"}}
-            ]
-            self.whatsapp.send_buttons(
-                phone,
-                "Which section do you want to edit?",
-                options
-            )
-            state.current_step = "await_edit_field"
-            self.db.commit()
-        else:
+
+    def handle_edit_choice(self, phone, text, raw_msg, state, temp):
+        # Handle user's choice to edit or finalize; a typed answer may be the button title
+        choice = (text or "").strip().lower()
+        lang = temp.get("lang")
+        if choice in ["yes", "yes_edit", FLOW.text(lang, "yes").lower()]:
+            self.prompt_edit_menu(phone, state, temp)
+        elif choice in ["no", "no_edit", FLOW.text(lang, "no").lower()]:
             # Final submission without SMS
             self.complete_without_sms(phone, state, temp)
+        else:
+            # Anything else is not a decision; submitting is final, so ask again
+            self.prompt_review(phone, state, temp)
 
-    def handle_edit_field(self, phone, text, state, temp):
-        # Route to appropriate field collection based on choice
-        mapping = {
-            "edit_name": ("await_name", "Please enter your corrected full name:"),
-            "edit_address": ("await_address", "Please enter your corrected address:"),
-            "edit_phone": ("await_phone", "Please enter your corrected phone number:"),
-            "edit_email": ("await_email", "Please enter your corrected email address:"),
-            "edit_description": ("await_description", "Please enter your corrected description:")
-        }
-        
-        if text in mapping:
-            next_step, prompt = mapping[text]
-            self.whatsapp.send_text(phone, prompt)
-            state.current_step = next_step
-            self.db.commit()
+    def prompt_edit_menu(self, phone, state, temp):
+        # Ask which field to edit; a list message, as buttons are limited to three
+        lang = temp.get("lang")
+        self.whatsapp.send_list(
+            phone,
+            FLOW.text(lang, "edit_menu"),
+            FLOW.text(lang, "edit_button"),
+            FLOW.edit_rows(temp.get("category"), lang)
+        )
+        state.current_step = "await_edit_field"
+
+    def handle_edit_field(self, phone, text, raw_msg, state, temp):
+        # Reopen the chosen field's step
+        step = FLOW.edit_steps.get(text)
+        if step is not None:
+            self.ask(phone, state, temp, step, edit=True)
         else:
-            self.whatsapp.send_text(phone, "Invalid choice. Please select a valid section to edit.")
+            self.send(phone, temp, "edit_invalid")
 
     def complete_without_sms(self, phone, state, temp):
         # Save final fields to Complaint record and finalize
         complaint = self.db.query(Complaint).filter_by(complaint_id=temp["complaint_id"]).first()
         if complaint:
-            # Update all fields from temp data
-            for key, value in temp.items():
-                if hasattr(complaint, key):
-                    setattr(complaint, key, value)
+            for key, value in self.complaint_fields(temp).items():
+                setattr(complaint, key, value)
+            previous_status = complaint.status
             complaint.status = "submitted"
-            self.db.commit()
+            # Keep the dashboard counters in step, in this same transaction
+            rollups.status_changed(self.db, complaint, previous_status)
+            # Link it to earlier complaints about the same suspect
+            LinkageIndex(self.db).add_complaint(complaint)
 
             # Inform user and end conversation
-            self.whatsapp.send_text(
-                phone,
-                f"Your complaint (ID: {complaint.complaint_id}) has been submitted successfully. Thank you."
-            )
+            self.send(phone, temp, "submitted", complaint_id=complaint.complaint_id)
             state.current_step = "end"
-            self.db.commit()
         else:
-            self.whatsapp.send_text(phone, "Error: Complaint not found. Please start again.")
+            self.send(phone, temp, "not_found")
             state.current_step = "start"
-            self.db.commit()
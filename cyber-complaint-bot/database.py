@@ -1,6 +1,7 @@
 # database.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
 import os
 from dotenv import load_dotenv
 
@@ -8,13 +9,108 @@ from dotenv import load_dotenv
 load_dotenv()
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./complaints.db")
 
+# Connection pool sizing (per process)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# SQLite: how long a writer waits for the lock
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Execution options for a transaction that will write; on SQLite it begins
+# IMMEDIATE (see begin_write)
+WRITE_TRANSACTION = {"sqlite_begin": "IMMEDIATE"}
+
+
+def _configure_sqlite(engine, in_memory: bool, read_only: bool = False):
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Let SQLAlchemy emit BEGIN itself (see below) instead of pysqlite
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            if not read_only and cursor.execute("PRAGMA page_count").fetchone()[0] == 0:
+                # Lets retention.py return freed pages in small steps. Only
+                # takes effect on a new database, so it goes before the WAL
+                # switch initialises the file; an existing one needs one VACUUM.
+                # Setting it on an existing file waits for the write lock, so
+                # it is only sent for a new one
+                cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # WAL lets readers proceed during writes; NORMAL syncs only at checkpoints
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def do_begin(conn):
+        # Transactions begin DEFERRED, so reads (state loads, /metrics,
+        # outbox scans) run alongside the writer under WAL. Write paths ask
+        # for BEGIN IMMEDIATE through WRITE_TRANSACTION; read-only engines
+        # never take the write lock
+        mode = conn.get_execution_options().get("sqlite_begin")
+        if mode == "IMMEDIATE" and not read_only:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+        else:
+            conn.exec_driver_sql("BEGIN")
+
+
+def make_engine(url: str = DATABASE_URL, read_only: bool = False):
+    """
+    Build an engine tuned for the backend in `url`.
+    SQLite gets WAL, synchronous=NORMAL, busy_timeout and a sized pool;
+    other backends (e.g. postgresql+psycopg2://) get a pre-pinged,
+    recycled connection pool.
+    :param read_only: For reporting: refuse writes and, on SQLite, begin
+                      deferred transactions instead of taking the write lock
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        in_memory = parsed.database in (None, "", ":memory:")
+        options = {"connect_args": {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}}
+        if not in_memory:
+            options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+        engine = create_engine(url, **options)
+        _configure_sqlite(engine, in_memory, read_only)
+        return engine
+
+    options = {}
+    if read_only and parsed.get_backend_name() == "postgresql":
+        options["execution_options"] = {"postgresql_readonly": True}
+    return create_engine(
+        url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        **options
+    )
+
+
+def begin_write(db):
+    """
+    Start the session's next transaction as a write transaction. On SQLite
+    it takes the write lock up front, so a read-then-write transaction waits
+    on busy_timeout for a concurrent writer instead of failing with
+    SQLITE_BUSY when it first writes; other backends begin as usual.
+    :param db: Session with no transaction in progress
+    """
+    if db.in_transaction():
+        raise RuntimeError("begin_write() needs a session with no transaction in progress")
+    db.connection(execution_options=WRITE_TRANSACTION)
+
+
 # Create engine and session factory
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(
     bind=engine, autocommit=False, autoflush=False
 )
 
+# Thread-local sessions for code that runs on worker threads
+ScopedSession = scoped_session(SessionLocal)
+
 # Base class for models
 Base = declarative_base()
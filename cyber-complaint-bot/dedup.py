@@ -0,0 +1,61 @@
+# dedup.py
+import threading
+import time
+from collections import OrderedDict
+
+from config import DEDUP_MEMORY_SIZE, DEDUP_MEMORY_TTL
+
+
+def message_id(payload: dict):
+    """
+    WhatsApp message id (wamid) of a single-message payload from
+    ConversationManager.split_by_sender.
+    :return: The id, or None if the payload has none
+    """
+    try:
+        return payload["entry"][0]["changes"][0]["value"]["messages"][0].get("id")
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+class SeenMessages:
+    """
+    Bounded in-memory set of recently seen message ids with a TTL.
+
+    It sits in front of the durable check in WorkQueue.enqueue: a burst of
+    redeliveries for the same message (Meta retries on timeout, most often
+    when we are already overloaded) is dropped here without touching disk.
+    It is per process and forgets old ids, so it is a fast path only; the
+    queue's seen_messages table is what guarantees a message is queued once.
+    """
+
+    def __init__(self, max_entries: int = DEDUP_MEMORY_SIZE, ttl: float = DEDUP_MEMORY_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def seen(self, message_id: str) -> bool:
+        """:return: True if the id was added within the TTL"""
+        now = time.monotonic()
+        with self._lock:
+            added = self._ids.get(message_id)
+            if added is None:
+                return False
+            if now - added > self.ttl:
+                del self._ids[message_id]
+                return False
+            self.hits += 1
+            return True
+
+    def add(self, message_id: str):
+        now = time.monotonic()
+        with self._lock:
+            self._ids[message_id] = now
+            self._ids.move_to_end(message_id)
+            while len(self._ids) > self.max_entries:
+                self._ids.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"size": len(self._ids), "hits": self.hits}
@@ -0,0 +1,197 @@
+# evidence_store.py
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from database import SessionLocal
+from models import Evidence
+from whatsapp_handler import WhatsAppHandler
+from config import GRAPH_API_URL, UPLOADS_DIR, EVIDENCE_MAX_BYTES, EVIDENCE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Evidence types accepted from citizens, with the extension used on disk
+ALLOWED_MIME_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "application/pdf": ".pdf",
+}
+
+
+class EvidenceRejected(Exception):
+    """Raised when media is too large or of a type we do not store."""
+
+
+class EvidenceStore:
+    """
+    Content-addressed store for evidence media under uploads/evidence/.
+
+    Media is streamed from the Graph API in chunks, hashed while it is
+    written to a temp file, and moved to evidence/<sha[:2]>/<sha><ext>.
+    Identical files (e.g. the same screenshot sent twice) are stored once.
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = EVIDENCE_MAX_BYTES,
+                 chunk_size: int = 64 * 1024, whatsapp: WhatsAppHandler = None):
+        self.uploads_dir = UPLOADS_DIR if root is None else root
+        self.root = os.path.join(self.uploads_dir, "evidence")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.whatsapp = whatsapp or WhatsAppHandler()
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def resolve_media(self, media_id: str) -> dict:
+        """
+        Look up a WhatsApp media id.
+        :return: dict with the short-lived download 'url', 'mime_type' and 'file_size'
+        """
+        response = self.whatsapp.session.get(
+            f"{GRAPH_API_URL}/{media_id}", headers=self.whatsapp.headers, timeout=self.whatsapp.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def download(self, url: str, mime_type: str, declared_size: int = None) -> dict:
+        """
+        Stream a media URL into the store without buffering it in memory.
+        :return: dict with sha256, size, mime_type, path (relative to uploads) and
+                 deduplicated (True if the content was already stored)
+        """
+        ext = ALLOWED_MIME_TYPES.get((mime_type or "").split(";")[0].strip())
+        if ext is None:
+            raise EvidenceRejected(f"Unsupported media type: {mime_type}")
+        if declared_size and declared_size > self.max_bytes:
+            raise EvidenceRejected(f"Media too large: {declared_size} bytes")
+
+        digest = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.tmp_dir, uuid.uuid4().hex)
+        try:
+            with self.whatsapp.session.get(
+                url, headers=self.whatsapp.headers, timeout=self.whatsapp.timeout, stream=True
+            ) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise EvidenceRejected(f"Media exceeds {self.max_bytes} bytes")
+                        digest.update(chunk)
+                        f.write(chunk)
+
+            sha = digest.hexdigest()
+            rel_path = os.path.join("evidence", sha[:2], sha + ext)
+            final_path = os.path.join(self.uploads_dir, rel_path)
+            deduplicated = os.path.exists(final_path)
+            if deduplicated:
+                # In use again: keep retention.py from moving it to cold storage
+                os.utime(final_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return {
+                "sha256": sha,
+                "size": size,
+                "mime_type": mime_type,
+                "path": rel_path,
+                "deduplicated": deduplicated,
+            }
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+class EvidenceIngestor:
+    """
+    Downloads evidence on a small thread pool, off the conversation path,
+    and records an Evidence row per received media item.
+    """
+
+    def __init__(self, session_factory, store: EvidenceStore = None, workers: int = EVIDENCE_WORKERS):
+        self.session_factory = session_factory
+        self.store = store
+        self.workers = workers
+        self.ingested = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self.failed = 0
+        self.bytes = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, media_id: str, phone: str, complaint_id: str = None):
+        """
+        Queue a media item for download.
+        :return: Future resolving to the Evidence id, or None if rejected
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="evidence")
+                if self.store is None:
+                    self.store = EvidenceStore()
+        return self._executor.submit(self.ingest, media_id, phone, complaint_id)
+
+    def ingest(self, media_id: str, phone: str, complaint_id: str = None):
+        try:
+            media = self.store.resolve_media(media_id)
+            stored = self.store.download(media["url"], media.get("mime_type"), media.get("file_size"))
+        except EvidenceRejected as e:
+            logger.warning(f"Evidence {media_id} rejected: {str(e)}")
+            with self._lock:
+                self.rejected += 1
+            return None
+        except Exception as e:
+            logger.error(f"Evidence {media_id} download failed: {str(e)}", exc_info=True)
+            with self._lock:
+                self.failed += 1
+            return None
+
+        db = self.session_factory()
+        try:
+            evidence = Evidence(
+                complaint_id=complaint_id,
+                phone_number=phone,
+                media_id=media_id,
+                sha256=stored["sha256"],
+                path=stored["path"],
+                mime_type=stored["mime_type"],
+                size=stored["size"]
+            )
+            db.add(evidence)
+            db.commit()
+            evidence_id = evidence.id
+        finally:
+            db.close()
+
+        with self._lock:
+            self.ingested += 1
+            self.bytes += stored["size"]
+            if stored["deduplicated"]:
+                self.deduplicated += 1
+        return evidence_id
+
+    def stats(self) -> dict:
+        return {
+            "ingested": self.ingested,
+            "deduplicated": self.deduplicated,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "bytes": self.bytes,
+        }
+
+
+_ingestor = None
+_ingestor_lock = threading.Lock()
+
+
+def get_evidence_ingestor() -> EvidenceIngestor:
+    """Process-wide evidence ingestor shared by all conversation workers."""
+    global _ingestor
+    with _ingestor_lock:
+        if _ingestor is None:
+            _ingestor = EvidenceIngestor(SessionLocal)
+        return _ingestor
@@ -0,0 +1,95 @@
+# file_serving.py
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+
+from flask import Response, send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+from retention import RetentionEngine
+from config import (
+    BASE_URL, UPLOADS_DIR, UPLOADS_SERVE_MODE, UPLOADS_ACCEL_PREFIX, UPLOADS_MAX_AGE,
+    UPLOADS_REQUIRE_SIGNED_URLS, UPLOADS_SIGNING_KEY, UPLOADS_URL_TTL, RETENTION_ARCHIVE_DIR
+)
+
+
+def sign(filename: str, expires: int, key: str = UPLOADS_SIGNING_KEY) -> str:
+    """HMAC-SHA256 over the file name and expiry time."""
+    message = f"{filename}:{expires}".encode()
+    return hmac.new(key.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def verify_signature(filename: str, expires, signature, key: str = UPLOADS_SIGNING_KEY, now: float = None) -> bool:
+    """
+    Check a signed upload link.
+    :return: True if the signature matches and has not expired
+    """
+    if not expires or not signature:
+        return False
+    try:
+        expires = int(expires)
+    except ValueError:
+        return False
+    if expires < (now or time.time()):
+        return False
+    return hmac.compare_digest(sign(filename, expires, key), signature)
+
+
+def upload_url(filename: str, ttl: int = UPLOADS_URL_TTL) -> str:
+    """
+    Public URL for a file in uploads/, signed with an expiry when
+    UPLOADS_REQUIRE_SIGNED_URLS is on.
+    """
+    url = f"{BASE_URL}/uploads/{filename}"
+    if UPLOADS_REQUIRE_SIGNED_URLS:
+        expires = int(time.time()) + ttl
+        url += f"?exp={expires}&sig={sign(filename, expires)}"
+    return url
+
+
+def thaw_upload(filename: str, path: str, uploads_dir: str = UPLOADS_DIR,
+                archive_dir: str = RETENTION_ARCHIVE_DIR) -> bool:
+    """
+    Bring a file that retention.py moved to cold storage back into uploads/.
+    :return: True if the file is now at `path`
+    """
+    try:
+        RetentionEngine(uploads_dir=uploads_dir, archive_dir=archive_dir).thaw(filename)
+    except (ValueError, OSError):
+        # Not in cold storage, or another request is thawing it
+        pass
+    return os.path.isfile(path)
+
+
+def serve_upload(filename: str, uploads_dir: str = UPLOADS_DIR, mode: str = UPLOADS_SERVE_MODE,
+                 archive_dir: str = RETENTION_ARCHIVE_DIR) -> Response:
+    """
+    Build the response for a file in uploads/.
+
+    "app" streams the file from Flask with ETag/Last-Modified validators and
+    Range support. "x-sendfile" (enable app.use_x_sendfile) and "x-accel"
+    (nginx X-Accel-Redirect) hand the body to the front-end server so large
+    downloads do not occupy a Python worker. A file moved to cold storage is
+    thawed first, so old links and Evidence paths keep working.
+    """
+    path = safe_join(uploads_dir, filename)
+    if path is None:
+        raise NotFound()
+    if not os.path.isfile(path) and not thaw_upload(filename, path, uploads_dir, archive_dir):
+        raise NotFound()
+
+    if mode == "x-accel":
+        # nginx serves the body and answers Range and conditional requests itself
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream")
+        response.headers["X-Accel-Redirect"] = f"{UPLOADS_ACCEL_PREFIX}/{filename}"
+    else:
+        response = send_file(path, conditional=True, etag=True, max_age=UPLOADS_MAX_AGE)
+
+    # Uploads hold personal data: allow browser caching, never shared caches
+    response.cache_control.public = False
+    response.cache_control.private = True
+    response.cache_control.max_age = UPLOADS_MAX_AGE
+    return response
@@ -0,0 +1,353 @@
+# importer.py
+"""
+Bulk import of complaints from partner helplines (CSV or JSONL).
+
+The file is streamed in batches of `batch_size` records. Each batch is
+validated with validators.validate_many, inserted with one executemany
+(complaint ids already stored are skipped, so a re-sent sheet doesn't
+duplicate rows) and committed together with the import's checkpoint row
+and the dashboard rollup counters. Rejected records go to a JSONL side file with their error
+codes. Memory stays at one batch whatever the file size.
+
+An interrupted import resumes from its last committed batch: the
+checkpoint counts the source records consumed and the committed length of
+the rejects file, which is truncated back to it, so every record is either
+inserted or rejected exactly once.
+
+    python importer.py helpline_march.csv --map "Mobile=phone" --map "Complaint=description"
+    python importer.py helpline_march.csv            # run again to resume
+    python importer.py helpline_march.jsonl --restart --link
+
+Imported complaints are not linked one by one; pass --link (or run
+`python linkage.py --rebuild`) afterwards.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import SessionLocal, WRITE_TRANSACTION
+from models import Complaint, ImportCheckpoint
+from validators import COMPLAINT_SCHEMA, validate_many
+import rollups
+from config import IMPORT_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+_INSERT = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+_HEADER_SEPARATORS = re.compile(r"[^a-z0-9]+")
+
+# Complaint columns an import may fill; id and created_at bookkeeping aside
+IMPORT_COLUMNS = (
+    "complaint_id", "phone_number", "category", "name", "address", "phone", "email", "description",
+    "transaction_count", "sender_txn_id", "receiver_txn_id", "ifsc", "suspect_name", "suspect_details", "status",
+)
+DEFAULT_STATUS = "submitted"
+
+
+def header_key(name: str) -> str:
+    """Column header as a field name: "Phone Number " -> "phone_number"."""
+    return _HEADER_SEPARATORS.sub("_", str(name).strip().lower()).strip("_")
+
+
+def fingerprint(path: str, length: int = 65536) -> str:
+    """
+    Hash of the file's first `length` bytes, tagged with how many were
+    hashed, to refuse resuming against a different file. Rows appended to
+    the same file keep the fingerprint (see fingerprint_matches).
+    """
+    with open(path, "rb") as f:
+        head = f.read(length)
+    return f"{len(head)}:{hashlib.sha1(head).hexdigest()}"
+
+
+def fingerprint_matches(path: str, stored: str) -> bool:
+    length, _, _ = stored.partition(":")
+    return fingerprint(path, int(length)) == stored
+
+
+def read_records(path: str, fmt: str = None, mapping: dict = None):
+    """
+    Stream records from a CSV (header row) or JSONL file.
+    :param fmt: "csv" or "jsonl"; guessed from the extension when None
+    :param mapping: Source field -> Complaint column, applied after header normalization
+    :return: Iterator of dicts
+    """
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv")
+    mapping = {header_key(k): v for k, v in (mapping or {}).items()}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            keys = [mapping.get(header_key(h), header_key(h)) for h in header]
+            for row in reader:
+                yield dict(zip(keys, row))
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Keep the count aligned with the file; validation rejects it
+                    yield {"_raw": line}
+                    continue
+                yield {mapping.get(header_key(k), header_key(k)): v for k, v in record.items()}
+
+
+def _created_at(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+def to_row(record: dict) -> dict:
+    """Complaint row for a validated record."""
+    row = {}
+    for column in IMPORT_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, str):
+            value = value.strip() or None
+        row[column] = value
+    # Partners send the reporter's number in either column
+    row["phone_number"] = row["phone_number"] or row["phone"]
+    row["complaint_id"] = row["complaint_id"] or uuid.uuid4().hex[:16].upper()
+    row["status"] = row["status"] or DEFAULT_STATUS
+    if row["transaction_count"] is not None:
+        try:
+            row["transaction_count"] = int(row["transaction_count"])
+        except (TypeError, ValueError):
+            row["transaction_count"] = None
+    created_at = _created_at(record.get("created_at"))
+    if created_at is not None:
+        row["created_at"] = created_at
+    return row
+
+
+class ComplaintImporter:
+    """
+    One import run of a file. See the module docstring.
+    :param source_path: CSV or JSONL file
+    :param name: Checkpoint key; defaults to the file name
+    :param rejects_path: Side file for rejected records; defaults to <file>.rejects.jsonl
+    """
+
+    def __init__(self, source_path: str, session_factory=SessionLocal, fmt: str = None, mapping: dict = None,
+                 name: str = None, rejects_path: str = None, batch_size: int = IMPORT_BATCH_SIZE,
+                 schema: dict = None):
+        self.source_path = source_path
+        self.session_factory = session_factory
+        self.fmt = fmt
+        self.mapping = mapping or {}
+        self.name = name or os.path.basename(source_path)
+        self.rejects_path = rejects_path or f"{source_path}.rejects.jsonl"
+        self.batch_size = batch_size
+        # The WhatsApp number falls back to the contact phone, so only one is required
+        self.schema = dict(COMPLAINT_SCHEMA if schema is None else schema)
+        if "phone_number" in self.schema:
+            self.schema["phone_number"] = (self.schema["phone_number"][0], False)
+
+    def _load_checkpoint(self, db, restart: bool):
+        checkpoint = db.get(ImportCheckpoint, self.name)
+        if checkpoint is not None and (restart or not fingerprint_matches(self.source_path, checkpoint.fingerprint)):
+            if not restart:
+                raise ValueError(
+                    f"Import {self.name!r} has a checkpoint for a different file; use --restart or --name"
+                )
+            db.delete(checkpoint)
+            db.flush()
+            checkpoint = None
+        if checkpoint is None:
+            checkpoint = ImportCheckpoint(source=self.name, fingerprint=fingerprint(self.source_path), records=0, inserted=0,
+                                          duplicates=0, rejected=0, rejects_bytes=0)
+            db.add(checkpoint)
+        db.commit()
+        return checkpoint
+
+    def run(self, restart: bool = False, max_batches: int = None) -> dict:
+        """
+        Import (or resume importing) the file.
+        :param restart: Discard an existing checkpoint and start from the first record
+        :param max_batches: Stop after this many batches (for trial runs)
+        :return: Summary dict for this run and the totals so far
+        """
+        started = time.perf_counter()
+        # Every transaction here writes (checkpoint, batches), so each takes
+        # the SQLite write lock up front
+        db = self.session_factory(execution_options=WRITE_TRANSACTION)
+        run = {"records": 0, "inserted": 0, "duplicates": 0, "rejected": 0, "batches": 0}
+        try:
+            checkpoint = self._load_checkpoint(db, restart)
+            skip = checkpoint.records
+            insert = _INSERT[db.get_bind().dialect.name]
+            statement = insert(Complaint.__table__).on_conflict_do_nothing(index_elements=["complaint_id"])
+
+            with open(self.rejects_path, "a+b") as rejects:
+                # Drop rejects written by a batch that never committed
+                rejects.truncate(checkpoint.rejects_bytes)
+                rejects.seek(checkpoint.rejects_bytes)
+                line_no = 0
+                batch = []
+                for record in read_records(self.source_path, self.fmt, self.mapping):
+                    line_no += 1
+                    if line_no <= skip:
+                        continue
+                    batch.append((line_no, record))
+                    if len(batch) >= self.batch_size:
+                        self._import_batch(db, statement, checkpoint, batch, rejects, run)
+                        batch = []
+                        if max_batches is not None and run["batches"] >= max_batches:
+                            break
+                else:
+                    if batch:
+                        self._import_batch(db, statement, checkpoint, batch, rejects, run)
+            totals = {
+                "records": checkpoint.records,
+                "inserted": checkpoint.inserted,
+                "duplicates": checkpoint.duplicates,
+                "rejected": checkpoint.rejected,
+            }
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        elapsed = time.perf_counter() - started
+        run.update(
+            resumed_from=skip,
+            seconds=round(elapsed, 2),
+            rows_per_min=round(run["records"] / elapsed * 60) if elapsed else 0,
+            totals=totals,
+            rejects_path=self.rejects_path,
+        )
+        return run
+
+    def _import_batch(self, db, statement, checkpoint, batch, rejects, run):
+        records = [record for _, record in batch]
+        errors = validate_many(records, self.schema)
+        rows = []
+        rejected = 0
+        for (line_no, record), error in zip(batch, errors):
+            if error is None and "_raw" in record:
+                error = {"_record": "bad_format"}
+            if error is None and not (record.get("phone_number") or record.get("phone")):
+                error = {"phone_number": "required"}
+            if error is None:
+                rows.append(to_row(record))
+            else:
+                rejected += 1
+                rejects.write(json.dumps(
+                    {"record_no": line_no, "errors": error, "record": record}, ensure_ascii=False, default=str
+                ).encode("utf-8") + b"\n")
+
+        # Drop complaint ids already stored (or repeated in the batch) up front,
+        # so the rollup counters only see rows that are really inserted
+        existing = set(db.execute(
+            select(Complaint.complaint_id).where(Complaint.complaint_id.in_([r["complaint_id"] for r in rows]))
+        ).scalars()) if rows else set()
+        new_rows = []
+        for row in rows:
+            if row["complaint_id"] not in existing:
+                existing.add(row["complaint_id"])
+                new_rows.append(row)
+
+        inserted = 0
+        if new_rows:
+            # Core executemany; rows without created_at get the server default
+            with_ts = [r for r in new_rows if "created_at" in r]
+            without_ts = [r for r in new_rows if "created_at" not in r]
+            for group in (with_ts, without_ts):
+                if group:
+                    result = db.connection().execute(statement, group)
+                    inserted += result.rowcount if result.rowcount >= 0 else len(group)
+            deltas = Counter()
+            for row in new_rows:
+                deltas[("status", row["status"])] += 1
+                if row["status"] != "draft":
+                    deltas.update(rollups.submitted_keys(SimpleNamespace(**row)))
+            rollups.add_counts(db, deltas)
+        rejects.flush()
+
+        checkpoint.records += len(batch)
+        checkpoint.inserted += inserted
+        checkpoint.duplicates += len(rows) - inserted
+        checkpoint.rejected += rejected
+        checkpoint.rejects_bytes = rejects.tell()
+        # The batch and its checkpoint commit together
+        db.commit()
+
+        run["records"] += len(batch)
+        run["inserted"] += inserted
+        run["duplicates"] += len(rows) - inserted
+        run["rejected"] += rejected
+        run["batches"] += 1
+        logger.info(f"Import {self.name}: {checkpoint.records} records, {checkpoint.inserted} inserted, "
+                    f"{checkpoint.rejected} rejected")
+
+
+def _mapping(pairs) -> dict:
+    mapping = {}
+    for pair in pairs or []:
+        source, sep, column = pair.partition("=")
+        if not sep or not column.strip():
+            raise ValueError(f"--map expects SOURCE=column, got {pair!r}")
+        mapping[source] = column.strip()
+    return mapping
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import complaints from a CSV or JSONL file.")
+    parser.add_argument("path")
+    parser.add_argument("--format", dest="fmt", choices=["csv", "jsonl"])
+    parser.add_argument("--map", action="append", metavar="SOURCE=column",
+                        help="Map a source column to a complaint column (repeatable)")
+    parser.add_argument("--name", help="Checkpoint name (default: file name)")
+    parser.add_argument("--rejects", help="Rejects file (default: <path>.rejects.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and start over")
+    parser.add_argument("--link", action="store_true", help="Rebuild the linkage index afterwards")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        importer = ComplaintImporter(
+            args.path, fmt=args.fmt, mapping=_mapping(args.map), name=args.name,
+            rejects_path=args.rejects, batch_size=args.batch_size
+        )
+        summary = importer.run(restart=args.restart)
+    except ValueError as e:
+        parser.error(str(e))
+    totals = summary["totals"]
+    print(
+        f"Imported {summary['records']} records in {summary['seconds']}s ({summary['rows_per_min']} rows/min): "
+        f"{summary['inserted']} inserted, {summary['duplicates']} duplicates, {summary['rejected']} rejected"
+    )
+    print(f"Totals for {importer.name}: {totals['records']} records, {totals['inserted']} inserted, "
+          f"{totals['rejected']} rejected ({summary['rejects_path']})")
+    if args.link:
+        from linkage import rebuild
+        linked = rebuild()
+        print(f"Linkage rebuilt: {linked['linked_complaints']} linked complaints in {linked['clusters']} clusters")
+
+
+if __name__ == "__main__":
+    main()
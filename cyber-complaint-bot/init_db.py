@@ -1,10 +1,13 @@
 # init_db.py
-from database import engine, Base
+from database import engine
+from migrations import ensure_schema
 import models  # Ensure models are imported so Base.metadata knows about them
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
+    added = ensure_schema(engine)
     print("Database tables created.")
+    if added:
+        print(f"Added columns: {', '.join(added)}")
 
 if __name__ == "__main__":
     init_db()
@@ -0,0 +1,366 @@
+# linkage.py
+"""
+Cross-complaint linkage: spot the same suspect across different victims.
+
+Suspect identifiers (receiving UPI handle or account, transaction ids, IFSC,
+suspect name, phone numbers and UPI handles mentioned in suspect_details)
+are normalized and kept in three tables:
+
+    link_identifiers  inverted index (kind, value) -> complaint ids
+    link_counts       complaints per identifier, an O(1) primary-key lookup
+    link_clusters     complaint -> cluster, merged union-find style whenever
+                      two complaints share a strong identifier (union by size,
+                      sizes in link_cluster_sizes)
+
+The index is updated incrementally as each complaint is submitted
+(ConversationManager.complete_without_sms) and can be rebuilt in bulk:
+
+    python linkage.py --rebuild
+    python linkage.py --complaint 1A2B3C4D
+"""
+import argparse
+import logging
+import re
+import time
+
+from sqlalchemy import and_, delete, insert, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import SessionLocal
+from models import Complaint, LinkIdentifier, LinkCount, LinkCluster, LinkClusterSize
+
+logger = logging.getLogger(__name__)
+
+# Identifiers specific enough to link complaints into one cluster. IFSC codes
+# and names are shared by unrelated people, so they are only counted
+STRONG_KINDS = ("upi", "account", "txn", "phone")
+
+_NON_ALNUM = re.compile(r"[^A-Z0-9]")
+_IFSC = re.compile(r"^[A-Z]{4}0[A-Z0-9]{6}$")
+_UPI_IN_TEXT = re.compile(r"\b[a-z0-9._-]{2,}@[a-z][a-z0-9]+\b", re.IGNORECASE)
+_PHONE_IN_TEXT = re.compile(r"(?<![\d+])(?:\+?91[\s-]?)?([6-9]\d{4}[\s-]?\d{5})(?!\d)")
+
+_UPSERT = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+def _matching(model, keys):
+    # One `kind = ? AND value IN (...)` term per kind, each a range of the
+    # (kind, value) index; a row-value IN list would scan the table on SQLite
+    by_kind = {}
+    for kind, value in keys:
+        by_kind.setdefault(kind, []).append(value)
+    return or_(*(and_(model.kind == kind, model.value.in_(values)) for kind, values in sorted(by_kind.items())))
+
+
+def normalize(kind: str, value):
+    """
+    Canonical form of an identifier, so "SBIN 0001234" and "sbin0001234"
+    or "+91 98765-43210" and "9876543210" compare equal.
+    :return: The normalized value, or None if it is empty or malformed
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if kind == "upi":
+        value = value.lower()
+        return value if "@" in value else None
+    if kind == "phone":
+        digits = re.sub(r"\D", "", value)[-10:]
+        return digits if len(digits) == 10 else None
+    if kind == "name":
+        return " ".join(value.casefold().split()) or None
+    value = _NON_ALNUM.sub("", value.upper())
+    if kind == "ifsc":
+        return value if _IFSC.match(value) else None
+    # account and txn: short values are typos or placeholders, not identifiers
+    return value if len(value) >= 6 else None
+
+
+def extract_identifiers(complaint) -> set:
+    """
+    Normalized identifiers of a complaint (an ORM object or any row with the
+    same attribute names).
+    :return: Set of (kind, value) tuples
+    """
+    candidates = []
+    receiver = getattr(complaint, "receiver_txn_id", None)
+    if receiver:
+        candidates.append(("upi" if "@" in receiver else "account", receiver))
+    candidates.append(("txn", getattr(complaint, "sender_txn_id", None)))
+    candidates.append(("ifsc", getattr(complaint, "ifsc", None)))
+    candidates.append(("name", getattr(complaint, "suspect_name", None)))
+    details = getattr(complaint, "suspect_details", None) or ""
+    candidates.extend(("upi", handle) for handle in _UPI_IN_TEXT.findall(details))
+    candidates.extend(("phone", number) for number in _PHONE_IN_TEXT.findall(details))
+
+    identifiers = set()
+    for kind, raw in candidates:
+        value = normalize(kind, raw)
+        if value:
+            identifiers.add((kind, value))
+    return identifiers
+
+
+class UnionFind:
+    """Disjoint sets with path halving and union by size."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def add(self, item):
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        parent = self.parent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return root_a
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+class LinkageIndex:
+    """Incremental updates and lookups against the linkage tables, within the caller's transaction."""
+
+    def __init__(self, db):
+        """
+        :raises ValueError: If the database is neither SQLite nor PostgreSQL
+        """
+        self.db = db
+        dialect = db.get_bind().dialect.name
+        if dialect not in _UPSERT:
+            raise ValueError(f"Linkage index needs SQLite or PostgreSQL, not {dialect}")
+        self.upsert = _UPSERT[dialect]
+
+    def add_complaint(self, complaint) -> str:
+        """
+        Index a submitted complaint and merge it into any cluster it links to.
+        Re-submitting after an edit replaces its identifiers; clusters only
+        ever merge, so a link removed by an edit is dropped at the next rebuild().
+        :return: The complaint's cluster id
+        """
+        complaint_id = complaint.complaint_id
+        identifiers = extract_identifiers(complaint)
+        self._remove_identifiers(complaint_id)
+        if identifiers:
+            self.db.execute(insert(LinkIdentifier), [
+                {"kind": kind, "value": value, "complaint_id": complaint_id} for kind, value in identifiers
+            ])
+            stmt = self.upsert(LinkCount).on_conflict_do_update(
+                index_elements=["kind", "value"], set_={"complaints": LinkCount.complaints + 1}
+            )
+            self.db.execute(stmt, [{"kind": kind, "value": value, "complaints": 1} for kind, value in identifiers])
+        strong = [i for i in identifiers if i[0] in STRONG_KINDS]
+        return self._merge_clusters(complaint_id, strong)
+
+    def _remove_identifiers(self, complaint_id: str):
+        previous = self.db.execute(
+            select(LinkIdentifier.kind, LinkIdentifier.value).where(LinkIdentifier.complaint_id == complaint_id)
+        ).all()
+        if not previous:
+            return
+        keys = [tuple(row) for row in previous]
+        self.db.execute(delete(LinkIdentifier).where(LinkIdentifier.complaint_id == complaint_id))
+        self.db.execute(
+            update(LinkCount).where(_matching(LinkCount, keys))
+            .values(complaints=LinkCount.complaints - 1)
+        )
+        self.db.execute(
+            delete(LinkCount).where(_matching(LinkCount, keys), LinkCount.complaints <= 0)
+        )
+
+    def _merge_clusters(self, complaint_id: str, strong: list) -> str:
+        linked = set()
+        if strong:
+            linked = set(self.db.scalars(
+                select(LinkIdentifier.complaint_id).where(
+                    _matching(LinkIdentifier, strong),
+                    LinkIdentifier.complaint_id != complaint_id
+                ).distinct()
+            ))
+        linked.add(complaint_id)
+        already_member = self.db.scalar(
+            select(LinkCluster.cluster_id).where(LinkCluster.complaint_id == complaint_id)
+        ) is not None
+        clusters = self.db.execute(
+            select(LinkClusterSize.cluster_id, LinkClusterSize.size).where(
+                LinkClusterSize.cluster_id.in_(
+                    select(LinkCluster.cluster_id).where(LinkCluster.complaint_id.in_(linked))
+                )
+            )
+        ).all()
+        if not clusters:
+            self.db.execute(insert(LinkCluster).values(complaint_id=complaint_id, cluster_id=complaint_id))
+            self.db.execute(insert(LinkClusterSize).values(cluster_id=complaint_id, size=1))
+            return complaint_id
+
+        # Relabel the smaller clusters into the largest one
+        root, root_size = max(clusters, key=lambda row: (row[1], row[0]))
+        others = [row[0] for row in clusters if row[0] != root]
+        size = sum(row[1] for row in clusters) + (0 if already_member else 1)
+        if others:
+            self.db.execute(update(LinkCluster).where(LinkCluster.cluster_id.in_(others)).values(cluster_id=root))
+            self.db.execute(delete(LinkClusterSize).where(LinkClusterSize.cluster_id.in_(others)))
+        if not already_member:
+            self.db.execute(insert(LinkCluster).values(complaint_id=complaint_id, cluster_id=root))
+        if size != root_size:
+            self.db.execute(update(LinkClusterSize).where(LinkClusterSize.cluster_id == root).values(size=size))
+        return root
+
+    def shared_count(self, kind: str, value) -> int:
+        """How many complaints mention this identifier (raw input is normalized)."""
+        value = normalize(kind, value)
+        if value is None:
+            return 0
+        row = self.db.get(LinkCount, (kind, value))
+        return row.complaints if row else 0
+
+    def links_for(self, complaint_id: str) -> list:
+        """
+        Identifiers of a complaint with the number of other complaints sharing each.
+        :return: List of dicts with kind, value and others, most shared first
+        """
+        rows = self.db.execute(
+            select(LinkCount.kind, LinkCount.value, LinkCount.complaints)
+            .join(LinkIdentifier, (LinkIdentifier.kind == LinkCount.kind) & (LinkIdentifier.value == LinkCount.value))
+            .where(LinkIdentifier.complaint_id == complaint_id)
+        ).all()
+        links = [{"kind": kind, "value": value, "others": count - 1} for kind, value, count in rows]
+        return sorted(links, key=lambda link: -link["others"])
+
+    def cluster_size(self, complaint_id: str) -> int:
+        """Number of complaints in the complaint's cluster (0 if it is not indexed)."""
+        size = self.db.scalar(
+            select(LinkClusterSize.size)
+            .join(LinkCluster, LinkCluster.cluster_id == LinkClusterSize.cluster_id)
+            .where(LinkCluster.complaint_id == complaint_id)
+        )
+        return size or 0
+
+    def cluster_members(self, complaint_id: str) -> list:
+        """Complaint ids in the same cluster, including complaint_id itself."""
+        cluster_id = self.db.scalar(select(LinkCluster.cluster_id).where(LinkCluster.complaint_id == complaint_id))
+        if cluster_id is None:
+            return []
+        return list(self.db.scalars(
+            select(LinkCluster.complaint_id).where(LinkCluster.cluster_id == cluster_id).order_by(LinkCluster.complaint_id)
+        ))
+
+
+def rebuild(session_factory=SessionLocal, chunk_size: int = 5000) -> dict:
+    """
+    Rebuild all linkage tables from the complaints, in one transaction.
+    Identifiers are streamed in keyset chunks; counts are aggregated in SQL
+    and clusters are formed with an in-memory union-find over the complaint ids.
+    :return: Summary dict
+    """
+    started = time.perf_counter()
+    db = session_factory()
+    try:
+        for model in (LinkIdentifier, LinkCount, LinkCluster, LinkClusterSize):
+            db.execute(delete(model))
+
+        columns = (Complaint.id, Complaint.complaint_id, Complaint.receiver_txn_id, Complaint.sender_txn_id,
+                   Complaint.ifsc, Complaint.suspect_name, Complaint.suspect_details)
+        uf = UnionFind()
+        last_id = 0
+        while True:
+            rows = db.execute(
+                select(*columns).where(Complaint.id > last_id, Complaint.status != "draft")
+                .order_by(Complaint.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                uf.add(row.complaint_id)
+                batch.extend(
+                    {"kind": kind, "value": value, "complaint_id": row.complaint_id}
+                    for kind, value in extract_identifiers(row)
+                )
+            if batch:
+                # Core executemany; the ORM bulk path costs more than SQLite here
+                db.connection().execute(LinkIdentifier.__table__.insert(), batch)
+            last_id = rows[-1].id
+
+        db.execute(text(
+            "INSERT INTO link_counts (kind, value, complaints) "
+            "SELECT kind, value, count(*) FROM link_identifiers GROUP BY kind, value"
+        ))
+
+        # Rows arrive grouped by identifier (index order); union consecutive ones
+        previous_key, previous_complaint = None, None
+        strong_rows = db.execute(
+            select(LinkIdentifier.kind, LinkIdentifier.value, LinkIdentifier.complaint_id)
+            .where(LinkIdentifier.kind.in_(STRONG_KINDS))
+            .order_by(LinkIdentifier.kind, LinkIdentifier.value)
+            .execution_options(yield_per=chunk_size)
+        )
+        for kind, value, complaint_id in strong_rows:
+            if (kind, value) == previous_key:
+                uf.union(previous_complaint, complaint_id)
+            previous_key, previous_complaint = (kind, value), complaint_id
+
+        memberships = [{"complaint_id": c, "cluster_id": uf.find(c)} for c in uf.parent]
+        for offset in range(0, len(memberships), chunk_size):
+            db.connection().execute(LinkCluster.__table__.insert(), memberships[offset:offset + chunk_size])
+        sizes = [{"cluster_id": c, "size": uf.size[c]} for c in uf.parent if uf.parent[c] == c]
+        for offset in range(0, len(sizes), chunk_size):
+            db.connection().execute(LinkClusterSize.__table__.insert(), sizes[offset:offset + chunk_size])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    linked = sum(1 for c in uf.parent if uf.size[uf.find(c)] > 1)
+    return {
+        "complaints": len(uf.parent),
+        "linked_complaints": linked,
+        "clusters": sum(1 for c in uf.parent if uf.parent[c] == c and uf.size[c] > 1),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-complaint linkage index.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from all complaints")
+    parser.add_argument("--complaint", help="Show the links and cluster of a complaint id")
+    args = parser.parse_args(argv)
+    if not args.rebuild and not args.complaint:
+        parser.error("nothing to do: pass --rebuild and/or --complaint")
+
+    if args.rebuild:
+        summary = rebuild()
+        print(
+            f"Indexed {summary['complaints']} complaints in {summary['seconds']}s: "
+            f"{summary['linked_complaints']} linked into {summary['clusters']} clusters"
+        )
+    if args.complaint:
+        db = SessionLocal()
+        try:
+            index = LinkageIndex(db)
+            for link in index.links_for(args.complaint):
+                print(f"{link['kind']:<8} {link['value']:<30} shared with {link['others']} other complaint(s)")
+            members = index.cluster_members(args.complaint)
+            print(f"Cluster of {len(members)}: {', '.join(members)}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
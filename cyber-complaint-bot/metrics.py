@@ -0,0 +1,80 @@
+# metrics.py
+import threading
+from collections import deque
+
+
+class CountStats:
+    """
+    Thread-safe rolling window of per-event counts (e.g. DB round-trips per turn).
+    Keeps the last `window` samples so percentiles reflect recent load.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+
+    def record(self, value: int):
+        with self._lock:
+            self._samples.append(value)
+            self.count += 1
+            self.total += value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+            count, total = self.count, self.total
+        if not samples:
+            return {"count": count, "total": total, "avg": 0.0, "p50": 0, "p95": 0, "max": 0}
+
+        def pct(p):
+            return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+        return {
+            "count": count,
+            "total": total,
+            "avg": round(sum(samples) / len(samples), 2),
+            "p50": pct(0.50),
+            "p95": pct(0.95),
+            "max": samples[-1],
+        }
+
+
+class LatencyStats:
+    """
+    Thread-safe rolling window of latency samples.
+    Keeps the last `window` samples so percentiles reflect recent load.
+    """
+
+    def __init__(self, window: int = 1024):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def snapshot(self) -> dict:
+        """
+        Summarise the current window.
+        :return: dict with total count and avg/p50/p95/max in milliseconds
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+            count = self.count
+        if not samples:
+            return {"count": count, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+        def pct(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            "count": count,
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p50_ms": pct(0.50),
+            "p95_ms": pct(0.95),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
@@ -0,0 +1,62 @@
+# migrations.py
+import logging
+
+from sqlalchemy import inspect, text
+
+from database import Base, WRITE_TRANSACTION
+import models  # noqa: F401 - registers the tables on Base.metadata
+from search import ensure_search_index
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(engine, metadata=Base.metadata):
+    """
+    Bring existing tables up to date with the models by adding columns that
+    are declared but missing. Only additive changes are handled; new tables
+    are created by metadata.create_all.
+    :return: List of "table.column" names that were added
+    """
+    added = []
+    # Inspect on the connection that alters, inside one write transaction,
+    # so the check and the ALTERs see the same schema
+    with engine.execution_options(**WRITE_TRANSACTION).begin() as conn:
+        inspector = inspect(conn)
+        existing_tables = set(inspector.get_table_names())
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    if isinstance(default, str):
+                        ddl += " DEFAULT '{}'".format(default.replace("'", "''"))
+                    else:
+                        ddl += f" DEFAULT ({default.compile(dialect=engine.dialect)})"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+                logger.info(f"Added column {table.name}.{column.name}")
+    return added
+
+
+def ensure_schema(engine):
+    """Create missing tables, then add missing columns, indexes and the search index."""
+    Base.metadata.create_all(bind=engine)
+    added = add_missing_columns(engine)
+    # create_all skips indexes on tables that already existed
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
+    try:
+        ensure_search_index(engine)
+    except Exception as e:
+        # e.g. a SQLite build without FTS5; everything else still works
+        logger.warning(f"Full-text search index not created: {str(e)}")
+    return added
@@ -1,15 +1,40 @@
 # models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.dialects.sqlite import DATETIME as SQLITE_DATETIME
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from database import Base
+import state_codec
+
+# SQLite keeps CURRENT_TIMESTAMP as "YYYY-MM-DD HH:MM:SS" text. Bind Python
+# datetimes in the same format so range and keyset comparisons stay correct
+Timestamp = DateTime(timezone=True).with_variant(
+    SQLITE_DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+class JSONDict(TypeDecorator):
+    """A dict stored as compact JSON in a Text column; NULL reads as {}."""
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else state_codec.dumps(value)
+
+    def process_result_value(self, value, dialect):
+        return state_codec.loads(value)
 
 class Complaint(Base):
     __tablename__ = "complaints"
     id = Column(Integer, primary_key=True, index=True)
     complaint_id = Column(String, unique=True, index=True, nullable=False)
-    phone_number = Column(String, nullable=False)
+    phone_number = Column(String, nullable=False)  # WhatsApp number that filed it
+    category = Column(String)
     name = Column(String, nullable=False)
     address = Column(String, nullable=False)
+    phone = Column(String)  # contact number given in the chat
+    email = Column(String)
     id_proof = Column(String)
     description = Column(Text, nullable=False)
     transaction_count = Column(Integer)
@@ -20,11 +45,137 @@ class Complaint(Base):
     suspect_name = Column(String)
     suspect_details = Column(Text)
     status = Column(String, default="pending")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
+
+    # Matched to the officer lookups in complaint_queries.py; the trailing
+    # created_at, id columns serve the newest-first keyset ordering
+    __table_args__ = (
+        Index("ix_complaints_phone_created", "phone_number", "created_at", "id"),
+        Index("ix_complaints_status_created", "status", "created_at", "id"),
+        Index("ix_complaints_category_created", "category", "created_at", "id"),
+        Index("ix_complaints_created", "created_at", "id"),
+        Index("ix_complaints_ifsc_created", "ifsc", "created_at", "id"),
+        Index("ix_complaints_sender_txn", "sender_txn_id"),
+        Index("ix_complaints_receiver_txn", "receiver_txn_id"),
+    )
 
 class ConversationState(Base):
     __tablename__ = "conversation_state"
     phone_number = Column(String, primary_key=True, index=True)
     current_step = Column(String, nullable=False)
-    temp_data = Column(Text)  # JSON-encoded temporary data
+    # Answers collected so far. In-place changes are tracked, so the column
+    # is only written on turns that change it
+    temp_data = Column(MutableDict.as_mutable(JSONDict), default=dict)
+    # Optimistic concurrency: updates check the version they read (see state_cache.py)
+    version = Column(Integer, nullable=False, server_default="1")
+    updated_at = Column(Timestamp, server_default=func.now(), onupdate=func.now())
+
+    __mapper_args__ = {"version_id_col": version}
+    __table_args__ = (
+        # Retention scans idle sessions oldest first (see retention.py)
+        Index("ix_conversation_state_updated", "updated_at", "phone_number"),
+    )
+
+class OutboxMessage(Base):
+    __tablename__ = "outbox"
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String, unique=True, nullable=False)
+    to_number = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON-encoded Graph API message payload
+    status = Column(String, nullable=False, default="pending")  # pending, sending, sent, failed, unknown
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(Text)
+    provider_message_id = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_outbox_status_due", "status", "next_attempt_at", "id"),
+        # Per-recipient ordering check in OutboxDeliveryWorker
+        Index("ix_outbox_recipient", "to_number", "status", "id"),
+    )
+
+class MessageStatus(Base):
+    """Delivery/read receipt for an outbound WhatsApp message (see statuses.py)."""
+    __tablename__ = "message_status"
+    id = Column(Integer, primary_key=True)
+    provider_message_id = Column(String, nullable=False)  # wamid, matches OutboxMessage.provider_message_id
+    recipient = Column(String)
+    status = Column(String, nullable=False)  # sent, delivered, read, failed
+    timestamp = Column(Integer)  # Unix time reported by WhatsApp
+    error_code = Column(Integer)
+    error_title = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Redelivered callbacks are ignored on insert
+        Index("ix_message_status_message", "provider_message_id", "status", unique=True),
+    )
+
+class Evidence(Base):
+    __tablename__ = "evidence"
+    id = Column(Integer, primary_key=True, index=True)
+    complaint_id = Column(String, index=True)
+    phone_number = Column(String, nullable=False)
+    media_id = Column(String, nullable=False)
+    sha256 = Column(String(64), nullable=False, index=True)  # content address of the stored file
+    path = Column(String, nullable=False)  # relative to UPLOADS_DIR
+    mime_type = Column(String)
+    size = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class LinkIdentifier(Base):
+    """Inverted index: a normalized suspect identifier and a complaint it appears in (see linkage.py)."""
+    __tablename__ = "link_identifiers"
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)  # upi, account, txn, phone, ifsc, name
+    value = Column(String, nullable=False)
+    complaint_id = Column(String, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_link_identifiers_lookup", "kind", "value", "complaint_id", unique=True),
+    )
+
+class LinkCount(Base):
+    """Number of complaints sharing an identifier, kept so lookups need no aggregate."""
+    __tablename__ = "link_counts"
+    kind = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    complaints = Column(Integer, nullable=False, default=0)
+
+class LinkCluster(Base):
+    """Cluster of complaints connected through shared strong identifiers."""
+    __tablename__ = "link_clusters"
+    complaint_id = Column(String, primary_key=True)
+    cluster_id = Column(String, nullable=False, index=True)
+
+class LinkClusterSize(Base):
+    """Members per link cluster, so merges can relabel the smaller side without counting."""
+    __tablename__ = "link_cluster_sizes"
+    cluster_id = Column(String, primary_key=True)
+    size = Column(Integer, nullable=False)
+
+class ImportCheckpoint(Base):
+    """Progress of a bulk import (see importer.py), committed with each batch it covers."""
+    __tablename__ = "import_checkpoints"
+    source = Column(String, primary_key=True)  # import name, by default the file name
+    fingerprint = Column(String, nullable=False)  # length:sha1 of the file's first block
+    records = Column(Integer, nullable=False, default=0)  # source records consumed
+    inserted = Column(Integer, nullable=False, default=0)
+    duplicates = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+    rejects_bytes = Column(Integer, nullable=False, default=0)  # committed length of the rejects file
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ComplaintRollup(Base):
+    """Running complaint counts per dimension value, maintained by rollups.py for dashboards."""
+    __tablename__ = "complaint_rollups"
+    dimension = Column(String, primary_key=True)  # status, category, day, hour, reporter
+    key = Column(String, primary_key=True)
+    complaints = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # "Top N" reads, e.g. repeat reporters
+        Index("ix_complaint_rollups_top", "dimension", "complaints"),
+    )
@@ -0,0 +1,303 @@
+# outbox.py
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, exists, or_
+from sqlalchemy.orm import aliased
+
+from database import begin_write
+from metrics import LatencyStats
+from models import OutboxMessage
+from whatsapp_handler import WhatsAppHandler
+from config import (
+    OUTBOX_GLOBAL_RATE, OUTBOX_PER_NUMBER_RATE, OUTBOX_PER_NUMBER_BURST,
+    OUTBOX_MAX_ATTEMPTS, OUTBOX_BATCH_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+# Seconds after which a claimed but unconfirmed send is retried (at-least-once delivery)
+SENDING_TIMEOUT = 300
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class OutboxSender:
+    """
+    Drop-in replacement for WhatsAppHandler inside ConversationManager.
+    Each send_* call only adds an OutboxMessage row to the given session, so
+    outgoing messages commit atomically with the conversation state change
+    and are delivered later by OutboxDeliveryWorker.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.builder = WhatsAppHandler
+        self._turn_key = None
+        self._seq = 0
+
+    def begin_turn(self, message_id: str = None):
+        """
+        Start keying messages for one inbound message. Keys derived from the
+        WhatsApp message id make a replayed turn collide instead of re-sending.
+        """
+        self._turn_key = message_id or uuid.uuid4().hex
+        self._seq = 0
+
+    def _next_key(self) -> str:
+        if self._turn_key is None:
+            return uuid.uuid4().hex
+        self._seq += 1
+        return f"{self._turn_key}:{self._seq}"
+
+    def enqueue(self, to: str, payload: dict) -> OutboxMessage:
+        """
+        Record a message for delivery in the current transaction.
+        :return: The pending OutboxMessage (not yet committed)
+        """
+        message = OutboxMessage(
+            idempotency_key=self._next_key(),
+            to_number=to,
+            payload=json.dumps(payload),
+            status="pending",
+            attempts=0,
+            next_attempt_at=utcnow()
+        )
+        self.db.add(message)
+        return message
+
+    def send_text(self, to: str, body: str):
+        return self.enqueue(to, self.builder.text_payload(to, body))
+
+    def send_buttons(self, to: str, body: str, buttons: list):
+        return self.enqueue(to, self.builder.buttons_payload(to, body, buttons))
+
+    def send_list(self, to: str, body: str, button: str, rows: list):
+        return self.enqueue(to, self.builder.list_payload(to, body, button, rows))
+
+    def send_document(self, to: str, link: str, filename: str, caption: str = ""):
+        return self.enqueue(to, self.builder.document_payload(to, link, filename, caption))
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+        :return: 0 on success, otherwise seconds until a token is available
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class OutboxDeliveryWorker:
+    """
+    Background thread draining the outbox at a global and a per-recipient
+    messages-per-second limit. Messages to one recipient are sent in the
+    order they were recorded; failed sends are retried with backoff and
+    marked 'failed' after OUTBOX_MAX_ATTEMPTS. A send that timed out after the
+    request went out may have been delivered, so it is marked 'unknown' and
+    never sent again; without a provider message id it cannot be matched to a
+    status callback either.
+
+    The token buckets live in this process. With several server processes
+    each running a worker, both limits multiply by the number of processes,
+    so app.start_background_workers hands each one its share.
+    """
+
+    def __init__(self, session_factory, whatsapp: WhatsAppHandler = None,
+                 global_rate: float = OUTBOX_GLOBAL_RATE,
+                 per_number_rate: float = OUTBOX_PER_NUMBER_RATE,
+                 per_number_burst: int = OUTBOX_PER_NUMBER_BURST,
+                 max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+                 batch_size: int = OUTBOX_BATCH_SIZE,
+                 poll_interval: float = 0.5):
+        self.session_factory = session_factory
+        self.whatsapp = whatsapp or WhatsAppHandler()
+        self.global_bucket = TokenBucket(global_rate, max(1, global_rate))
+        self.per_number_rate = per_number_rate
+        self.per_number_burst = per_number_burst
+        self.max_attempts = max_attempts
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.send_latency = LatencyStats()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.unconfirmed = 0
+        self._buckets = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="outbox-delivery", daemon=True)
+        self._thread.start()
+        logger.info("Started outbox delivery worker")
+
+    def stop(self, timeout: float = 30.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                delivered = self.deliver_pending()
+            except Exception as e:
+                logger.error(f"Outbox delivery pass failed: {str(e)}", exc_info=True)
+                delivered = 0
+            if not delivered:
+                self._stop.wait(self.poll_interval)
+
+    def _bucket(self, number: str) -> TokenBucket:
+        bucket = self._buckets.get(number)
+        if bucket is None:
+            bucket = TokenBucket(self.per_number_rate, self.per_number_burst)
+            self._buckets[number] = bucket
+            # Bound memory: forget the least recently used recipients
+            if len(self._buckets) > 10000:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(number)
+        return bucket
+
+    def deliver_pending(self) -> int:
+        """
+        Run one delivery pass over due outbox messages.
+        :return: Number of messages handed to the Graph API
+        """
+        db = self.session_factory()
+        delivered = 0
+        try:
+            # Messages left 'sending' by a worker that died mid-send go back to pending
+            begin_write(db)
+            (
+                db.query(OutboxMessage)
+                .filter(OutboxMessage.status == "sending")
+                .filter(OutboxMessage.next_attempt_at < utcnow() - timedelta(seconds=SENDING_TIMEOUT))
+                .update({"status": "pending"}, synchronize_session=False)
+            )
+            db.commit()
+            now = utcnow()
+            # A recipient's message waits while an earlier one is being sent
+            # or backing off, so a retry never lets later messages overtake
+            # it; earlier messages due in this pass are ordered by `held`
+            earlier = aliased(OutboxMessage)
+            blocked = exists().where(and_(
+                earlier.to_number == OutboxMessage.to_number,
+                earlier.id < OutboxMessage.id,
+                or_(earlier.status == "sending", and_(earlier.status == "pending", earlier.next_attempt_at > now)),
+            ))
+            due = (
+                db.query(OutboxMessage.id, OutboxMessage.to_number, OutboxMessage.payload)
+                .filter(OutboxMessage.status == "pending")
+                .filter(or_(OutboxMessage.next_attempt_at.is_(None), OutboxMessage.next_attempt_at <= now))
+                .filter(~blocked)
+                .order_by(OutboxMessage.id)
+                .limit(self.batch_size)
+                .all()
+            )
+            # The scan is a plain read; each claim and result below is its
+            # own write transaction
+            db.rollback()
+            # Recipients with an earlier message held back in this pass, to keep order
+            held = set()
+            for message_id, to_number, payload in due:
+                if self._stop.is_set():
+                    break
+                if to_number in held or self._bucket(to_number).try_acquire():
+                    held.add(to_number)
+                    continue
+                wait = self.global_bucket.try_acquire()
+                while wait:
+                    time.sleep(wait)
+                    wait = self.global_bucket.try_acquire()
+
+                # Claim the row so another delivery process cannot send it too
+                begin_write(db)
+                claimed = (
+                    db.query(OutboxMessage)
+                    .filter(OutboxMessage.id == message_id, OutboxMessage.status == "pending")
+                    .update({"status": "sending", "next_attempt_at": utcnow()}, synchronize_session=False)
+                )
+                db.commit()
+                if not claimed:
+                    continue
+
+                started = time.monotonic()
+                result = self.whatsapp.send(json.loads(payload))
+                self.send_latency.record(time.monotonic() - started)
+                delivered += 1
+                begin_write(db)
+                message = db.get(OutboxMessage, message_id)
+                self._record_result(message, result)
+                if message.status != "sent":
+                    held.add(to_number)
+                db.commit()
+        finally:
+            db.close()
+        return delivered
+
+    def _record_result(self, message: OutboxMessage, result: dict):
+        message.attempts += 1
+        if result.get("messages"):
+            message.status = "sent"
+            message.sent_at = utcnow()
+            message.provider_message_id = result["messages"][0].get("id")
+            self.sent += 1
+            return
+
+        message.last_error = json.dumps(result.get("error", result))[:1000]
+        if WhatsAppHandler.unconfirmed(result):
+            # Resending could deliver the message twice
+            message.status = "unknown"
+            self.unconfirmed += 1
+            logger.error(f"Outbox message {message.id} timed out after it was sent; not retried")
+        elif message.attempts >= self.max_attempts:
+            message.status = "failed"
+            self.failed += 1
+            logger.error(f"Outbox message {message.id} failed after {message.attempts} attempts")
+        else:
+            message.status = "pending"
+            message.next_attempt_at = utcnow() + timedelta(seconds=min(300, 2 ** message.attempts))
+            self.retried += 1
+
+    def stats(self) -> dict:
+        db = self.session_factory()
+        try:
+            pending = db.query(OutboxMessage).filter(OutboxMessage.status == "pending").count()
+        finally:
+            db.close()
+        return {
+            "pending": pending,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "unconfirmed": self.unconfirmed,
+            "send_latency": self.send_latency.snapshot(),
+        }
@@ -1,13 +1,121 @@
-# pdf_generator.py (ReportLab)
+# pdf_generator.py (ReportLab, or WeasyPrint HTML template)
+import logging
 import os
+from datetime import datetime
+from types import SimpleNamespace
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import LETTER
+from config import UPLOADS_DIR, PDF_BACKEND
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Complaint fields printed on the PDF
+PDF_FIELDS = [
+    "complaint_id", "name", "phone_number", "address", "description",
+    "transaction_count", "sender_txn_id", "receiver_txn_id", "ifsc",
+    "timestamp_evidence", "suspect_name", "suspect_details",
+]
+
+
+def complaint_from_fields(data: dict) -> SimpleNamespace:
+    """
+    Map a dict of complaint fields to the attributes the PDF backends read.
+    :param data: Complaint fields; created_at may be a datetime or an ISO string
+    :return: Object with one attribute per PDF field plus created_at
+    """
+    fields = {f: data.get(f) for f in PDF_FIELDS}
+    created_at = data.get("created_at")
+    if isinstance(created_at, str):
+        created_at = datetime.fromisoformat(created_at)
+    fields["created_at"] = created_at or datetime.now()
+    return SimpleNamespace(**fields)
+
+
+def load_template(template_name: str = "complaint_template.html"):
+    """Jinja template for the HTML backend; user-supplied fields are autoescaped."""
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    env = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=select_autoescape(["html"]))
+    return env.get_template(template_name)
+
+
+class HTMLTemplateRenderer:
+    """
+    Renders complaint_template.html through Jinja and WeasyPrint.
+    The template, stylesheet and font configuration are loaded once and
+    reused, so each document only pays for layout and PDF output.
+    """
+
+    def __init__(self, template_name: str = "complaint_template.html",
+                 stylesheet_name: str = "complaint_template.css"):
+        # Imported lazily: WeasyPrint needs native GTK/Pango libraries
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        self._html = HTML
+        self.template = load_template(template_name)
+        self.font_config = FontConfiguration()
+        self.stylesheets = [
+            CSS(filename=os.path.join(TEMPLATES_DIR, stylesheet_name), font_config=self.font_config)
+        ]
+
+    def html(self, complaint) -> str:
+        return self.template.render(complaint=complaint)
+
+    def render(self, complaint, path: str) -> str:
+        self._html(string=self.html(complaint), base_url=TEMPLATES_DIR).write_pdf(
+            path, stylesheets=self.stylesheets, font_config=self.font_config
+        )
+        return path
+
+
+_html_renderer = None
+
+
+def get_html_renderer():
+    """
+    Per-process HTMLTemplateRenderer, or None if WeasyPrint cannot be loaded
+    (the caller then falls back to ReportLab).
+    """
+    global _html_renderer
+    if _html_renderer is None:
+        try:
+            _html_renderer = HTMLTemplateRenderer()
+        except (ImportError, OSError) as e:
+            logger.warning(f"WeasyPrint unavailable, falling back to ReportLab: {str(e)}")
+            _html_renderer = False
+    return _html_renderer or None
+
 
 class PDFGenerator:
-    def generate(self, complaint):
-        uploads_dir = os.path.join(os.path.dirname(__file__), "uploads")
-        os.makedirs(uploads_dir, exist_ok=True)
-        path = os.path.join(uploads_dir, f"{complaint.complaint_id}.pdf")
+    def __init__(self, backend: str = None):
+        """
+        :param backend: "reportlab" or "weasyprint"; defaults to PDF_BACKEND
+        """
+        self.backend = backend or PDF_BACKEND
+
+    def generate(self, complaint, path=None):
+        """
+        Render a complaint to PDF.
+        :param complaint: Complaint row, or a dict of its fields (e.g. conversation temp data)
+        :param path: Output file; defaults to uploads/<complaint_id>.pdf
+        :return: Path of the written PDF
+        """
+        if isinstance(complaint, dict):
+            complaint = complaint_from_fields(complaint)
+        if path is None:
+            os.makedirs(UPLOADS_DIR, exist_ok=True)
+            path = os.path.join(UPLOADS_DIR, f"{complaint.complaint_id}.pdf")
+
+        if self.backend == "weasyprint":
+            renderer = get_html_renderer()
+            if renderer is not None:
+                return renderer.render(complaint, path)
+        return self._generate_reportlab(complaint, path)
+
+    def _generate_reportlab(self, complaint, path):
         c = canvas.Canvas(path, pagesize=LETTER)
         y = 750
         lines = [
@@ -0,0 +1,186 @@
+# render_service.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import LatencyStats
+from pdf_generator import PDFGenerator, PDF_FIELDS
+from config import UPLOADS_DIR, PDF_RENDER_WORKERS, PDF_BACKEND
+
+logger = logging.getLogger(__name__)
+
+
+def _render(data: dict, path: str) -> str:
+    # Runs in a pool process; write to a temp name so readers never see a partial file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    PDFGenerator().generate(data, path=tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+class RenderService:
+    """
+    Renders complaint PDFs on a process pool, off the webhook path.
+
+    Output files are named by a hash of the rendered fields, so a complaint
+    that has not changed since its last render (e.g. an edit loop that
+    changed nothing) is served from disk instead of being rendered again.
+    A failed render is retried once; if it fails again the submitter's
+    on_error callback is told, so the citizen is not left waiting.
+    """
+
+    def __init__(self, workers: int = PDF_RENDER_WORKERS, uploads_dir: str = UPLOADS_DIR, retries: int = 1):
+        """
+        :param retries: Extra attempts for a failed render, e.g. after a pool worker died
+        """
+        self.workers = workers
+        self.uploads_dir = uploads_dir
+        self.retries = retries
+        self.latency = LatencyStats()
+        self.rendered = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self._executor = None
+        self._closed = False
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Created on first use so the pool is never inherited across a fork
+        with self._lock:
+            # A render finishing during worker exit must not start a new pool
+            if self._closed:
+                raise RuntimeError("Render service has been shut down")
+            if self._executor is None:
+                os.makedirs(self.uploads_dir, exist_ok=True)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return self._executor
+
+    @staticmethod
+    def content_hash(data: dict) -> str:
+        fields = {f: data.get(f) for f in PDF_FIELDS}
+        # The date is printed on the PDF, so a cached file must match it too
+        fields["created_at"] = data.get("created_at")
+        # Switching backends changes the output, so it is part of the key
+        fields["_backend"] = PDF_BACKEND
+        return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode()).hexdigest()
+
+    def output_name(self, data: dict) -> str:
+        """File name the PDF for `data` will have, known before rendering."""
+        return f"{data.get('complaint_id')}-{self.content_hash(data)[:16]}.pdf"
+
+    def submit(self, data: dict, callback=None, on_error=None) -> Future:
+        """
+        Queue a render job.
+        :param data: Complaint fields (see PDF_FIELDS)
+        :param callback: Optional callable(path) run once the PDF exists
+        :param on_error: Optional callable(exception) run if rendering failed after its retries
+        :return: Future resolving to the PDF path
+        """
+        name = self.output_name(data)
+        path = os.path.join(self.uploads_dir, name)
+
+        start = False
+        with self._lock:
+            future = self._inflight.get(name)
+            if future is None:
+                future = Future()
+                if os.path.exists(path):
+                    self.cache_hits += 1
+                    future.set_result(path)
+                else:
+                    self._inflight[name] = future
+                    start = True
+            else:
+                self.cache_hits += 1
+        if start:
+            self._attempt(name, dict(data), path, future, 1, time.monotonic())
+
+        if callback is not None or on_error is not None:
+            future.add_done_callback(lambda f: self._run_callback(callback, on_error, f))
+        return future
+
+    def _attempt(self, name: str, data: dict, path: str, future: Future, attempt: int, started: float):
+        pool = None
+        try:
+            pool = self._pool()
+            job = pool.submit(_render, data, path)
+        except Exception as e:
+            # e.g. a broken pool after a worker crash
+            self._finished(name, data, path, future, attempt, started, pool, e)
+            return
+        job.add_done_callback(
+            lambda f: self._finished(name, data, path, future, attempt, started, pool, f.exception(), f)
+        )
+
+    def _finished(self, name: str, data: dict, path: str, future: Future, attempt: int, started: float,
+                  pool: ProcessPoolExecutor, error, job: Future = None):
+        if isinstance(error, BrokenProcessPool) and pool is not None:
+            # A pool worker died; the pool refuses new jobs until replaced
+            with self._lock:
+                if self._executor is pool:
+                    self._executor = None
+            pool.shutdown(wait=False)
+        if error is not None and attempt <= self.retries and not self._closed:
+            logger.warning(f"PDF render failed for {name} (attempt {attempt}), retrying: {error}")
+            self._attempt(name, data, path, future, attempt + 1, started)
+            return
+        with self._lock:
+            self._inflight.pop(name, None)
+            if error is None:
+                self.rendered += 1
+                self.latency.record(time.monotonic() - started)
+            else:
+                self.errors += 1
+        if error is None:
+            future.set_result(job.result())
+        else:
+            logger.error(f"PDF render failed for {name}: {error}")
+            future.set_exception(error)
+
+    @staticmethod
+    def _run_callback(callback, on_error, future: Future):
+        error = future.exception()
+        try:
+            if error is None:
+                if callback is not None:
+                    callback(future.result())
+            elif on_error is not None:
+                on_error(error)
+        except Exception as e:
+            logger.error(f"PDF render callback failed: {str(e)}", exc_info=True)
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pool for good; later submits fail through their on_error callback."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        return {
+            "rendered": self.rendered,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+            "latency": self.latency.snapshot(),
+        }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_render_service() -> RenderService:
+    """Process-wide render service shared by all conversation workers."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RenderService()
+        return _service
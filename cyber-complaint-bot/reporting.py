@@ -0,0 +1,266 @@
+# reporting.py
+"""
+Read-only complaint exports and supervisor statistics.
+
+Everything here runs on a read-only engine (database.make_engine with
+read_only=True). On SQLite its transactions begin deferred and never take
+the write lock, so under WAL a long export runs alongside the bot instead
+of queueing behind it. Exports stream rows from a server-side cursor in
+batches of `batch_size`, writing each batch before fetching the next:
+
+    python reporting.py export --format csv --out complaints.csv --from 2024-03-01
+    python reporting.py export --format parquet --out complaints.parquet --status submitted
+    python reporting.py stats
+    python reporting.py rebuild-rollups
+
+Statistics are read from the complaint_rollups counters (see rollups.py)
+rather than aggregated over complaints.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, select
+
+from database import DATABASE_URL, make_engine
+from models import Complaint, ComplaintRollup
+import rollups
+
+EXPORT_COLUMNS = (
+    "id", "complaint_id", "phone_number", "category", "name", "address", "phone", "email", "description",
+    "transaction_count", "sender_txn_id", "receiver_txn_id", "ifsc", "suspect_name", "suspect_details",
+    "status", "created_at",
+)
+FORMATS = ("csv", "jsonl", "parquet")
+
+_engine = None
+
+
+def get_report_engine():
+    """Process-wide read-only engine on DATABASE_URL."""
+    global _engine
+    if _engine is None:
+        _engine = make_engine(DATABASE_URL, read_only=True)
+    return _engine
+
+
+def _value(value):
+    return value.isoformat(sep=" ") if isinstance(value, datetime) else value
+
+
+class CSVWriter:
+    def __init__(self, out, columns):
+        self.writer = csv.writer(out)
+        self.writer.writerow(columns)
+
+    def write(self, rows):
+        self.writer.writerows([_value(v) for v in row] for row in rows)
+
+    def close(self):
+        pass
+
+
+class JSONLWriter:
+    def __init__(self, out, columns):
+        self.out = out
+        self.columns = columns
+
+    def write(self, rows):
+        columns = self.columns
+        self.out.writelines(
+            json.dumps(dict(zip(columns, map(_value, row))), ensure_ascii=False) + "\n" for row in rows
+        )
+
+    def close(self):
+        pass
+
+
+class ParquetWriter:
+    """
+    Columnar output; each fetched batch becomes one row group, so memory is
+    bounded by the batch size. Needs pyarrow (pip install pyarrow).
+    """
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet export needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.columns = columns
+        table = Complaint.__table__
+        fields = []
+        for name in columns:
+            column_type = table.c[name].type
+            if isinstance(column_type, Integer):
+                fields.append(pa.field(name, pa.int64()))
+            elif isinstance(column_type, DateTime):
+                fields.append(pa.field(name, pa.timestamp("s")))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        data = {name: list(values) for name, values in zip(self.columns, zip(*rows))}
+        self.writer.write_table(self.pa.Table.from_pydict(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def build_query(columns=EXPORT_COLUMNS, start=None, end=None, status=None, category=None):
+    table = Complaint.__table__
+    query = select(*(table.c[name] for name in columns))
+    if start is not None:
+        query = query.where(table.c.created_at >= start)
+    if end is not None:
+        query = query.where(table.c.created_at < end)
+    if status is not None:
+        query = query.where(table.c.status == status)
+    if category is not None:
+        query = query.where(table.c.category == category)
+    return query.order_by(table.c.id)
+
+
+def export(out_path: str, fmt: str = "csv", columns=EXPORT_COLUMNS, start=None, end=None, status=None,
+           category=None, batch_size: int = 5000, engine=None) -> dict:
+    """
+    Stream matching complaints to a file without loading the table.
+    :param out_path: Output file, or "-" for stdout (csv/jsonl only)
+    :param fmt: "csv", "jsonl" or "parquet"
+    :param columns: Complaint columns to export
+    :param start: Created at or after this datetime
+    :param end: Created before this datetime
+    :param batch_size: Rows fetched and written per batch
+    :param engine: Defaults to the read-only report engine
+    :return: Summary dict with row count and throughput
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    unknown = [c for c in columns if c not in Complaint.__table__.c]
+    if unknown:
+        raise ValueError(f"Unknown complaint columns: {', '.join(unknown)}")
+    engine = engine or get_report_engine()
+    columns = list(columns)
+    started = time.perf_counter()
+    exported = 0
+
+    if fmt == "parquet":
+        if out_path == "-":
+            raise ValueError("Parquet export needs a file path")
+        out = None
+        writer = ParquetWriter(out_path, columns)
+    else:
+        out = sys.stdout if out_path == "-" else open(out_path, "w", newline="", encoding="utf-8")
+        writer = (CSVWriter if fmt == "csv" else JSONLWriter)(out, columns)
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+                build_query(columns, start, end, status, category)
+            )
+            for rows in result.partitions():
+                writer.write(rows)
+                exported += len(rows)
+        writer.close()
+    finally:
+        if out is not None and out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "exported": exported,
+        "seconds": round(elapsed, 2),
+        "rows_per_s": round(exported / elapsed) if elapsed else 0,
+        "output": out_path,
+    }
+
+
+def rollup(conn, dimension: str, since: str = None, limit: int = None) -> dict:
+    """
+    Counters of one dimension.
+    :param dimension: One of rollups.DIMENSIONS
+    :param since: For day/hour: only keys at or after this one (e.g. "2024-03-01")
+    :param limit: Only the `limit` largest counters
+    :return: Dict of key -> complaints (largest first when limited, else by key)
+    """
+    query = select(ComplaintRollup.key, ComplaintRollup.complaints).where(
+        ComplaintRollup.dimension == dimension, ComplaintRollup.complaints > 0
+    )
+    if since is not None:
+        query = query.where(ComplaintRollup.key >= since)
+    if limit is not None:
+        query = query.order_by(ComplaintRollup.complaints.desc()).limit(limit)
+    else:
+        query = query.order_by(ComplaintRollup.key)
+    return dict(conn.execute(query).all())
+
+
+def repeat_reporters(conn, min_complaints: int = 2, limit: int = 100) -> dict:
+    """:return: WhatsApp numbers with at least `min_complaints` submitted complaints, most first"""
+    query = select(ComplaintRollup.key, ComplaintRollup.complaints).where(
+        ComplaintRollup.dimension == "reporter", ComplaintRollup.complaints >= min_complaints
+    ).order_by(ComplaintRollup.complaints.desc()).limit(limit)
+    return dict(conn.execute(query).all())
+
+
+def summary(engine=None, since: str = None) -> dict:
+    """Daily dashboard figures, all read from the rollup counters."""
+    engine = engine or get_report_engine()
+    with engine.connect() as conn:
+        return {
+            "by_status": rollup(conn, "status"),
+            "by_category": rollup(conn, "category"),
+            "by_day": rollup(conn, "day", since=since),
+            "by_hour": rollup(conn, "hour", since=since),
+            "repeat_reporters": repeat_reporters(conn),
+        }
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Complaint exports and statistics (read-only).")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Stream complaints to CSV, JSONL or Parquet")
+    export_parser.add_argument("--format", dest="fmt", choices=FORMATS, default="csv")
+    export_parser.add_argument("--out", required=True, help="Output path, or - for stdout")
+    export_parser.add_argument("--from", dest="start", type=_parse_date, help="Created at or after (YYYY-MM-DD)")
+    export_parser.add_argument("--to", dest="end", type=_parse_date, help="Created before (YYYY-MM-DD)")
+    export_parser.add_argument("--status")
+    export_parser.add_argument("--category")
+    export_parser.add_argument("--columns", help="Comma-separated column list")
+    export_parser.add_argument("--batch-size", type=int, default=5000)
+
+    stats_parser = commands.add_parser("stats", help="Print dashboard counters as JSON")
+    stats_parser.add_argument("--since", help="First day for the day/hour series (YYYY-MM-DD)")
+
+    commands.add_parser("rebuild-rollups", help="Recompute the counters from the complaints table")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        columns = [c.strip() for c in args.columns.split(",")] if args.columns else EXPORT_COLUMNS
+        try:
+            result = export(args.out, fmt=args.fmt, columns=columns, start=args.start, end=args.end,
+                            status=args.status, category=args.category, batch_size=args.batch_size)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Exported {result['exported']} complaints in {result['seconds']}s "
+              f"({result['rows_per_s']} rows/s): {result['output']}", file=sys.stderr)
+    elif args.command == "stats":
+        print(json.dumps(summary(since=args.since), indent=2, ensure_ascii=False))
+    else:
+        # Writes, so it runs on the regular engine
+        result = rollups.rebuild()
+        print(f"Rebuilt {result['counters']} counters in {result['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+# retention.py
+"""
+Scheduled retention for the conversation_state table and uploads/.
+
+    python retention.py run                  # sessions, uploads, then vacuum
+    python retention.py sessions
+    python retention.py uploads
+    python retention.py vacuum [--enable]
+    python retention.py thaw evidence/ab/ab12...jpg
+
+Sessions: conversations that ended ("end") more than RETENTION_ENDED_HOURS
+ago, and any conversation idle for RETENTION_IDLE_DAYS, are deleted. Those
+that got as far as a complaint (submitted, or a draft that was abandoned)
+first have their answers appended to archive/conversations/<YYYY-MM>.jsonl.gz.
+Complaint rows are not touched, so the rollup counters stay as they are.
+Partial conversations that never created a complaint are simply dropped.
+
+Uploads: files not modified for RETENTION_UPLOADS_DAYS are gzipped to
+archive/uploads/<path>.gz and removed from UPLOADS_DIR. Selection is by
+mtime only; the evidence store touches a file when the same media arrives
+again. Rows and outbox links keep pointing at the moved files, so
+file_serving.serve_upload thaws a file back into UPLOADS_DIR the first time
+it is requested; `thaw` does the same by hand. backup.py includes the
+archive directory.
+
+Vacuum: deleted rows leave free pages in the SQLite file. With
+auto_vacuum=INCREMENTAL (set on new databases by database.make_engine;
+`vacuum --enable` converts an existing one with a one-off full VACUUM) they
+are returned to the OS RETENTION_VACUUM_PAGES pages per transaction.
+
+Every step works in batches of RETENTION_BATCH_SIZE rows or files, with a
+commit and a RETENTION_PAUSE sleep between them, so the bot's writers wait
+at most one short batch for the write lock. Sessions are read and archived
+before the write transaction that deletes them, and the DELETE re-checks
+each session's age, so a conversation that resumes mid-run is kept (a
+stray archive line is the worst case). A state
+cache entry of a deleted session fails its version-checked UPDATE and is
+reloaded (see state_cache.py); when run inside the bot, pass `state_cache`
+to evict them directly.
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, delete, or_, select, tuple_
+
+from backup import iter_uploads
+from database import SessionLocal
+from models import ConversationState
+from config import (
+    UPLOADS_DIR, RETENTION_ARCHIVE_DIR, RETENTION_ENDED_HOURS, RETENTION_IDLE_DAYS, RETENTION_UPLOADS_DAYS,
+    RETENTION_BATCH_SIZE, RETENTION_PAUSE, RETENTION_VACUUM_PAGES,
+)
+
+logger = logging.getLogger(__name__)
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class RetentionEngine:
+    def __init__(self, session_factory=SessionLocal, uploads_dir: str = UPLOADS_DIR,
+                 archive_dir: str = RETENTION_ARCHIVE_DIR, batch_size: int = RETENTION_BATCH_SIZE,
+                 pause: float = RETENTION_PAUSE, state_cache=None):
+        self.session_factory = session_factory
+        self.uploads_dir = uploads_dir
+        self.conversations_dir = os.path.join(archive_dir, "conversations")
+        self.cold_dir = os.path.join(archive_dir, "uploads")
+        self.batch_size = batch_size
+        self.pause = pause
+        self.state_cache = state_cache
+
+    def expire_sessions(self, ended_hours: int = RETENTION_ENDED_HOURS, idle_days: int = RETENTION_IDLE_DAYS,
+                        now: datetime = None) -> dict:
+        """
+        Delete finished and idle conversations, archiving those with a complaint.
+        :param ended_hours: Age after which an ended conversation is deleted
+        :param idle_days: Age after which any conversation is deleted
+        :return: Summary dict
+        """
+        started = time.perf_counter()
+        now = now or utcnow()
+        ended_cutoff = now - timedelta(hours=ended_hours)
+        idle_cutoff = now - timedelta(days=idle_days)
+        c = ConversationState.__table__.c
+        expired = or_(and_(c.current_step == "end", c.updated_at < ended_cutoff), c.updated_at < idle_cutoff)
+        # Walk ix_conversation_state_updated oldest first; the keyset skips
+        # rows kept by an earlier batch instead of rescanning them
+        scan = select(c.phone_number, c.current_step, c.temp_data, c.updated_at).where(
+            c.updated_at < max(ended_cutoff, idle_cutoff), expired
+        ).order_by(c.updated_at, c.phone_number).limit(self.batch_size)
+        stats = {"expired": 0, "archived": 0, "batches": 0}
+        last = None
+
+        while True:
+            db = self.session_factory()
+            try:
+                query = scan if last is None else scan.where(tuple_(c.updated_at, c.phone_number) > last)
+                rows = db.execute(query).all()
+                # Archive outside the write lock; the DELETE re-checks `expired`
+                db.rollback()
+                if not rows:
+                    break
+                last = (rows[-1].updated_at, rows[-1].phone_number)
+                archived = [row for row in rows if (row.temp_data or {}).get("complaint_id")]
+                if archived:
+                    self.archive_sessions(archived, now)
+                phones = [row.phone_number for row in rows]
+                result = db.execute(delete(ConversationState).where(c.phone_number.in_(phones), expired))
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+            stats["expired"] += result.rowcount
+            stats["archived"] += len(archived)
+            stats["batches"] += 1
+            if self.state_cache is not None:
+                for phone in phones:
+                    self.state_cache.evict(phone)
+            if len(rows) < self.batch_size:
+                break
+            time.sleep(self.pause)
+
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        logger.info(f"Expired {stats['expired']} conversations ({stats['archived']} archived)")
+        return stats
+
+    def archive_sessions(self, rows, now: datetime):
+        """Append sessions to this month's gzip JSONL archive, one gzip member per batch."""
+        os.makedirs(self.conversations_dir, exist_ok=True)
+        path = os.path.join(self.conversations_dir, f"{now:%Y-%m}.jsonl.gz")
+        lines = "".join(
+            json.dumps({
+                "phone_number": row.phone_number,
+                "current_step": row.current_step,
+                "complaint_id": row.temp_data.get("complaint_id"),
+                "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+                "archived_at": now.isoformat(),
+                "temp_data": row.temp_data,
+            }, ensure_ascii=False, default=str) + "\n"
+            for row in rows
+        )
+        with open(path, "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                f.write(lines.encode("utf-8"))
+            raw.flush()
+            # Durable before the rows are deleted
+            os.fsync(raw.fileno())
+
+    def cold_store_uploads(self, days: int = RETENTION_UPLOADS_DAYS, now: datetime = None) -> dict:
+        """
+        Move uploads not modified for `days` into compressed cold storage.
+        :return: Summary dict
+        """
+        started = time.perf_counter()
+        cutoff = (now or utcnow()).timestamp() - days * 86400
+        stats = {"moved": 0, "bytes": 0, "stored_bytes": 0}
+        in_batch = 0
+        for rel_path, path in iter_uploads(self.uploads_dir):
+            if os.path.basename(rel_path).startswith("."):
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if st.st_mtime >= cutoff:
+                continue
+            stats["stored_bytes"] += self.freeze(rel_path, path, st)
+            stats["bytes"] += st.st_size
+            stats["moved"] += 1
+            in_batch += 1
+            if in_batch >= self.batch_size:
+                in_batch = 0
+                time.sleep(self.pause)
+        stats["seconds"] = round(time.perf_counter() - started, 2)
+        logger.info(f"Moved {stats['moved']} uploads to cold storage "
+                    f"({stats['bytes']} bytes, {stats['stored_bytes']} stored)")
+        return stats
+
+    def cold_path(self, rel_path: str) -> str:
+        rel_path = os.path.normpath(rel_path)
+        if os.path.isabs(rel_path) or rel_path.startswith(".."):
+            raise ValueError(f"Not a path inside uploads: {rel_path}")
+        return os.path.join(self.cold_dir, rel_path + ".gz")
+
+    def freeze(self, rel_path: str, path: str, st: os.stat_result) -> int:
+        """Gzip one upload into cold storage, then remove it. :return: Stored size"""
+        target = self.cold_path(rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(path, "rb") as src, open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(os.path.basename(path), mode="wb", fileobj=raw, mtime=int(st.st_mtime)) as f:
+                shutil.copyfileobj(src, f, 1024 * 1024)
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(tmp_path, target)
+        os.remove(path)
+        return os.path.getsize(target)
+
+    def thaw(self, rel_path: str) -> str:
+        """
+        Restore an upload from cold storage into UPLOADS_DIR.
+        :return: Path of the restored file
+        """
+        source = self.cold_path(rel_path)
+        if not os.path.exists(source):
+            raise ValueError(f"Not in cold storage: {rel_path}")
+        target = os.path.join(self.uploads_dir, os.path.normpath(rel_path))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Unique per call: web requests for the same file may thaw it concurrently
+        tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            with gzip.open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            # New mtime: a thawed file is in use and is not moved again for `days`
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        try:
+            os.remove(source)
+        except FileNotFoundError:
+            pass  # a concurrent thaw removed it first
+        return target
+
+    def _engine(self):
+        db = self.session_factory()
+        try:
+            return db.get_bind()
+        finally:
+            db.close()
+
+    def incremental_vacuum(self, pages: int = RETENTION_VACUUM_PAGES, max_pages: int = None) -> dict:
+        """
+        Return free SQLite pages to the OS, `pages` per transaction.
+        :param max_pages: Stop after freeing this many (default: all)
+        :return: Summary dict; "auto_vacuum" is the database's mode
+        """
+        started = time.perf_counter()
+        engine = self._engine()
+        if engine.dialect.name != "sqlite":
+            return {"auto_vacuum": None, "freed_pages": 0, "free_pages": 0, "seconds": 0}
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            mode = AUTO_VACUUM_MODES.get(cursor.execute("PRAGMA auto_vacuum").fetchone()[0])
+            before = free = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+            while mode == "incremental" and free:
+                step = min(pages, max_pages - (before - free)) if max_pages is not None else pages
+                if step <= 0:
+                    break
+                # executescript runs the pragma to completion as its own
+                # autocommit transaction; execute() would free a single page
+                cursor.executescript(f"PRAGMA incremental_vacuum({int(step)})")
+                free = cursor.execute("PRAGMA freelist_count").fetchone()[0]
+                time.sleep(self.pause)
+            cursor.close()
+        finally:
+            raw.close()
+
+        if mode != "incremental" and free:
+            logger.warning(f"{free} free pages but auto_vacuum is {mode}; run `retention.py vacuum --enable` once")
+        return {
+            "auto_vacuum": mode,
+            "freed_pages": before - free,
+            "free_pages": free,
+            "seconds": round(time.perf_counter() - started, 2),
+        }
+
+    def enable_incremental_vacuum(self) -> dict:
+        """
+        Switch an existing SQLite database to auto_vacuum=INCREMENTAL. Needs a
+        full VACUUM, which rewrites the file and holds the write lock
+        throughout: run it once, in a maintenance window.
+        """
+        started = time.perf_counter()
+        raw = self._engine().raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            cursor.execute("VACUUM")
+            mode = AUTO_VACUUM_MODES.get(cursor.execute("PRAGMA auto_vacuum").fetchone()[0])
+            cursor.close()
+        finally:
+            raw.close()
+        return {"auto_vacuum": mode, "seconds": round(time.perf_counter() - started, 2)}
+
+    def run(self) -> dict:
+        """Expire sessions, move old uploads to cold storage, then vacuum."""
+        return {
+            "sessions": self.expire_sessions(),
+            "uploads": self.cold_store_uploads(),
+            "vacuum": self.incremental_vacuum(),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retention for conversation state and uploads.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("run", help="Expire sessions, move old uploads, vacuum")
+    sessions = commands.add_parser("sessions", help="Expire finished and idle conversations")
+    sessions.add_argument("--ended-hours", type=int, default=RETENTION_ENDED_HOURS)
+    sessions.add_argument("--idle-days", type=int, default=RETENTION_IDLE_DAYS)
+    uploads = commands.add_parser("uploads", help="Move old uploads to cold storage")
+    uploads.add_argument("--days", type=int, default=RETENTION_UPLOADS_DAYS)
+    vacuum = commands.add_parser("vacuum", help="Return free pages to the OS")
+    vacuum.add_argument("--enable", action="store_true",
+                        help="Convert the database to auto_vacuum=INCREMENTAL (one-off full VACUUM)")
+    thaw = commands.add_parser("thaw", help="Restore an upload from cold storage")
+    thaw.add_argument("path", help="Path relative to the uploads directory")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    engine = RetentionEngine()
+    try:
+        if args.command == "run":
+            print(json.dumps(engine.run(), indent=2))
+        elif args.command == "sessions":
+            print(json.dumps(engine.expire_sessions(args.ended_hours, args.idle_days), indent=2))
+        elif args.command == "uploads":
+            print(json.dumps(engine.cold_store_uploads(args.days), indent=2))
+        elif args.command == "vacuum":
+            result = engine.enable_incremental_vacuum() if args.enable else engine.incremental_vacuum()
+            print(json.dumps(result, indent=2))
+        else:
+            print(f"Restored {engine.thaw(args.path)}")
+    except ValueError as e:
+        parser.exit(1, f"retention: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# rollups.py
+"""
+Running complaint counts for dashboards, kept in complaint_rollups.
+
+Each row is a (dimension, key) -> complaints counter:
+
+    status    draft / submitted / ...        every complaint, by current status
+    category  cyber_fraud / ...              submitted complaints
+    day       2024-03-01                     submitted complaints by creation day (UTC)
+    hour      2024-03-01 14                  the same by hour
+    reporter  WhatsApp number                submitted complaints per reporter
+
+Counters are adjusted in the transaction that changes a complaint, by
+upserting deltas, so a dashboard read is a primary-key or short index scan
+instead of a GROUP BY over complaints. rebuild() recomputes them from
+scratch, e.g. after a manual data fix.
+"""
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from database import SessionLocal
+from models import Complaint, ComplaintRollup
+
+_UPSERT = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+DIMENSIONS = ("status", "category", "day", "hour", "reporter")
+UNKNOWN = "unknown"
+
+
+def submitted_keys(complaint) -> list:
+    """(dimension, key) pairs a submitted complaint counts towards, status aside."""
+    created_at = getattr(complaint, "created_at", None) or datetime.now(timezone.utc)
+    return [
+        ("category", getattr(complaint, "category", None) or UNKNOWN),
+        ("day", created_at.strftime("%Y-%m-%d")),
+        ("hour", created_at.strftime("%Y-%m-%d %H")),
+        ("reporter", getattr(complaint, "phone_number", None) or UNKNOWN),
+    ]
+
+
+def add_counts(db, deltas: Counter):
+    """
+    Apply counter deltas in one upsert per distinct (dimension, key).
+    :param deltas: Counter of (dimension, key) -> change
+    """
+    rows = [{"dimension": d, "key": k, "complaints": n} for (d, k), n in deltas.items() if n]
+    if not rows:
+        return
+    insert = _UPSERT[db.get_bind().dialect.name](ComplaintRollup.__table__)
+    statement = insert.on_conflict_do_update(
+        index_elements=["dimension", "key"],
+        set_={"complaints": ComplaintRollup.__table__.c.complaints + insert.excluded.complaints}
+    )
+    db.connection().execute(statement, rows)
+
+
+def status_changed(db, complaint, old_status):
+    """
+    Count a complaint's move from `old_status` (None for a new complaint) to
+    its current status. Leaving draft also counts it in the other dimensions.
+    """
+    deltas = Counter()
+    if old_status is not None:
+        deltas[("status", old_status)] -= 1
+    deltas[("status", complaint.status)] += 1
+    if old_status in (None, "draft") and complaint.status != "draft":
+        deltas.update(submitted_keys(complaint))
+    add_counts(db, deltas)
+
+
+def rebuild(session_factory=SessionLocal) -> dict:
+    """
+    Recompute every counter with GROUP BY queries, in one transaction.
+    :return: Summary dict
+    """
+    started = time.perf_counter()
+    db = session_factory()
+    try:
+        db.execute(delete(ComplaintRollup))
+        deltas = Counter()
+        for status, count in db.execute(select(Complaint.status, func.count()).group_by(Complaint.status)):
+            deltas[("status", status or UNKNOWN)] += count
+        submitted = select(Complaint.category, Complaint.created_at, Complaint.phone_number).where(
+            Complaint.status != "draft"
+        ).execution_options(yield_per=10000)
+        for row in db.execute(submitted):
+            deltas.update(submitted_keys(row))
+        add_counts(db, deltas)
+        db.commit()
+        return {"counters": len(deltas), "seconds": round(time.perf_counter() - started, 2)}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
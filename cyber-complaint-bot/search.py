@@ -0,0 +1,186 @@
+# search.py
+"""
+Full-text search over complaint descriptions and suspect details.
+
+SQLite: an FTS5 external-content table (complaints_fts) over complaints,
+kept in sync by triggers, so every insert or update of the searched columns
+(e.g. from ConversationManager.complete_without_sms) is indexed in the same
+transaction. PostgreSQL: a GIN index on the equivalent tsvector expression.
+
+    page = search_complaints(db, "fraud@okaxis 98765*")
+    for hit in page.hits:
+        print(hit.complaint.complaint_id, hit.score, hit.snippet)
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from models import Complaint
+from config import SEARCH_RANK_WINDOW
+
+logger = logging.getLogger(__name__)
+
+MAX_PAGE_SIZE = 100
+
+_SQLITE_DDL = [
+    # unicode61 splits "fraud@okaxis" into adjacent tokens, matched as a phrase
+    """CREATE VIRTUAL TABLE IF NOT EXISTS complaints_fts USING fts5(
+        description, suspect_name, suspect_details,
+        content='complaints', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS complaints_fts_ai AFTER INSERT ON complaints BEGIN
+        INSERT INTO complaints_fts(rowid, description, suspect_name, suspect_details)
+        VALUES (new.id, new.description, new.suspect_name, new.suspect_details);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS complaints_fts_ad AFTER DELETE ON complaints BEGIN
+        INSERT INTO complaints_fts(complaints_fts, rowid, description, suspect_name, suspect_details)
+        VALUES ('delete', old.id, old.description, old.suspect_name, old.suspect_details);
+    END""",
+    # Status-only updates do not touch the index
+    """CREATE TRIGGER IF NOT EXISTS complaints_fts_au
+    AFTER UPDATE OF description, suspect_name, suspect_details ON complaints BEGIN
+        INSERT INTO complaints_fts(complaints_fts, rowid, description, suspect_name, suspect_details)
+        VALUES ('delete', old.id, old.description, old.suspect_name, old.suspect_details);
+        INSERT INTO complaints_fts(rowid, description, suspect_name, suspect_details)
+        VALUES (new.id, new.description, new.suspect_name, new.suspect_details);
+    END""",
+]
+
+# 'simple' keeps UPI handles, phone numbers and names unstemmed
+_PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(description, '') || ' ' || "
+    "coalesce(suspect_name, '') || ' ' || coalesce(suspect_details, ''))"
+)
+
+
+@dataclass
+class SearchHit:
+    complaint: Complaint
+    score: float  # higher is more relevant
+    snippet: str
+
+
+@dataclass
+class SearchPage:
+    hits: List[SearchHit] = field(default_factory=list)
+    next_page: Optional[int] = None  # None on the last page
+    # More matches than the rank window: only the newest were ranked, so
+    # older matches are missing; narrow the query to see them
+    truncated: bool = False
+
+
+def ensure_search_index(engine) -> bool:
+    """
+    Create the full-text index if it is missing, indexing existing rows.
+    :return: True if the index was created by this call
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_complaints_fts ON complaints USING GIN ({_PG_DOCUMENT})"))
+        return False
+    if engine.dialect.name != "sqlite":
+        logger.warning(f"No full-text index for dialect {engine.dialect.name}")
+        return False
+
+    with engine.begin() as conn:
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'complaints_fts'")
+        ).first() is not None
+        for ddl in _SQLITE_DDL:
+            conn.execute(text(ddl))
+        if not exists:
+            conn.execute(text("INSERT INTO complaints_fts(complaints_fts) VALUES ('rebuild')"))
+            logger.info("Built full-text index complaints_fts")
+    return not exists
+
+
+def rebuild_search_index(engine):
+    """Re-index every complaint (e.g. after bulk changes made with triggers off)."""
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("REINDEX INDEX ix_complaints_fts"))
+        return
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO complaints_fts(complaints_fts) VALUES ('rebuild')"))
+
+
+def to_match_query(query: str) -> str:
+    """
+    Turn investigator input into an FTS5 query: every term must match, each
+    term is matched as a phrase (so "fraud@okaxis" and "98765-43210" work),
+    and a trailing * makes a term a prefix search.
+    :raises ValueError: If the query has no terms
+    """
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*").replace('"', '""')
+        if term:
+            terms.append(f'"{term}"*' if prefix else f'"{term}"')
+    if not terms:
+        raise ValueError("Empty search query")
+    return " ".join(terms)
+
+
+def search_complaints(db, query: str, status: str = None, page: int = 1, limit: int = 20,
+                      rank_window: int = SEARCH_RANK_WINDOW) -> SearchPage:
+    """
+    Ranked full-text search over description, suspect_name and suspect_details.
+    On SQLite only the newest `rank_window` matches (with the status filter
+    applied) are ranked; scoring every match of a common word over millions
+    of rows would take seconds. SearchPage.truncated tells when older
+    matches were left out.
+    :param status: Only return complaints with this status
+    :param page: 1-based page number
+    :param limit: Page size, capped at MAX_PAGE_SIZE
+    :return: SearchPage, best matches first
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    page = max(1, page)
+    params = {"status": status, "limit": limit + 1, "offset": (page - 1) * limit}
+    result = SearchPage()
+
+    if db.get_bind().dialect.name == "postgresql":
+        params["query"] = query
+        sql = f"""
+            SELECT id, ts_rank({_PG_DOCUMENT}, q) AS score,
+                   ts_headline('simple', coalesce(description, ''), q, 'MaxWords=20, MinWords=8') AS snippet
+            FROM complaints, websearch_to_tsquery('simple', :query) AS q
+            WHERE {_PG_DOCUMENT} @@ q AND (:status IS NULL OR status = :status)
+            ORDER BY score DESC, id DESC
+            LIMIT :limit OFFSET :offset
+        """
+    else:
+        params["query"] = to_match_query(query)
+        # The window's lower rowid bound is cheap: it reads matches newest
+        # first without scoring them. The oldest match in the window and the
+        # next older one (if any) tell both the bound and whether it truncates
+        status_filter = "AND c.status = :status" if status is not None else ""
+        edge = db.execute(text(f"""
+            SELECT complaints_fts.rowid FROM complaints_fts JOIN complaints c ON c.id = complaints_fts.rowid
+            WHERE complaints_fts MATCH :query {status_filter}
+            ORDER BY complaints_fts.rowid DESC LIMIT 2 OFFSET :skip
+        """), {"query": params["query"], "status": status, "skip": max(0, rank_window - 1)}).scalars().all()
+        params["bound"] = edge[0] if edge else 0
+        result.truncated = len(edge) > 1
+        # bm25() is lower for better matches; negate it so higher is better
+        sql = f"""
+            SELECT c.id, -bm25(complaints_fts) AS score,
+                   snippet(complaints_fts, -1, '[', ']', '...', 12) AS snippet
+            FROM complaints_fts JOIN complaints c ON c.id = complaints_fts.rowid
+            WHERE complaints_fts MATCH :query
+              AND complaints_fts.rowid >= :bound
+              {status_filter}
+            ORDER BY bm25(complaints_fts), c.id DESC
+            LIMIT :limit OFFSET :offset
+        """
+    rows = db.execute(text(sql), params).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        result.next_page = page + 1
+    by_id = {c.id: c for c in db.query(Complaint).filter(Complaint.id.in_([r.id for r in rows]))}
+    result.hits = [SearchHit(by_id[r.id], r.score, r.snippet) for r in rows if r.id in by_id]
+    return result
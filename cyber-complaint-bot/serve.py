@@ -0,0 +1,109 @@
+# serve.py
+"""
+Production entry point for CyberComplaintBot.
+
+Runs the Flask app under gunicorn with several worker processes, each with
+a pool of request threads. The app, database engine and PDF machinery are
+loaded once in the master before forking, so workers start fast and share
+that memory copy-on-write. Connections, the webhook queue and background
+threads are only created in the workers, which split the host-wide outbox
+rate limits and PDF render workers between them. On SIGTERM each worker
+stops accepting requests, finishes in-flight webhooks and drains its
+background workers before exit.
+
+On Windows, where gunicorn is unavailable, it falls back to a single
+waitress process.
+
+Usage:
+    python serve.py
+    SERVER_WORKERS=4 SERVER_THREADS=8 python serve.py
+"""
+import logging
+import sys
+
+from config import (
+    SERVER_BIND, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT,
+    SERVER_GRACEFUL_TIMEOUT, PDF_BACKEND
+)
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """
+    Import and warm everything workers share, before fork.
+    :return: The Flask application
+    """
+    from app import app
+    import pdf_generator
+    if PDF_BACKEND == "weasyprint":
+        # Compiles the template and parses CSS/fonts once for all workers
+        pdf_generator.get_html_renderer()
+    return app
+
+
+def post_fork(server, worker):
+    # Pooled DB connections must not be shared with the parent process
+    from database import engine
+    engine.dispose(close=False)
+    # Threads do not survive fork, so background workers start per process,
+    # each with its share of the host's rate limits and render workers
+    from app import start_background_workers
+    start_background_workers(processes=server.num_workers)
+
+
+def worker_exit(server, worker):
+    from app import stop_background_workers
+    stop_background_workers(timeout=SERVER_GRACEFUL_TIMEOUT * 0.8)
+
+
+def gunicorn_options() -> dict:
+    return {
+        "bind": SERVER_BIND,
+        "workers": SERVER_WORKERS,
+        "threads": SERVER_THREADS,
+        "worker_class": "gthread",
+        "timeout": SERVER_TIMEOUT,
+        "graceful_timeout": SERVER_GRACEFUL_TIMEOUT,
+        "preload_app": True,
+        "post_fork": post_fork,
+        "worker_exit": worker_exit,
+    }
+
+
+def run_gunicorn():
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionServer(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return preload()
+
+    ProductionServer(gunicorn_options()).run()
+
+
+def run_waitress():
+    from waitress import serve
+
+    app = preload()
+    from app import start_background_workers, stop_background_workers
+    host, _, port = SERVER_BIND.rpartition(":")
+    start_background_workers()
+    try:
+        serve(app, host=host, port=int(port), threads=SERVER_THREADS)
+    finally:
+        stop_background_workers(timeout=SERVER_GRACEFUL_TIMEOUT)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        run_waitress()
+    else:
+        run_gunicorn()
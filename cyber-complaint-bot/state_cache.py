@@ -0,0 +1,127 @@
+# state_cache.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import state_codec
+from config import STATE_CACHE_SIZE, STATE_CACHE_TTL
+
+
+@dataclass
+class CachedState:
+    current_step: str
+    temp_data: object
+    version: int
+    touched: float
+
+
+class StateCache:
+    """
+    Bounded LRU/TTL cache of ConversationState snapshots keyed by phone number.
+
+    It is write-through: the unit of work persists every turn and then
+    refreshes the entry, so a hit saves the SELECT but never a write.
+    Entries carry the row's version and updates are version-checked
+    (ConversationState.version), so a stale entry (another process handled
+    this sender) fails the turn's UPDATE instead of overwriting newer state.
+    Ended conversations are evicted explicitly; idle ones after `ttl`.
+    temp_data is held packed by state_codec, which keeps entries small and
+    gives every get() its own copy.
+    """
+
+    def __init__(self, max_entries: int = STATE_CACHE_SIZE, ttl: float = STATE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale = 0
+        self.bytes = 0  # packed temp_data held
+        self._last_sweep = time.monotonic()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, phone: str):
+        """
+        :return: CachedState with a decoded, private temp_data, or None
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(phone)
+            if entry is None or now - entry.touched > self.ttl:
+                if entry is not None:
+                    del self._entries[phone]
+                    self.bytes -= len(entry.temp_data)
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            entry.touched = now
+            self._entries.move_to_end(phone)
+            self.hits += 1
+            blob = entry.temp_data
+            step, version = entry.current_step, entry.version
+        return CachedState(step, state_codec.decode(blob), version, now)
+
+    def put(self, phone: str, current_step: str, temp_data, version: int):
+        now = time.monotonic()
+        entry = CachedState(current_step, state_codec.encode(temp_data or {}), version, now)
+        with self._lock:
+            previous = self._entries.pop(phone, None)
+            if previous is not None:
+                self.bytes -= len(previous.temp_data)
+            self._entries[phone] = entry
+            self.bytes += len(entry.temp_data)
+            while len(self._entries) > self.max_entries:
+                _, dropped = self._entries.popitem(last=False)
+                self.bytes -= len(dropped.temp_data)
+                self.evictions += 1
+            due = now - self._last_sweep > self.ttl
+            if due:
+                self._last_sweep = now
+        if due:
+            self.sweep()
+
+    def evict(self, phone: str, stale: bool = False):
+        with self._lock:
+            entry = self._entries.pop(phone, None)
+            if entry is not None:
+                self.bytes -= len(entry.temp_data)
+                self.evictions += 1
+            if stale:
+                self.stale += 1
+
+    def sweep(self) -> int:
+        """Drop entries idle for longer than the TTL. :return: Number evicted"""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            idle = [phone for phone, entry in self._entries.items() if entry.touched < cutoff]
+            for phone in idle:
+                self.bytes -= len(self._entries.pop(phone).temp_data)
+            self.evictions += len(idle)
+        return len(idle)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "stale": self.stale,
+            "bytes": self.bytes,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_state_cache() -> StateCache:
+    """Process-wide state cache shared by all conversation workers."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = StateCache()
+        return _cache
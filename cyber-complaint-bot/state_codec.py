@@ -0,0 +1,49 @@
+# state_codec.py
+import json
+import zlib
+
+from config import STATE_COMPRESS_MIN_BYTES
+
+# One-byte tags in front of encoded state
+_PLAIN = b"j"
+_ZLIB = b"z"
+
+
+def dumps(data: dict) -> str:
+    """Compact JSON text for conversation state (no whitespace, raw UTF-8)."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def loads(text) -> dict:
+    """Parse stored state. NULL or empty text reads back as an empty dict."""
+    if not text:
+        return {}
+    return json.loads(text)
+
+
+def encode(data: dict, compress_min: int = STATE_COMPRESS_MIN_BYTES) -> bytes:
+    """
+    Pack conversation state into a single bytes object for the state cache.
+    One bytes object costs far less memory than a dict of str values, and
+    larger states (long descriptions) are zlib-compressed.
+    :return: Tagged bytes, see decode()
+    """
+    raw = dumps(data).encode("utf-8")
+    if len(raw) >= compress_min:
+        packed = zlib.compress(raw, 6)
+        if len(packed) < len(raw):
+            return _ZLIB + packed
+    return _PLAIN + raw
+
+
+def decode(blob: bytes) -> dict:
+    """
+    Unpack bytes produced by encode().
+    :return: A new dict, so callers may mutate it freely
+    """
+    tag, body = blob[:1], blob[1:]
+    if tag == _ZLIB:
+        body = zlib.decompress(body)
+    elif tag != _PLAIN:
+        raise ValueError(f"Unknown state encoding: {tag!r}")
+    return json.loads(body)
@@ -0,0 +1,125 @@
+# statuses.py
+import logging
+import threading
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from models import MessageStatus
+from config import STATUS_BATCH_SIZE, STATUS_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+_INSERT = {"sqlite": sqlite_insert, "postgresql": pg_insert}
+
+
+def iter_statuses(data):
+    """Yield every status callback (sent/delivered/read/failed) in a webhook payload."""
+    for entry in data.get("entry", []):
+        for change in entry.get("changes", []):
+            yield from change.get("value", {}).get("statuses", [])
+
+
+def status_row(status: dict) -> dict:
+    """Flatten a status callback into a MessageStatus row."""
+    error = (status.get("errors") or [{}])[0]
+    return {
+        "provider_message_id": status["id"],
+        "recipient": status.get("recipient_id"),
+        "status": status.get("status"),
+        "timestamp": int(status["timestamp"]) if status.get("timestamp") else None,
+        "error_code": error.get("code"),
+        "error_title": error.get("title"),
+    }
+
+
+class StatusRecorder:
+    """
+    Buffers delivery and read receipts and writes them in bulk.
+
+    Receipts arrive one small webhook at a time and outnumber inbound
+    messages several times over, so instead of a queue item and a commit
+    each, the webhook handler appends them here and they are inserted with
+    one executemany per batch (every `batch_size` receipts or `flush_interval`
+    seconds). Duplicates are ignored by the (message, status) unique index.
+    Receipts still buffered when a process is killed are lost; they are
+    informational and a graceful stop flushes them.
+    """
+
+    def __init__(self, session_factory, batch_size: int = STATUS_BATCH_SIZE,
+                 flush_interval: float = STATUS_FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.recorded = 0
+        self.flushes = 0
+        self.failed = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, statuses) -> int:
+        """
+        Buffer status callbacks; flushes inline once a full batch is waiting.
+        :return: Number of receipts buffered
+        """
+        rows = [status_row(s) for s in statuses if s.get("id") and s.get("status")]
+        with self._lock:
+            self._buffer.extend(rows)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self.flush()
+        return len(rows)
+
+    def flush(self) -> int:
+        """Insert everything buffered in one statement. :return: Receipts flushed, duplicates included"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            db = self.session_factory()
+            try:
+                insert = _INSERT[db.get_bind().dialect.name]
+                db.execute(insert(MessageStatus).on_conflict_do_nothing(), rows)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Failed to record {len(rows)} message statuses: {str(e)}", exc_info=True)
+                with self._lock:
+                    self.failed += len(rows)
+                return 0
+            finally:
+                db.close()
+            with self._lock:
+                self.recorded += len(rows)
+                self.flushes += 1
+            return len(rows)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-recorder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "recorded": self.recorded,
+            "flushes": self.flushes,
+            "failed": self.failed,
+            "buffered": len(self._buffer),
+        }
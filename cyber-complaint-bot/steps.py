@@ -0,0 +1,237 @@
+# steps.py
+"""
+Declarative conversation flow.
+
+Every question the bot asks is a FieldStep: the Complaint column it fills,
+the validators check for the answer, the prompt keys and the
+title it gets in the edit menu. FLOWS lists the steps each complaint
+category walks through, so a new field or complaint type is a table entry
+rather than another collect_* method. Flow turns the tables into plain
+dicts once at import; routing a message is then a single lookup.
+"""
+from collections import namedtuple
+from dataclasses import dataclass
+
+from models import Complaint
+from validators import CHECKS
+from config import DEFAULT_LANGUAGE
+
+
+@dataclass(frozen=True)
+class FieldStep:
+    field: str  # Complaint column the answer is stored in
+    label: str  # Prompt key of its edit-menu title
+    check: str  # validators.CHECKS key
+    optional: bool = False  # Accepts "skip"
+
+    @property
+    def step(self) -> str:
+        return f"await_{self.field}"
+
+
+FIELDS = [
+    FieldStep("name", "label_name", "name"),
+    FieldStep("address", "label_address", "address"),
+    FieldStep("phone", "label_phone", "phone"),
+    FieldStep("email", "label_email", "email"),
+    FieldStep("description", "label_description", "text"),
+    FieldStep("ifsc", "label_ifsc", "ifsc", optional=True),
+    FieldStep("sender_txn_id", "label_sender_txn_id", "txn_id", optional=True),
+    FieldStep("receiver_txn_id", "label_receiver_txn_id", "payee", optional=True),
+    FieldStep("suspect_name", "label_suspect_name", "text", optional=True),
+    FieldStep("suspect_details", "label_suspect_details", "text", optional=True),
+]
+
+# Fields asked per category, in order; evidence is always collected last
+DEFAULT_FLOW = ("name", "address", "phone", "email", "description")
+FLOWS = {
+    "cyber_fraud": ("name", "address", "phone", "email", "ifsc", "sender_txn_id", "receiver_txn_id", "description"),
+    "identity_theft": ("name", "address", "phone", "email", "suspect_details", "description"),
+    "online_harassment": ("name", "address", "phone", "email", "suspect_name", "suspect_details", "description"),
+}
+
+# Prompts per language. For a field, "<field>" asks for it, "<field>_invalid"
+# rejects an answer and "<field>_edit" asks for a correction; the last two
+# fall back to the generic "invalid" and to "<field>". Missing translations
+# fall back to DEFAULT_LANGUAGE, then to English.
+PROMPTS = {
+    "en": {
+        "welcome": "Welcome to Cyber Crime Complaint System. Please select your complaint category:",
+        "category_cyber_fraud": "Cyber Fraud",
+        "category_identity_theft": "Identity Theft",
+        "category_online_harassment": "Online Harassment",
+        "invalid": "Invalid input. Please try again:",
+        "too_long": "That is too long. Please send a shorter answer:",
+        "skip_hint": "Type 'skip' if you don't know.",
+        "name": "Please enter your full name:",
+        "name_invalid": "Invalid name. Please enter a valid full name:",
+        "name_edit": "Please enter your corrected full name:",
+        "address": "Please enter your address:",
+        "address_edit": "Please enter your corrected address:",
+        "phone": "Please enter your phone number:",
+        "phone_invalid": "Invalid phone number. Please enter a valid phone number:",
+        "phone_edit": "Please enter your corrected phone number:",
+        "email": "Please enter your email address:",
+        "email_invalid": "Invalid email. Please enter a valid email address:",
+        "email_edit": "Please enter your corrected email address:",
+        "description": "Please describe your complaint in detail:",
+        "description_edit": "Please enter your corrected description:",
+        "ifsc": "Please enter the IFSC code of your bank branch:",
+        "ifsc_invalid": "Invalid IFSC code. It looks like SBIN0001234. Please try again:",
+        "sender_txn_id": "Please enter the transaction ID / UTR of the fraudulent payment:",
+        "sender_txn_id_invalid": "Invalid transaction ID. Please enter at least 8 characters:",
+        "receiver_txn_id": "Please enter the UPI ID or account number the money was sent to:",
+        "suspect_name": "Please enter the name or profile handle of the suspect:",
+        "suspect_details": "Please share any details of the suspect (phone numbers, profiles, websites):",
+        "evidence": "Please upload any evidence (images, documents). Type 'skip' if you don't have any.",
+        "draft_generating": "Your complaint draft is being generated. The PDF will be sent to you shortly.",
+        "draft_failed": "Sorry, we could not generate the PDF of your complaint draft. "
+                        "Your answers are saved and you can still submit your complaint.",
+        "review": "Do you want to edit any details before final submission?",
+        "yes": "Yes",
+        "no": "No",
+        "edit_menu": "Which section do you want to edit?",
+        "edit_button": "Sections",
+        "edit_invalid": "Invalid choice. Please select a valid section to edit.",
+        "submitted": "Your complaint (ID: {complaint_id}) has been submitted successfully. Thank you.",
+        "not_found": "Error: Complaint not found. Please start again.",
+        "label_name": "Name",
+        "label_address": "Address",
+        "label_phone": "Phone",
+        "label_email": "Email",
+        "label_description": "Description",
+        "label_ifsc": "IFSC",
+        "label_sender_txn_id": "Transaction ID",
+        "label_receiver_txn_id": "Receiver UPI/Account",
+        "label_suspect_name": "Suspect name",
+        "label_suspect_details": "Suspect details",
+    },
+    "hi": {
+        "welcome": "साइबर अपराध शिकायत प्रणाली में आपका स्वागत है। कृपया शिकायत की श्रेणी चुनें:",
+        "category_cyber_fraud": "साइबर धोखाधड़ी",
+        "category_identity_theft": "पहचान की चोरी",
+        "category_online_harassment": "ऑनलाइन उत्पीड़न",
+        "invalid": "अमान्य उत्तर। कृपया फिर से प्रयास करें:",
+        "too_long": "यह बहुत लंबा है। कृपया छोटा उत्तर भेजें:",
+        "skip_hint": "पता न हो तो 'skip' लिखें।",
+        "name": "कृपया अपना पूरा नाम लिखें:",
+        "address": "कृपया अपना पता लिखें:",
+        "phone": "कृपया अपना फ़ोन नंबर लिखें:",
+        "email": "कृपया अपना ईमेल पता लिखें:",
+        "description": "कृपया अपनी शिकायत विस्तार से लिखें:",
+        "ifsc": "कृपया अपनी बैंक शाखा का IFSC कोड लिखें:",
+        "sender_txn_id": "कृपया धोखाधड़ी वाले भुगतान का ट्रांज़ैक्शन ID / UTR लिखें:",
+        "receiver_txn_id": "कृपया वह UPI ID या खाता नंबर लिखें जिसमें पैसे भेजे गए:",
+        "suspect_name": "कृपया संदिग्ध का नाम या प्रोफ़ाइल लिखें:",
+        "suspect_details": "कृपया संदिग्ध की कोई भी जानकारी दें (फ़ोन नंबर, प्रोफ़ाइल, वेबसाइट):",
+        "evidence": "कृपया कोई भी सबूत (फ़ोटो, दस्तावेज़) भेजें। न हो तो 'skip' लिखें।",
+        "draft_generating": "आपकी शिकायत का ड्राफ़्ट बन रहा है। PDF जल्द ही भेजी जाएगी।",
+        "draft_failed": "क्षमा करें, आपकी शिकायत के ड्राफ़्ट की PDF नहीं बन सकी। "
+                        "आपके उत्तर सुरक्षित हैं और आप अपनी शिकायत फिर भी जमा कर सकते हैं।",
+        "review": "क्या आप अंतिम जमा करने से पहले कोई जानकारी बदलना चाहते हैं?",
+        "yes": "हाँ",
+        "no": "नहीं",
+        "edit_menu": "आप कौन सा भाग बदलना चाहते हैं?",
+        "edit_button": "भाग",
+        "edit_invalid": "अमान्य विकल्प। कृपया बदलने के लिए सही भाग चुनें।",
+        "submitted": "आपकी शिकायत (ID: {complaint_id}) सफलतापूर्वक दर्ज हो गई है। धन्यवाद।",
+        "not_found": "त्रुटि: शिकायत नहीं मिली। कृपया फिर से शुरू करें।",
+        "label_name": "नाम",
+        "label_address": "पता",
+        "label_phone": "फ़ोन",
+        "label_email": "ईमेल",
+        "label_description": "विवरण",
+    },
+}
+
+# Messages that switch the conversation language at any question
+LANGUAGE_KEYWORDS = {
+    "english": "en",
+    "hindi": "hi",
+    "हिंदी": "hi",
+}
+
+Step = namedtuple("Step", ["field", "step", "optional", "check"])
+
+
+class Flow:
+    """
+    The step tables compiled into lookup dicts.
+
+    steps maps "await_<field>" to a Step with its check function resolved,
+    next_steps maps category -> {step: following step}, edit_steps maps an
+    edit-menu reply id to the step it reopens, and prompts holds every key
+    resolved for every language (fallbacks included).
+    """
+
+    def __init__(self, fields=FIELDS, flows=FLOWS, default_flow=DEFAULT_FLOW, prompts=PROMPTS,
+                 default_language: str = DEFAULT_LANGUAGE, checks=CHECKS):
+        columns = set(Complaint.__table__.columns.keys())
+        by_field = {f.field: f for f in fields}
+
+        self.steps = {}
+        for f in fields:
+            # Fail at startup, not on the first message, on a typo in the tables
+            if f.field not in columns:
+                raise ValueError(f"Flow field {f.field!r} is not a Complaint column")
+            if f.check not in checks:
+                raise ValueError(f"Flow field {f.field!r} uses unknown check {f.check!r}")
+            self.steps[f.step] = Step(f.field, f.step, f.optional, checks[f.check])
+
+        self.categories = list(flows)
+        self.fields = {}
+        self.next_steps = {}
+        for category, order in list(flows.items()) + [(None, default_flow)]:
+            unknown = [name for name in order if name not in by_field]
+            if unknown:
+                raise ValueError(f"Flow {category!r} uses undefined fields: {unknown}")
+            step_names = [by_field[name].step for name in order] + ["await_evidence"]
+            self.fields[category] = tuple(order)
+            self.next_steps[category] = dict(zip(["await_category"] + step_names[:-1], step_names))
+
+        self.edit_steps = {f"edit_{f.field}": f.step for f in fields}
+
+        self.default_language = default_language if default_language in prompts else "en"
+        derived = {lang: self._derive(table, fields) for lang, table in prompts.items()}
+        base = dict(derived["en"], **derived[self.default_language])
+        self.prompts = {}
+        for lang, table in derived.items():
+            resolved = dict(base, **table)
+            for f in fields:
+                if f.optional:
+                    for key in (f.field, f"{f.field}_edit"):
+                        resolved[key] = f"{resolved[key]} {resolved['skip_hint']}"
+            self.prompts[lang] = resolved
+        self.edit_labels = {lang: {f.field: table[f.label][:24] for f in fields} for lang, table in self.prompts.items()}
+
+    @staticmethod
+    def _derive(table: dict, fields) -> dict:
+        # Fill a language's per-field fallbacks from its own generic prompts,
+        # so a partial translation doesn't mix in English
+        table = dict(table)
+        for f in fields:
+            if "invalid" in table:
+                table.setdefault(f"{f.field}_invalid", table["invalid"])
+            if f.field in table:
+                table.setdefault(f"{f.field}_edit", table[f.field])
+        return table
+
+    def text(self, lang, key: str, **kwargs) -> str:
+        table = self.prompts.get(lang) or self.prompts[self.default_language]
+        return table[key].format(**kwargs) if kwargs else table[key]
+
+    def flow_for(self, category) -> tuple:
+        """:return: Field names asked for a category (the default flow if unknown)"""
+        return self.fields.get(category) or self.fields[None]
+
+    def next_step(self, category, step: str) -> str:
+        """:return: The step after `step` in the category's flow"""
+        return (self.next_steps.get(category) or self.next_steps[None])[step]
+
+    def edit_rows(self, category, lang) -> list:
+        """:return: List-message rows for editing the category's fields"""
+        labels = self.edit_labels.get(lang) or self.edit_labels[self.default_language]
+        return [{"id": f"edit_{field}", "title": labels[field]} for field in self.flow_for(category)]
+
+
+FLOW = Flow()
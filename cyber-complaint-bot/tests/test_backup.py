@@ -0,0 +1,99 @@
+import pytest
+import sys
+import os
+import sqlite3
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+
+from database import Base, make_engine
+import models  # noqa: F401 - registers the tables on Base.metadata
+from backup import BackupError, BackupRepository
+
+
+class TestBackup:
+    """Test cases for online, incremental backups."""
+
+    @pytest.fixture
+    def live(self, tmp_path):
+        db_path = str(tmp_path / 'complaints.db')
+        engine = make_engine(f'sqlite:///{db_path}')
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO complaints (complaint_id, phone_number, name, address, description, status) "
+                "VALUES ('A1', '919000000001', 'Ravi', 'Chennai', :d, 'submitted')"
+            ), {'d': 'x' * 5000})
+        uploads = tmp_path / 'uploads'
+        (uploads / 'evidence' / 'ab').mkdir(parents=True)
+        (uploads / 'evidence' / 'tmp').mkdir()
+        (uploads / 'A1.pdf').write_bytes(b'%PDF' + os.urandom(3000))
+        (uploads / 'evidence' / 'ab' / 'ab12.jpg').write_bytes(b'same screenshot')
+        (uploads / 'evidence' / 'ab' / 'ab34.jpg').write_bytes(b'same screenshot')
+        (uploads / 'evidence' / 'tmp' / 'partial').write_bytes(b'half a download')
+        # What retention.py moved to cold storage
+        (tmp_path / 'archive' / 'uploads').mkdir(parents=True)
+        (tmp_path / 'archive' / 'uploads' / 'A0.pdf.gz').write_bytes(b'old draft')
+        yield engine, db_path, uploads
+        engine.dispose()
+
+    def count(self, path):
+        conn = sqlite3.connect(path)
+        try:
+            return conn.execute('SELECT count(*) FROM complaints').fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_snapshot_while_writer_is_active(self, live, tmp_path):
+        engine, db_path, uploads = live
+        repo = BackupRepository(str(tmp_path / 'backups'), chunk_size=4096)
+        writer = engine.connect()
+        writer.execute(text("DELETE FROM complaints"))  # holds the write lock, uncommitted
+        try:
+            first = repo.create(db_path, str(uploads), str(tmp_path / 'archive'))
+        finally:
+            writer.rollback()
+            writer.close()
+        assert first['files'] == 3  # temp downloads are skipped
+        assert sorted(repo.load()['uploads']) == ['A1.pdf', 'evidence/ab/ab12.jpg', 'evidence/ab/ab34.jpg']
+        assert first['archive_files'] == 1
+
+        restored = str(tmp_path / 'restored.db')
+        repo.restore(first['snapshot'], db_target=restored, uploads_target=str(tmp_path / 'restored_uploads'),
+                     archive_target=str(tmp_path / 'restored_archive'))
+        assert self.count(restored) == 1
+        assert (tmp_path / 'restored_uploads' / 'evidence' / 'ab' / 'ab34.jpg').read_bytes() == b'same screenshot'
+        assert (tmp_path / 'restored_archive' / 'uploads' / 'A0.pdf.gz').read_bytes() == b'old draft'
+        with pytest.raises(BackupError):
+            repo.restore(first['snapshot'], db_target=restored)
+
+    def test_incremental_snapshots_and_prune(self, live, tmp_path):
+        engine, db_path, uploads = live
+        repo = BackupRepository(str(tmp_path / 'backups'), chunk_size=4096)
+        first = repo.create(db_path, str(uploads), str(tmp_path / 'archive'))
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE complaints SET status = 'closed'"))
+        second = repo.create(db_path, str(uploads), str(tmp_path / 'archive'))
+        assert second['snapshot'] != first['snapshot']
+        assert second['unchanged_files'] == 3
+        assert second['unchanged_archive_files'] == 1
+        # Only the changed database pages are stored again
+        assert 0 < second['new_chunks'] < first['new_chunks']
+        assert repo.verify(deep=True)['snapshot'] == second['snapshot']
+
+        pruned = repo.prune(keep_last=1, keep_days=0)
+        assert pruned['removed_snapshots'] == [first['snapshot']]
+        assert pruned['deleted_chunks'] > 0
+        repo.verify(second['snapshot'], deep=True)
+
+    def test_verify_detects_corruption(self, live, tmp_path):
+        engine, db_path, uploads = live
+        repo = BackupRepository(str(tmp_path / 'backups'), chunk_size=4096)
+        repo.create(db_path, None, None)
+        digest = repo.load()['database']['chunks'][0]
+        with open(repo.object_path(digest), 'r+b') as f:
+            f.write(b'garbage')
+        with pytest.raises(BackupError):
+            repo.verify()
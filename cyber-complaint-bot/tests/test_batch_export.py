@@ -0,0 +1,64 @@
+import pytest
+import sys
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import batch_export
+from models import Complaint
+
+
+class TestBatchExport:
+    """Test cases for the bulk PDF export."""
+
+    @pytest.fixture(autouse=True)
+    def db(self, session_factory, monkeypatch):
+        session = session_factory()
+        for n in range(5):
+            session.add(Complaint(
+                complaint_id=f'C{n:03d}', phone_number='91000', name='Test', address='Chennai',
+                description='UPI fraud', status='submitted',
+                created_at=datetime(2026, 1, 1) + timedelta(hours=n)
+            ))
+        session.commit()
+        session.close()
+        monkeypatch.setattr(batch_export, 'SessionLocal', session_factory)
+        # Render on threads so the test can swap the render function
+        monkeypatch.setattr(batch_export, 'ProcessPoolExecutor', ThreadPoolExecutor)
+        render = batch_export._render_to_file
+
+        def flaky_render(data, path):
+            if data['complaint_id'] == 'C002':
+                raise RuntimeError('bad font')
+            return render(data, path)
+        monkeypatch.setattr(batch_export, '_render_to_file', flaky_render)
+
+    def test_zip_export_skips_failed_render(self, tmp_path):
+        out = str(tmp_path / 'export.zip')
+        summary = batch_export.export_complaints(out, fmt='zip', workers=2, chunk_size=2)
+
+        assert summary['exported'] == 4
+        assert summary['skipped'] == 1
+        assert summary['failed'] == ['C002']
+        assert summary['output'] == [out]
+        with zipfile.ZipFile(out) as z:
+            assert sorted(z.namelist()) == ['C000.pdf', 'C001.pdf', 'C003.pdf', 'C004.pdf']
+
+    def test_merged_volumes(self, tmp_path):
+        from pypdf import PdfReader
+        summary = batch_export.export_complaints(str(tmp_path / 'export.pdf'), fmt='merged', workers=2,
+                                                 volume_size=3)
+
+        assert summary['output'] == [str(tmp_path / 'export.pdf'), str(tmp_path / 'export-0002.pdf')]
+        outlines = [[item.title for item in PdfReader(path).outline] for path in summary['output']]
+        assert outlines == [['C000', 'C001', 'C003'], ['C004']]
+
+    def test_no_matches_is_an_error(self, tmp_path):
+        out = tmp_path / 'export.zip'
+        with pytest.raises(ValueError, match='No complaints match'):
+            batch_export.export_complaints(str(out), fmt='zip', status='closed')
+        assert not out.exists()
@@ -0,0 +1,84 @@
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import Complaint
+from complaint_queries import find_complaints
+from migrations import ensure_schema
+
+
+class TestComplaintQueries:
+    """Test cases for keyset-paginated complaint lookups."""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        start = datetime(2026, 1, 1)
+        for n in range(30):
+            session.add(Complaint(
+                complaint_id=f'C{n:03d}', phone_number=f'9100{n % 3}', name='Test', address='Chennai',
+                description='UPI fraud', status='submitted' if n % 2 else 'draft',
+                ifsc='SBIN0001234', sender_txn_id=f'S{n}', receiver_txn_id=f'R{n}',
+                # Several complaints share each timestamp
+                created_at=start + timedelta(hours=n // 4)
+            ))
+        session.commit()
+        yield session
+        session.close()
+
+    def test_pages_cover_all_rows_once(self, db):
+        """Paging through rows with equal timestamps neither skips nor repeats."""
+        seen, cursor = [], None
+        while True:
+            page = find_complaints(db, limit=4, cursor=cursor)
+            seen.extend(c.complaint_id for c in page.items)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        assert len(seen) == 30
+        assert len(set(seen)) == 30
+        assert seen[0] == 'C029'
+
+    def test_filters(self, db):
+        submitted = find_complaints(db, limit=100, status='submitted', phone_number='91001').items
+        assert {c.complaint_id for c in submitted} == {'C001', 'C007', 'C013', 'C019', 'C025'}
+        assert [c.complaint_id for c in find_complaints(db, txn_id='R5').items] == ['C005']
+        ranged = find_complaints(db, created_from=datetime(2026, 1, 1, 1), created_to=datetime(2026, 1, 1, 2))
+        assert {c.complaint_id for c in ranged.items} == {'C004', 'C005', 'C006', 'C007'}
+
+    def test_invalid_cursor(self, db):
+        with pytest.raises(ValueError):
+            find_complaints(db, cursor='not-a-cursor')
+
+    def test_schema_upgrade_adds_columns_and_indexes(self):
+        """An existing database gets the new complaint columns and indexes."""
+        engine = create_engine('sqlite://')
+        with engine.begin() as conn:
+            conn.execute(text(
+                'CREATE TABLE complaints (id INTEGER PRIMARY KEY, complaint_id VARCHAR NOT NULL, '
+                'phone_number VARCHAR NOT NULL, name VARCHAR NOT NULL, address VARCHAR NOT NULL, '
+                'id_proof VARCHAR, description TEXT NOT NULL, transaction_count INTEGER, '
+                'sender_txn_id VARCHAR, receiver_txn_id VARCHAR, ifsc VARCHAR, timestamp_evidence VARCHAR, '
+                'suspect_name VARCHAR, suspect_details TEXT, status VARCHAR, created_at DATETIME)'
+            ))
+        added = ensure_schema(engine)
+        assert {'complaints.category', 'complaints.phone', 'complaints.email'} <= set(added)
+        indexes = {i['name'] for i in inspect(engine).get_indexes('complaints')}
+        assert 'ix_complaints_status_created' in indexes
+
+    def test_schema_upgrade_on_file_database(self, tmp_path):
+        """The upgrade works under BEGIN IMMEDIATE on a file database."""
+        engine = make_engine(f'sqlite:///{tmp_path}/complaints.db')
+        ensure_schema(engine)
+        assert ensure_schema(engine) == []
+        engine.dispose()
@@ -1,154 +1,178 @@
 import pytest
 import sys
 import os
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import MagicMock
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from conversation import ConversationManager
-from models import ConversationState
+from models import Complaint, ConversationState
+from steps import FLOW
 
 
-class TestConversationManager:
-    """Test cases for ConversationManager class."""
+PHONE = '919000000001'
 
-    @pytest.fixture
-    def conv_manager(self):
-        """Create a ConversationManager instance for testing."""
-        return ConversationManager()
+
+class TestConversationManager:
+    """Test cases for ConversationManager steps, driven through process_message."""
 
     @pytest.fixture
-    def mock_state(self):
-        """Create a mock ConversationState."""
-        state = Mock(spec=ConversationState)
-        state.phone_number = '+1234567890'
-        state.current_step = 'initial'
-        state.name = None
-        state.phone = None
-        state.email = None
-        state.transaction_id = None
-        state.amount = None
-        state.account_number = None
-        state.ifsc_code = None
-        state.bank_name = None
-        state.incident_date = None
-        state.description = None
-        state.complaint_id = None
-        return state
-
-    def test_collect_name_valid(self, conv_manager, mock_state):
-        """Test collecting valid name."""
-        mock_state.current_step = 'await_name'
-        
-        with patch.object(conv_manager, 'save_state') as mock_save:
-            result = conv_manager.handle_message(mock_state, 'John Doe')
-            
-            assert mock_state.name == 'John Doe'
-            assert mock_state.current_step == 'await_phone'
-            assert 'phone number' in result.lower()
-            mock_save.assert_called_once()
-
-    def test_collect_name_invalid(self, conv_manager, mock_state):
-        """Test collecting invalid name (too short)."""
-        mock_state.current_step = 'await_name'
-        
-        with patch.object(conv_manager, 'save_state') as mock_save:
-            result = conv_manager.handle_message(mock_state, 'A')
-            
-            assert mock_state.current_step == 'await_name'
-            assert 'invalid' in result.lower() or 'enter' in result.lower()
-            mock_save.assert_not_called()
-
-    def test_collect_phone_valid(self, conv_manager, mock_state):
+    def conv_manager(self, session_factory):
+        """Create a ConversationManager on an in-memory database with mocked side effects."""
+        manager = ConversationManager(db=session_factory())
+        manager.whatsapp = MagicMock()
+        manager.renderer = MagicMock()
+        manager.renderer.output_name.return_value = 'draft.pdf'
+        manager.evidence = MagicMock()
+        manager.state_cache = None
+        yield manager
+        manager.db.close()
+
+    def at_step(self, conv_manager, step, **temp):
+        """Start the conversation at `step` with answers `temp` already given."""
+        conv_manager.db.add(ConversationState(phone_number=PHONE, current_step=step, temp_data=temp))
+        conv_manager.db.commit()
+
+    def answer(self, conv_manager, body):
+        conv_manager.process_message(PHONE, body, {'id': body, 'from': PHONE, 'type': 'text', 'text': {'body': body}})
+        return conv_manager.db.get(ConversationState, PHONE)
+
+    def last_reply(self, conv_manager):
+        return conv_manager.whatsapp.send_text.call_args[0][1]
+
+    def test_collect_name_valid(self, conv_manager):
+        """A valid name is stored and the next question is asked."""
+        self.at_step(conv_manager, 'await_name', category='cyber_fraud')
+        state = self.answer(conv_manager, 'John Doe')
+
+        assert state.temp_data['name'] == 'John Doe'
+        assert state.current_step == 'await_address'
+        assert self.last_reply(conv_manager) == FLOW.text('en', 'address')
+
+    def test_collect_name_invalid(self, conv_manager):
+        """An invalid name is rejected and the question repeated."""
+        self.at_step(conv_manager, 'await_name', category='cyber_fraud')
+        state = self.answer(conv_manager, 'A')
+
+        assert state.current_step == 'await_name'
+        assert 'name' not in state.temp_data
+        assert 'invalid' in self.last_reply(conv_manager).lower()
+
+    def test_collect_phone_valid(self, conv_manager):
         """Test collecting valid phone number."""
-        mock_state.current_step = 'await_phone'
-        
-        with patch.object(conv_manager, 'save_state') as mock_save:
-            result = conv_manager.handle_message(mock_state, '9876543210')
-            
-            assert mock_state.phone == '9876543210'
-            assert mock_state.current_step == 'await_email'
-            assert 'email' in result.lower()
-            mock_save.assert_called_once()
-
-    def test_collect_phone_invalid(self, conv_manager, mock_state):
+        self.at_step(conv_manager, 'await_phone', category='cyber_fraud')
+        state = self.answer(conv_manager, '9876543210')
+
+        assert state.temp_data['phone'] == '9876543210'
+        assert state.current_step == 'await_email'
+        assert 'email' in self.last_reply(conv_manager).lower()
+
+    def test_collect_phone_invalid(self, conv_manager):
         """Test collecting invalid phone number."""
-        mock_state.current_step = 'await_phone'
-        
-        with patch.object(conv_manager, 'save_state') as mock_save:
-            result = conv_manager.handle_message(mock_state, '123')
-            
-            assert mock_state.current_step == 'await_phone'
-            assert 'invalid' in result.lower() or 'valid' in result.lower()
-            mock_save.assert_not_called()
-
-    def test_collect_ifsc_valid(self, conv_manager, mock_state):
+        self.at_step(conv_manager, 'await_phone', category='cyber_fraud')
+        state = self.answer(conv_manager, '123')
+
+        assert state.current_step == 'await_phone'
+        assert self.last_reply(conv_manager) == FLOW.text('en', 'phone_invalid')
+
+    def test_collect_ifsc_valid(self, conv_manager):
         """Test collecting valid IFSC code."""
-        mock_state.current_step = 'await_ifsc'
-        
-        with patch.object(conv_manager, 'save_state') as mock_save:
-            result = conv_manager.handle_message(mock_state, 'SBIN0001234')
-            
-            assert mock_state.ifsc_code == 'SBIN0001234'
-            assert mock_state.current_step != 'await_ifsc'
-            mock_save.assert_called_once()
-
-    def test_collect_ifsc_invalid(self, conv_manager, mock_state):
+        self.at_step(conv_manager, 'await_ifsc', category='cyber_fraud')
+        state = self.answer(conv_manager, 'SBIN0001234')
+
+        assert state.temp_data['ifsc'] == 'SBIN0001234'
+        assert state.current_step == 'await_sender_txn_id'
+
+    def test_collect_ifsc_invalid(self, conv_manager):
         """Test collecting invalid IFSC code."""
-        mock_state.current_step = 'await_ifsc'
-        
-        with patch.object(conv_manager, 'save_state') as mock_save:
-            result = conv_manager.handle_message(mock_state, 'INVALID')
-            
-            assert mock_state.current_step == 'await_ifsc'
-            assert 'invalid' in result.lower() or 'format' in result.lower()
-            mock_save.assert_not_called()
-
-    def test_state_transition_flow(self, conv_manager, mock_state):
+        self.at_step(conv_manager, 'await_ifsc', category='cyber_fraud')
+        state = self.answer(conv_manager, 'INVALID')
+
+        assert state.current_step == 'await_ifsc'
+        assert self.last_reply(conv_manager) == FLOW.text('en', 'ifsc_invalid')
+
+    def test_optional_step_can_be_skipped(self, conv_manager):
+        """'skip' answers an optional step with no value."""
+        self.at_step(conv_manager, 'await_ifsc', category='cyber_fraud')
+        state = self.answer(conv_manager, 'skip')
+
+        assert state.temp_data['ifsc'] is None
+        assert state.current_step == 'await_sender_txn_id'
+
+    def test_money_loss_no_redirect(self, conv_manager):
+        """A fraud victim with no payment details skips those questions and stays in the flow."""
+        self.at_step(conv_manager, 'await_ifsc', category='cyber_fraud')
+        for _ in ('ifsc', 'sender_txn_id', 'receiver_txn_id'):
+            state = self.answer(conv_manager, 'skip')
+
+        assert state.current_step == 'await_description'
+        assert state.temp_data['ifsc'] is None
+        assert state.temp_data['sender_txn_id'] is None
+        assert state.temp_data['receiver_txn_id'] is None
+        assert self.last_reply(conv_manager) == FLOW.text('en', 'description')
+
+    def test_money_questions_only_for_fraud(self, conv_manager):
+        """Categories without a payment never reach the money-loss questions."""
+        self.at_step(conv_manager, 'await_email', category='identity_theft')
+        state = self.answer(conv_manager, 'john@example.com')
+
+        assert state.current_step == 'await_suspect_details'
+        assert 'ifsc' not in state.temp_data
+
+    def drafted(self, conv_manager):
+        """Finish the questions, leaving a draft complaint awaiting review."""
+        self.at_step(conv_manager, 'await_evidence', category='identity_theft', name='John Doe',
+                     address='Chennai', phone='9876543210', email='john@example.com',
+                     suspect_details=None, description='Someone opened a loan in my name')
+        assert self.answer(conv_manager, 'skip').current_step == 'await_edit_choice'
+
+    def test_unclear_review_answer_asks_again(self, conv_manager):
+        """Only an explicit 'no' submits; anything else repeats the review question."""
+        self.drafted(conv_manager)
+        state = self.answer(conv_manager, 'maybe later')
+
+        assert state.current_step == 'await_edit_choice'
+        assert conv_manager.db.query(Complaint).one().status == 'draft'
+        assert conv_manager.whatsapp.send_buttons.call_args[0][1] == FLOW.text('en', 'review')
+
+    @pytest.mark.parametrize('answer', ['no_edit', 'No'])
+    def test_no_submits(self, conv_manager, answer):
+        self.drafted(conv_manager)
+        state = self.answer(conv_manager, answer)
+
+        assert state.current_step == 'end'
+        assert conv_manager.db.query(Complaint).one().status == 'submitted'
+
+    def test_state_transition_flow(self, conv_manager):
         """Test complete state transition flow."""
-        mock_state.current_step = 'initial'
-        
-        # Simulate full conversation flow
         steps = [
-            ('initial', 'yes', 'await_name'),
-            ('await_name', 'John Doe', 'await_phone'),
-            ('await_phone', '9876543210', 'await_email'),
+            ('hi', 'await_category'),
+            ('identity_theft', 'await_name'),
+            ('John Doe', 'await_address'),
+            ('12 Gandhi Road, Chennai', 'await_phone'),
+            ('9876543210', 'await_email'),
+            ('john@example.com', 'await_suspect_details'),
         ]
-        
-        for current, message, expected_next in steps:
-            mock_state.current_step = current
-            with patch.object(conv_manager, 'save_state'):
-                conv_manager.handle_message(mock_state, message)
-                assert mock_state.current_step == expected_next
-
-    def test_money_loss_no_redirect(self, conv_manager, mock_state):
-        """Test that answering 'no' to money loss redirects user."""
-        mock_state.current_step = 'await_money_loss'
-        
-        with patch.object(conv_manager, 'save_state') as mock_save:
-            result = conv_manager.handle_message(mock_state, 'no')
-            
-            assert 'cyber crime' in result.lower() or 'redirect' in result.lower()
-            mock_save.assert_not_called()
-
-    @patch('conversation.PDFGenerator')
-    def test_pdf_generation(self, mock_pdf_gen, conv_manager, mock_state):
-        """Test PDF generation on complaint completion."""
-        mock_state.current_step = 'complete'
-        mock_state.name = 'John Doe'
-        mock_state.complaint_id = 'CYB2025001'
-        
-        mock_pdf_instance = Mock()
-        mock_pdf_instance.generate.return_value = '/path/to/pdf.pdf'
-        mock_pdf_gen.return_value = mock_pdf_instance
-        
-        with patch.object(conv_manager, 'generate_pdf') as mock_gen:
-            mock_gen.return_value = '/path/to/pdf.pdf'
-            result = conv_manager.finalize_complaint(mock_state)
-            
-            mock_gen.assert_called_once()
-            assert 'pdf' in result.lower() or 'generated' in result.lower()
+        for message, expected_next in steps:
+            assert self.answer(conv_manager, message).current_step == expected_next
+
+    def test_pdf_generation(self, conv_manager):
+        """Finishing the evidence step files a draft and renders its PDF after the commit."""
+        self.at_step(conv_manager, 'await_evidence', category='identity_theft', name='John Doe',
+                     address='Chennai', phone='9876543210', email='john@example.com',
+                     suspect_details=None, description='Someone opened a loan in my name')
+        state = self.answer(conv_manager, 'skip')
+
+        assert state.current_step == 'await_edit_choice'
+        complaint = conv_manager.db.query(Complaint).one()
+        assert complaint.status == 'draft'
+        assert complaint.complaint_id == state.temp_data['complaint_id']
+        render_data = conv_manager.renderer.submit.call_args[0][0]
+        assert render_data['name'] == 'John Doe'
+        assert render_data['phone_number'] == PHONE
+        assert state.temp_data['pdf_url'].endswith('draft.pdf')
+        conv_manager.whatsapp.send_text.assert_any_call(PHONE, FLOW.text('en', 'draft_generating'))
 
 
 class TestValidationFunctions:
@@ -0,0 +1,164 @@
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+import database
+from database import Base, WRITE_TRANSACTION, begin_write, make_engine
+from models import ConversationState
+
+
+class TestMakeEngine:
+    """Test cases for the tuned SQLite engine and its transaction modes."""
+
+    @pytest.fixture
+    def engine(self, tmp_path, monkeypatch):
+        # Short lock waits so the contention tests fail fast
+        monkeypatch.setattr(database, 'SQLITE_BUSY_TIMEOUT_MS', 200)
+        engine = make_engine(f"sqlite:///{tmp_path / 'complaints.db'}")
+        Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            conn.execute(insert(ConversationState), {'phone_number': '911', 'current_step': 'start', 'temp_data': {}})
+        yield engine
+        engine.dispose()
+
+    def test_pragmas(self, engine):
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert conn.execute(text('PRAGMA synchronous')).scalar() == 1  # NORMAL
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 200
+
+    def test_pragmas_on_a_fresh_connection(self, tmp_path, engine):
+        """Every new pooled connection is configured, not only the first one."""
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA auto_vacuum')).scalar() == 2  # INCREMENTAL, new file
+        other = make_engine(f"sqlite:///{tmp_path / 'complaints.db'}")
+        try:
+            # Held together, so they are two separate DBAPI connections
+            with other.connect() as first, other.connect() as second:
+                for conn in (first, second):
+                    assert conn.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+                    assert conn.execute(text('PRAGMA synchronous')).scalar() == 1
+                    assert conn.execute(text('PRAGMA busy_timeout')).scalar() == 200
+                    assert conn.execute(text('PRAGMA query_only')).scalar() == 0
+        finally:
+            other.dispose()
+
+    def test_reads_do_not_take_the_write_lock(self, engine):
+        """A default transaction begins DEFERRED, so an open read never blocks a writer."""
+        with engine.connect() as reader, engine.connect() as writer:
+            reader.begin()
+            assert reader.execute(select(ConversationState.current_step)).scalar() == 'start'
+            writer.begin()
+            writer.execute(text("UPDATE conversation_state SET current_step = 'await_name'"))
+            writer.commit()
+            # The reader keeps its snapshot until it ends
+            assert reader.execute(select(ConversationState.current_step)).scalar() == 'start'
+            reader.rollback()
+
+    def test_write_transaction_begins_immediate(self, engine):
+        """begin_write takes the lock before the first statement; a second writer waits, then gives up."""
+        Session = sessionmaker(bind=engine)
+        first, second = Session(), Session()
+        try:
+            begin_write(first)
+            with pytest.raises(OperationalError, match='locked'):
+                begin_write(second)
+            second.rollback()
+            first.commit()
+            begin_write(second)
+            second.execute(text("UPDATE conversation_state SET current_step = 'end'"))
+            second.commit()
+            # Too late once a transaction has started
+            first.execute(select(ConversationState))
+            with pytest.raises(RuntimeError):
+                begin_write(first)
+        finally:
+            first.close()
+            second.close()
+
+    def test_read_only_engine_ignores_write_option(self, tmp_path, engine):
+        reader = make_engine(f"sqlite:///{tmp_path / 'complaints.db'}", read_only=True)
+        try:
+            with engine.execution_options(**WRITE_TRANSACTION).connect() as writer:
+                writer.begin()
+                with reader.execution_options(**WRITE_TRANSACTION).connect() as conn:
+                    assert conn.execute(select(ConversationState.phone_number)).scalar() == '911'
+                    with pytest.raises(OperationalError):
+                        conn.execute(text("DELETE FROM conversation_state"))
+                writer.rollback()
+        finally:
+            reader.dispose()
+
+    def test_concurrent_readers_during_a_write(self, engine):
+        """Readers on several pooled connections proceed while a write transaction is open."""
+        Session = sessionmaker(bind=engine)
+        writer = Session()
+        begin_write(writer)
+        writer.execute(text("UPDATE conversation_state SET current_step = 'await_name'"))
+        results, errors = [], []
+
+        def read():
+            db = Session()
+            try:
+                started = time.monotonic()
+                for _ in range(20):
+                    results.append(db.get(ConversationState, '911').current_step)
+                    db.rollback()
+                assert time.monotonic() - started < 1
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.commit()
+        writer.close()
+
+        assert errors == []
+        assert results == ['start'] * 160
+
+    def test_two_readers_overlap_while_a_writer_holds_the_lock(self, engine):
+        """Two read transactions are open at the same time as the writer's; none waits on another."""
+        Session = sessionmaker(bind=engine)
+        writer = Session()
+        begin_write(writer)
+        writer.execute(text("UPDATE conversation_state SET current_step = 'await_name'"))
+        # Each reader waits here with its transaction open, so this only
+        # passes if both are inside one at once
+        both_reading = threading.Barrier(2, timeout=2)
+        results, errors = [], []
+
+        def read():
+            try:
+                with engine.connect() as conn:
+                    conn.begin()
+                    results.append(conn.execute(select(ConversationState.current_step)).scalar())
+                    both_reading.wait()
+                    results.append(conn.execute(select(ConversationState.current_step)).scalar())
+                    conn.rollback()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        writer.commit()
+        writer.close()
+
+        assert errors == []
+        assert results == ['start'] * 4
@@ -0,0 +1,34 @@
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from dedup import SeenMessages, message_id
+
+
+class TestSeenMessages:
+    """Test cases for the in-memory message-id dedup front."""
+
+    def test_seen_within_ttl(self):
+        seen = SeenMessages(max_entries=10, ttl=0.05)
+        assert not seen.seen('wamid.1')
+        seen.add('wamid.1')
+        assert seen.seen('wamid.1')
+        time.sleep(0.1)
+        assert not seen.seen('wamid.1')
+        assert seen.stats()['hits'] == 1
+
+    def test_bounded(self):
+        seen = SeenMessages(max_entries=2, ttl=60)
+        for n in range(3):
+            seen.add(f'wamid.{n}')
+        assert not seen.seen('wamid.0')
+        assert seen.seen('wamid.2')
+
+    def test_message_id(self):
+        payload = {'entry': [{'changes': [{'value': {'messages': [{'id': 'wamid.X', 'from': '91'}]}}]}]}
+        assert message_id(payload) == 'wamid.X'
+        assert message_id({'entry': []}) is None
@@ -0,0 +1,64 @@
+import pytest
+import sys
+import os
+import hashlib
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+import requests_mock
+from whatsapp_handler import WhatsAppHandler
+from evidence_store import EvidenceStore, EvidenceRejected
+
+MEDIA_URL = 'https://lookaside.fbsbx.com/whatsapp_business/attachments/?mid=1'
+
+
+class TestEvidenceStore:
+    """Test cases for the content-addressed evidence store."""
+
+    @pytest.fixture
+    def store(self, tmp_path):
+        whatsapp = WhatsAppHandler(session=requests.Session())
+        return EvidenceStore(root=str(tmp_path), max_bytes=1024, chunk_size=16, whatsapp=whatsapp)
+
+    def test_identical_media_stored_once(self, store, tmp_path):
+        """The same screenshot sent twice is deduplicated by SHA-256."""
+        content = b'\x89PNG fake screenshot bytes'
+        with requests_mock.Mocker(session=store.whatsapp.session) as m:
+            m.get(MEDIA_URL, content=content)
+            first = store.download(MEDIA_URL, 'image/png')
+            second = store.download(MEDIA_URL, 'image/png')
+
+        assert first['sha256'] == hashlib.sha256(content).hexdigest()
+        assert first['deduplicated'] is False
+        assert second['deduplicated'] is True
+        assert first['path'] == second['path']
+        with open(tmp_path / first['path'], 'rb') as f:
+            assert f.read() == content
+        assert os.listdir(store.tmp_dir) == []
+
+    def test_duplicate_refreshes_mtime(self, store, tmp_path):
+        """Media sent again counts as in use, so retention does not move it to cold storage."""
+        with requests_mock.Mocker(session=store.whatsapp.session) as m:
+            m.get(MEDIA_URL, content=b'\x89PNG old screenshot')
+            path = tmp_path / store.download(MEDIA_URL, 'image/png')['path']
+            long_ago = time.time() - 100 * 86400
+            os.utime(path, (long_ago, long_ago))
+            store.download(MEDIA_URL, 'image/png')
+        assert os.stat(path).st_mtime > time.time() - 60
+
+    def test_oversized_stream_is_rejected(self, store):
+        """Downloads beyond max_bytes are aborted and leave no file behind."""
+        with requests_mock.Mocker(session=store.whatsapp.session) as m:
+            m.get(MEDIA_URL, content=b'x' * 2048)
+            with pytest.raises(EvidenceRejected):
+                store.download(MEDIA_URL, 'image/jpeg')
+
+        assert os.listdir(store.tmp_dir) == []
+
+    def test_unsupported_type_is_rejected(self, store):
+        """Only the allowed evidence MIME types are stored."""
+        with pytest.raises(EvidenceRejected):
+            store.download(MEDIA_URL, 'application/x-msdownload')
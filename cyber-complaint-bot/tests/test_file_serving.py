@@ -0,0 +1,92 @@
+import pytest
+import sys
+import os
+import subprocess
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from file_serving import serve_upload, sign, verify_signature
+from retention import RetentionEngine
+
+
+class TestFileServing:
+    """Test cases for /uploads serving and signed links."""
+
+    @pytest.fixture
+    def client(self, tmp_path):
+        (tmp_path / 'uploads').mkdir()
+        (tmp_path / 'uploads' / 'ABC123.pdf').write_bytes(b'%PDF-1.4 ' + b'x' * 100)
+        app = Flask(__name__)
+
+        @app.route('/uploads/<filename>')
+        def uploads(filename):
+            return serve_upload(filename, uploads_dir=str(tmp_path / 'uploads'), mode=app.config['MODE'],
+                                archive_dir=str(tmp_path / 'archive'))
+
+        app.config['MODE'] = 'app'
+        return app.test_client()
+
+    def test_repeat_fetch_gets_304(self, client):
+        """A second fetch with the ETag is answered without the body."""
+        first = client.get('/uploads/ABC123.pdf')
+        assert first.status_code == 200
+        assert first.headers['Last-Modified']
+        assert 'private' in first.headers['Cache-Control']
+
+        second = client.get('/uploads/ABC123.pdf', headers={'If-None-Match': first.headers['ETag']})
+        assert second.status_code == 304
+
+    def test_range_request(self, client):
+        """Range requests return only the requested bytes."""
+        response = client.get('/uploads/ABC123.pdf', headers={'Range': 'bytes=0-7'})
+        assert response.status_code == 206
+        assert response.data == b'%PDF-1.4'
+
+    def test_x_accel_offload(self, client):
+        """In x-accel mode the body is left to nginx."""
+        client.application.config['MODE'] = 'x-accel'
+        response = client.get('/uploads/ABC123.pdf')
+        assert response.headers['X-Accel-Redirect'].endswith('/ABC123.pdf')
+        assert response.data == b''
+
+    def test_missing_file_is_404(self, client):
+        assert client.get('/uploads/missing.pdf').status_code == 404
+
+    def test_cold_stored_file_is_thawed(self, client, tmp_path):
+        """A link to a file that retention moved to cold storage still works."""
+        uploads = tmp_path / 'uploads'
+        retention = RetentionEngine(uploads_dir=str(uploads), archive_dir=str(tmp_path / 'archive'))
+        retention.freeze('ABC123.pdf', str(uploads / 'ABC123.pdf'), os.stat(uploads / 'ABC123.pdf'))
+        assert not (uploads / 'ABC123.pdf').exists()
+
+        response = client.get('/uploads/ABC123.pdf')
+        assert response.status_code == 200
+        assert response.data == b'%PDF-1.4 ' + b'x' * 100
+        assert (uploads / 'ABC123.pdf').exists()
+        assert not (tmp_path / 'archive' / 'uploads' / 'ABC123.pdf.gz').exists()
+
+    def test_signed_links_expire(self):
+        """Signatures are bound to the file name and expiry time."""
+        expires = int(time.time()) + 60
+        signature = sign('ABC123.pdf', expires)
+
+        assert verify_signature('ABC123.pdf', str(expires), signature)
+        assert not verify_signature('OTHER.pdf', str(expires), signature)
+        assert not verify_signature('ABC123.pdf', str(expires), signature, now=expires + 1)
+        assert not verify_signature('ABC123.pdf', None, None)
+
+    @pytest.mark.parametrize('key, ok', [(None, False), ('dev-secret-key', False), ('s3cret', True)])
+    def test_signed_urls_need_a_key(self, key, ok):
+        """Requiring signed links without a real signing key fails at startup."""
+        env = {k: v for k, v in os.environ.items() if k not in ('UPLOADS_SIGNING_KEY', 'SECRET_KEY')}
+        env['UPLOADS_REQUIRE_SIGNED_URLS'] = '1'
+        if key is not None:
+            env['UPLOADS_SIGNING_KEY'] = key
+        result = subprocess.run([sys.executable, '-c', 'import config'], env=env, capture_output=True, text=True,
+                                cwd=os.path.join(os.path.dirname(__file__), '..'))
+        assert (result.returncode == 0) == ok
+        if not ok:
+            assert 'UPLOADS_SIGNING_KEY' in result.stderr
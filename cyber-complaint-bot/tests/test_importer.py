@@ -0,0 +1,100 @@
+import pytest
+import sys
+import os
+import json
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import func, select
+
+from models import Complaint
+import importer
+from importer import ComplaintImporter
+
+HEADER = 'Reference,Mobile,Name,Address,Complaint,IFSC\n'
+
+
+def csv_row(n, ifsc='SBIN0001234', name='Ravi Kumar'):
+    return f'P{n:05d},98765{n:05d},{name},"12, Gandhi Road",Lost money to a fake loan app,{ifsc}\n'
+
+
+class TestComplaintImporter:
+    """Test cases for the bulk CSV/JSONL importer."""
+
+    def importer(self, session_factory, path, **kwargs):
+        mapping = {'Reference': 'complaint_id', 'Mobile': 'phone', 'Complaint': 'description'}
+        return ComplaintImporter(str(path), session_factory, mapping=mapping, batch_size=4, **kwargs)
+
+    def count(self, session_factory):
+        db = session_factory()
+        try:
+            return db.execute(select(func.count()).select_from(Complaint)).scalar()
+        finally:
+            db.close()
+
+    def test_csv_import_with_rejects(self, session_factory, tmp_path):
+        path = tmp_path / 'sheet.csv'
+        rows = [csv_row(n) for n in range(10)]
+        rows[3] = csv_row(3, ifsc='BAD')
+        rows[7] = csv_row(7, name='')
+        path.write_text(HEADER + ''.join(rows))
+
+        summary = self.importer(session_factory, path).run()
+        assert (summary['records'], summary['inserted'], summary['rejected']) == (10, 8, 2)
+        assert summary['batches'] == 3
+        rejects = [json.loads(line) for line in open(f'{path}.rejects.jsonl')]
+        assert [(r['record_no'], r['errors']) for r in rejects] == [(4, {'ifsc': 'bad_format'}), (8, {'name': 'required'})]
+
+        db = session_factory()
+        complaint = db.query(Complaint).filter_by(complaint_id='P00000').one()
+        assert complaint.phone_number == complaint.phone == '9876500000'
+        assert complaint.status == 'submitted'
+        db.close()
+
+        # Appended rows resume after the checkpoint; re-sent ones are skipped as duplicates
+        with open(path, 'a') as f:
+            f.write(csv_row(10) + csv_row(0))
+        summary = self.importer(session_factory, path).run()
+        assert (summary['resumed_from'], summary['inserted'], summary['duplicates']) == (10, 1, 1)
+        assert self.count(session_factory) == 9
+
+    def test_resume_after_failed_batch(self, session_factory, tmp_path, monkeypatch):
+        path = tmp_path / 'sheet.jsonl'
+        with open(path, 'w') as f:
+            for n in range(10):
+                f.write(json.dumps({'Reference': f'J{n}', 'Mobile': f'98765{n:05d}', 'Name': 'Asha',
+                                    'Address': 'Pune city', 'Complaint': 'Fraud',
+                                    'IFSC': 'BAD' if n % 4 == 0 else 'HDFC0000001'}) + '\n')
+
+        # Fail while inserting the second batch, after its reject was written
+        real_to_row = importer.to_row
+        calls = []
+
+        def failing_to_row(record):
+            calls.append(record)
+            if len(calls) == 4:
+                raise RuntimeError('disk full')
+            return real_to_row(record)
+
+        monkeypatch.setattr(importer, 'to_row', failing_to_row)
+        with pytest.raises(RuntimeError):
+            self.importer(session_factory, path).run()
+        assert self.count(session_factory) == 3
+        monkeypatch.setattr(importer, 'to_row', real_to_row)
+
+        summary = self.importer(session_factory, path).run()
+        assert summary['resumed_from'] == 4
+        assert summary['totals'] == {'records': 10, 'inserted': 7, 'duplicates': 0, 'rejected': 3}
+        rejects = [json.loads(line)['record_no'] for line in open(f'{path}.rejects.jsonl')]
+        assert rejects == [1, 5, 9]
+
+    def test_changed_file_needs_restart(self, session_factory, tmp_path):
+        path = tmp_path / 'sheet.csv'
+        path.write_text(HEADER + csv_row(1))
+        self.importer(session_factory, path).run()
+        path.write_text(HEADER.replace('Name', 'Full Name') + csv_row(2))
+        with pytest.raises(ValueError):
+            self.importer(session_factory, path).run()
+        summary = self.importer(session_factory, path).run(restart=True)
+        assert summary['resumed_from'] == 0
@@ -0,0 +1,104 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select
+
+from models import Complaint, LinkIdentifier
+from linkage import LinkageIndex, _matching, extract_identifiers, normalize, rebuild
+
+
+def make_complaint(complaint_id, **fields):
+    return Complaint(
+        complaint_id=complaint_id, phone_number='919000000000', name='Victim', address='Chennai',
+        description='Fraud', status='submitted', **fields
+    )
+
+
+class TestLinkage:
+    """Test cases for the cross-complaint linkage index."""
+
+    def submit(self, db, complaint):
+        db.add(complaint)
+        LinkageIndex(db).add_complaint(complaint)
+        db.commit()
+
+    def test_normalize(self):
+        assert normalize('ifsc', ' sbin 0001234 ') == 'SBIN0001234'
+        assert normalize('ifsc', 'SBIN1234') is None
+        assert normalize('phone', '+91 98765-43210') == '9876543210'
+        assert normalize('account', '12-34') is None
+        ids = extract_identifiers(make_complaint(
+            'A', receiver_txn_id='Fraud@OkAxis', suspect_details='Called from +91 98765 43210, also pays to mule.1@ybl'
+        ))
+        assert ids == {('upi', 'fraud@okaxis'), ('upi', 'mule.1@ybl'), ('phone', '9876543210')}
+
+    def test_incremental_clusters_and_counts(self, session_factory):
+        db = session_factory()
+        self.submit(db, make_complaint('A', receiver_txn_id='fraud@okaxis', ifsc='SBIN0001234'))
+        self.submit(db, make_complaint('B', receiver_txn_id='FRAUD@okaxis', suspect_details='ph 9876543210'))
+        self.submit(db, make_complaint('C', suspect_details='Caller +91-9876543210'))
+        self.submit(db, make_complaint('D', receiver_txn_id='55501234', ifsc='sbin0001234'))
+        index = LinkageIndex(db)
+
+        assert index.shared_count('upi', 'Fraud@OkAxis') == 2
+        assert index.shared_count('ifsc', 'SBIN0001234') == 2
+        assert index.cluster_members('C') == ['A', 'B', 'C']
+        assert index.cluster_size('A') == 3
+        # A shared IFSC alone does not link complaints
+        assert index.cluster_members('D') == ['D']
+        assert {link['value']: link['others'] for link in index.links_for('A')} == {
+            'fraud@okaxis': 1, 'SBIN0001234': 1
+        }
+
+        # Re-submitting replaces identifiers instead of counting them twice
+        complaint = db.query(Complaint).filter_by(complaint_id='A').one()
+        complaint.ifsc = None
+        LinkageIndex(db).add_complaint(complaint)
+        db.commit()
+        assert index.shared_count('upi', 'fraud@okaxis') == 2
+        assert index.shared_count('ifsc', 'SBIN0001234') == 1
+        assert index.cluster_size('A') == 3
+        db.close()
+
+    def test_rebuild_matches_incremental(self, session_factory):
+        db = session_factory()
+        db.add_all([
+            make_complaint('A', receiver_txn_id='fraud@okaxis'),
+            make_complaint('B', receiver_txn_id='fraud@okaxis', sender_txn_id='T0000001'),
+            make_complaint('C', sender_txn_id='t-0000001'),
+            make_complaint('D', receiver_txn_id='other@ybl'),
+        ])
+        db.add(Complaint(complaint_id='E', phone_number='9', name='x', address='y', description='z',
+                         receiver_txn_id='fraud@okaxis', status='draft'))
+        db.commit()
+        summary = rebuild(session_factory, chunk_size=2)
+        assert summary['complaints'] == 4
+        assert summary['clusters'] == 1
+        index = LinkageIndex(db)
+        assert index.cluster_members('A') == ['A', 'B', 'C']
+        assert index.cluster_size('B') == 3
+        assert index.cluster_size('D') == 1
+        assert index.shared_count('upi', 'fraud@okaxis') == 2
+        db.close()
+
+    def test_lookups_use_the_index(self, session_factory):
+        db = session_factory()
+        keys = [('upi', 'a@ybl'), ('upi', 'b@ybl'), ('phone', '9876543210'), ('txn', 'T0000001')]
+        stmt = select(LinkIdentifier.complaint_id).where(_matching(LinkIdentifier, keys))
+        sql = str(stmt.compile(db.get_bind(), compile_kwargs={'literal_binds': True}))
+        plan = ' '.join(row[-1] for row in db.connection().exec_driver_sql('EXPLAIN QUERY PLAN ' + sql))
+        # One index probe per kind, no table scan
+        assert plan.count('ix_link_identifiers_lookup') == 3
+        assert 'SCAN' not in plan
+        db.close()
+
+    def test_unsupported_dialect(self):
+        db = MagicMock()
+        db.get_bind.return_value.dialect.name = 'mysql'
+        with pytest.raises(ValueError, match='mysql'):
+            LinkageIndex(db)
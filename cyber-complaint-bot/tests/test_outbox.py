@@ -0,0 +1,139 @@
+import pytest
+import sys
+import os
+import json
+import threading
+from unittest.mock import Mock
+
+import requests
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy.orm import sessionmaker
+
+from models import OutboxMessage
+from outbox import OutboxSender, OutboxDeliveryWorker
+from whatsapp_handler import WhatsAppHandler
+from tests.test_whatsapp_handler import StubGraphServer
+
+
+class TestOutbox:
+    """Test cases for the outbox and its delivery worker."""
+
+    @pytest.fixture
+    def session_factory(self, memory_engine):
+        return sessionmaker(bind=memory_engine, autocommit=False, autoflush=False)
+
+    @pytest.fixture
+    def whatsapp(self):
+        whatsapp = Mock()
+        whatsapp.send.return_value = {'messages': [{'id': 'wamid.1'}]}
+        return whatsapp
+
+    def test_sends_are_recorded_not_delivered(self, session_factory):
+        """OutboxSender only adds rows to the caller's transaction."""
+        db = session_factory()
+        sender = OutboxSender(db)
+        sender.begin_turn('wamid.in')
+        sender.send_text('919876543210', 'Please enter your full name:')
+        db.rollback()
+
+        assert db.query(OutboxMessage).count() == 0
+
+        sender.begin_turn('wamid.in')
+        sender.send_text('919876543210', 'Please enter your full name:')
+        db.commit()
+
+        message = db.query(OutboxMessage).one()
+        assert message.idempotency_key == 'wamid.in:1'
+        assert json.loads(message.payload)['text']['body'] == 'Please enter your full name:'
+
+    def test_worker_delivers_in_order(self, session_factory, whatsapp):
+        """Pending messages are sent in recorded order and marked sent."""
+        db = session_factory()
+        sender = OutboxSender(db)
+        sender.send_text('919876543210', 'first')
+        sender.send_text('919876543210', 'second')
+        db.commit()
+
+        worker = OutboxDeliveryWorker(session_factory, whatsapp, per_number_burst=5)
+        assert worker.deliver_pending() == 2
+
+        bodies = [c.args[0]['text']['body'] for c in whatsapp.send.call_args_list]
+        assert bodies == ['first', 'second']
+        assert {m.status for m in db.query(OutboxMessage)} == {'sent'}
+
+    def test_per_number_rate_limit_defers(self, session_factory, whatsapp):
+        """Messages beyond a recipient's burst wait for the next pass."""
+        db = session_factory()
+        sender = OutboxSender(db)
+        for n in range(3):
+            sender.send_text('919876543210', str(n))
+        sender.send_text('918888888888', 'other')
+        db.commit()
+
+        worker = OutboxDeliveryWorker(session_factory, whatsapp, per_number_rate=0.001, per_number_burst=1)
+        assert worker.deliver_pending() == 2
+        assert db.query(OutboxMessage).filter_by(status='pending').count() == 2
+
+    def test_failed_send_is_retried_later(self, session_factory, whatsapp):
+        """An error response schedules a retry instead of losing the message."""
+        whatsapp.send.return_value = {'error': {'code': 131000}}
+        db = session_factory()
+        OutboxSender(db).send_text('919876543210', 'hello')
+        db.commit()
+
+        worker = OutboxDeliveryWorker(session_factory, whatsapp, max_attempts=1)
+        worker.deliver_pending()
+
+        message = db.query(OutboxMessage).one()
+        assert message.status == 'failed'
+        assert '131000' in message.last_error
+
+    def test_backoff_holds_later_messages_to_the_recipient(self, session_factory, whatsapp):
+        """A message waiting out a retry keeps later ones to the same number behind it."""
+        whatsapp.send.side_effect = [{'error': {'code': 131000}}, {'messages': [{'id': 'wamid.2'}]}]
+        db = session_factory()
+        sender = OutboxSender(db)
+        sender.send_text('919876543210', 'first')
+        db.commit()
+        worker = OutboxDeliveryWorker(session_factory, whatsapp, per_number_burst=5)
+        worker.deliver_pending()  # first fails and backs off
+
+        sender.send_text('919876543210', 'second')
+        sender.send_text('918888888888', 'other')
+        db.commit()
+        assert worker.deliver_pending() == 1
+
+        bodies = [c.args[0]['text']['body'] for c in whatsapp.send.call_args_list]
+        assert bodies == ['first', 'other']
+        assert db.query(OutboxMessage).filter_by(status='pending').count() == 2
+
+    def test_send_timed_out_after_acceptance_is_not_resent(self, session_factory):
+        """A read timeout may mean the message was delivered, so it is parked as 'unknown'."""
+        server = StubGraphServer()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:%d/v16.0/123/messages' % server.server_address[1]
+            whatsapp = WhatsAppHandler(base_url=url, timeout=(1, 0.2), max_retries=2,
+                                       backoff=0.01, session=requests.Session())
+            # The server accepts the POST but answers after the client gave up
+            server.delays = [0.5]
+            db = session_factory()
+            OutboxSender(db).send_text('919876543210', 'Your complaint is registered')
+            db.commit()
+            worker = OutboxDeliveryWorker(session_factory, whatsapp)
+
+            assert worker.deliver_pending() == 1
+            message = db.query(OutboxMessage).one()
+            db.refresh(message)
+            assert message.status == 'unknown'
+            assert worker.stats()['unconfirmed'] == 1
+
+            assert worker.deliver_pending() == 0
+            assert len(server.requests) == 1
+        finally:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,81 @@
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pdf_generator
+from pdf_generator import PDFGenerator, complaint_from_fields, get_html_renderer, load_template
+
+DATA = {
+    'complaint_id': 'AB12', 'name': 'Ravi', 'phone_number': '919876543210',
+    'address': '12 MG Road', 'description': 'UPI fraud', 'transaction_count': 1,
+    'sender_txn_id': 'TXN1', 'receiver_txn_id': 'RCV1', 'ifsc': 'SBIN0001234',
+    'timestamp_evidence': '2024-01-01 10:00', 'created_at': '2024-01-02T09:30:00',
+}
+
+
+def weasyprint_available():
+    try:
+        from weasyprint import HTML  # noqa: F401
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+class TestPDFGenerator:
+    """Test cases for the PDF backends."""
+
+    @pytest.fixture(autouse=True)
+    def reset_renderer(self, monkeypatch):
+        # Each test decides for itself whether WeasyPrint loads
+        monkeypatch.setattr(pdf_generator, '_html_renderer', None)
+
+    def test_dict_fields_reach_the_template(self):
+        """Conversation data is mapped to the attributes the template reads."""
+        html = load_template().render(complaint=complaint_from_fields(DATA))
+
+        assert 'Complaint ID: AB12' in html
+        assert '2024-01-02 09:30:00' in html
+        assert 'SBIN0001234' in html
+        # The suspect section only appears when a suspect was named
+        assert 'Suspect Information' not in html
+        html = load_template().render(complaint=complaint_from_fields(dict(DATA, suspect_name='Mr X')))
+        assert 'Suspect Information' in html
+
+    def test_created_at_comes_from_the_input(self):
+        """A stored draft date is used as is, so re-renders match the cached file."""
+        assert complaint_from_fields(DATA).created_at == datetime(2024, 1, 2, 9, 30)
+        assert isinstance(complaint_from_fields({}).created_at, datetime)
+
+    def test_user_fields_are_escaped(self):
+        """Citizen input is text, never markup."""
+        data = dict(DATA, name='<script>alert(1)</script>', suspect_name='<b>Mr X</b>')
+        html = load_template().render(complaint=complaint_from_fields(data))
+
+        assert '<script>' not in html
+        assert '&lt;script&gt;alert(1)&lt;/script&gt;' in html
+        assert '&lt;b&gt;Mr X&lt;/b&gt;' in html
+
+    @pytest.mark.parametrize('error', [ImportError('no module named weasyprint'), OSError('no pango')])
+    def test_falls_back_to_reportlab(self, monkeypatch, tmp_path, error):
+        """Without WeasyPrint the weasyprint backend still writes a PDF, via ReportLab."""
+        def unavailable(*args, **kwargs):
+            raise error
+        monkeypatch.setattr(pdf_generator, 'HTMLTemplateRenderer', unavailable)
+
+        path = PDFGenerator(backend='weasyprint').generate(DATA, path=str(tmp_path / 'out.pdf'))
+
+        assert open(path, 'rb').read(5) == b'%PDF-'
+        assert get_html_renderer() is None
+        # The failed load is remembered rather than retried per document
+        assert pdf_generator._html_renderer is False
+
+    @pytest.mark.skipif(not weasyprint_available(), reason='WeasyPrint native libraries not installed')
+    def test_weasyprint_render(self, tmp_path):
+        path = PDFGenerator(backend='weasyprint').generate(DATA, path=str(tmp_path / 'out.pdf'))
+
+        assert open(path, 'rb').read(5) == b'%PDF-'
+        assert get_html_renderer() is not None
@@ -0,0 +1,150 @@
+import pytest
+import sys
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from render_service import RenderService
+
+DATA = {'complaint_id': 'AB12', 'name': 'Ravi', 'category': 'cyber_fraud', 'description': 'UPI fraud'}
+
+
+class FakePool:
+    """Runs renders on a thread instead of a process, failing the first `failures` jobs."""
+
+    def __init__(self, failures=0, gate=None):
+        self.failures = failures
+        self.gate = gate
+        self.calls = 0
+        self._threads = ThreadPoolExecutor(max_workers=2)
+
+    def submit(self, fn, data, path):
+        self.calls += 1
+        fail = self.calls <= self.failures
+
+        def run():
+            if self.gate is not None:
+                self.gate.wait(5)
+            if fail:
+                raise RuntimeError('renderer crashed')
+            with open(path, 'wb') as f:
+                f.write(b'%PDF ' + data['complaint_id'].encode())
+            return path
+        return self._threads.submit(run)
+
+    def shutdown(self, wait=True):
+        self._threads.shutdown(wait=wait)
+
+
+class TestRenderService:
+    """Test cases for the background PDF render service."""
+
+    @pytest.fixture
+    def service(self, tmp_path):
+        service = RenderService(workers=1, uploads_dir=str(tmp_path))
+        os.makedirs(service.uploads_dir, exist_ok=True)
+        yield service
+        service.shutdown()
+
+    def use_pool(self, service, pool):
+        service._executor = pool
+        return pool
+
+    def test_render_and_callback(self, service, tmp_path):
+        self.use_pool(service, FakePool())
+        done = []
+        path = service.submit(DATA, callback=done.append).result(5)
+
+        assert path == str(tmp_path / service.output_name(DATA))
+        assert open(path, 'rb').read() == b'%PDF AB12'
+        assert done == [path]
+        assert service.stats()['rendered'] == 1
+        assert service.stats()['in_flight'] == 0
+
+    def test_hash_cache_hit(self, service):
+        pool = self.use_pool(service, FakePool())
+        first = service.submit(DATA).result(5)
+        second = service.submit(dict(DATA)).result(5)
+
+        assert first == second
+        assert pool.calls == 1
+        assert service.stats()['cache_hits'] == 1
+        # A changed field is a different file
+        assert service.submit(dict(DATA, name='Ravi Kumar')).result(5) != first
+        assert pool.calls == 2
+
+    def test_inflight_join(self, service):
+        gate = threading.Event()
+        pool = self.use_pool(service, FakePool(gate=gate))
+        first = service.submit(DATA)
+        second = service.submit(DATA)
+        assert second is first
+        assert service.stats()['in_flight'] == 1
+
+        gate.set()
+        assert first.result(5) == second.result(5)
+        assert pool.calls == 1
+
+    def test_failure_is_retried_once(self, service):
+        pool = self.use_pool(service, FakePool(failures=1))
+        done = []
+        path = service.submit(DATA, callback=done.append).result(5)
+
+        assert pool.calls == 2
+        assert done == [path]
+        assert service.stats()['errors'] == 0
+
+    def test_failure_after_retry_calls_on_error(self, service):
+        pool = self.use_pool(service, FakePool(failures=2))
+        done, failed = [], threading.Event()
+        errors = []
+
+        def on_error(error):
+            errors.append(error)
+            failed.set()
+
+        future = service.submit(DATA, callback=done.append, on_error=on_error)
+        with pytest.raises(RuntimeError):
+            future.result(5)
+
+        assert failed.wait(5)
+        assert pool.calls == 2
+        assert done == []
+        assert str(errors[0]) == 'renderer crashed'
+        assert service.stats()['errors'] == 1
+        assert service.stats()['in_flight'] == 0
+        # The next submit renders again rather than replaying the failure
+        assert service.submit(DATA).result(5)
+
+    def test_no_pool_after_shutdown(self, service):
+        """A submit after shutdown fails instead of starting a new pool."""
+        service.shutdown()
+        errors = []
+        future = service.submit(DATA, on_error=errors.append)
+
+        with pytest.raises(RuntimeError):
+            future.result(5)
+        assert service._executor is None
+        assert len(errors) == 1
+
+    def test_failure_during_shutdown_is_not_retried(self, service):
+        """A render that fails while the worker exits does not bring the pool back."""
+        gate = threading.Event()
+        pool = self.use_pool(service, FakePool(failures=1, gate=gate))
+        future = service.submit(DATA)
+        service.shutdown(wait=False)
+        gate.set()
+
+        with pytest.raises(RuntimeError, match='renderer crashed'):
+            future.result(5)
+        assert pool.calls == 1
+        assert service._executor is None
+
+    def test_created_at_is_part_of_the_cache_key(self, service):
+        """The draft date is printed, so a different date is a different file."""
+        first = service.output_name(dict(DATA, created_at='2024-01-02T09:30:00'))
+        assert first == service.output_name(dict(DATA, created_at='2024-01-02T09:30:00'))
+        assert first != service.output_name(dict(DATA, created_at='2024-01-03T09:30:00'))
@@ -0,0 +1,109 @@
+import pytest
+import sys
+import os
+import csv
+import json
+from collections import Counter
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import Complaint, ComplaintRollup
+import rollups
+from reporting import export, summary
+
+
+def make_complaint(n, status='submitted', category='cyber_fraud', reporter=None):
+    return Complaint(
+        complaint_id=f'C{n:04d}', phone_number=reporter or f'91900000{n:04d}', name='Ravi', address='Chennai',
+        description=f'Complaint {n}, with "quotes"', status=status, category=category,
+        created_at=datetime(2024, 3, 1 + n % 2, 9 + n % 3, 15)
+    )
+
+
+class TestReporting:
+    """Test cases for rollup counters and read-only exports."""
+
+    @pytest.fixture
+    def engines(self, tmp_path):
+        url = f'sqlite:///{tmp_path}/complaints.db'
+        engine = make_engine(url)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        for n in range(6):
+            complaint = make_complaint(n, reporter='919999999999' if n < 3 else None)
+            db.add(complaint)
+            rollups.status_changed(db, complaint, None)
+        draft = make_complaint(6, status='draft')
+        db.add(draft)
+        rollups.status_changed(db, draft, None)
+        db.commit()
+        # The draft is then submitted
+        draft.status = 'submitted'
+        rollups.status_changed(db, draft, 'draft')
+        db.commit()
+        db.close()
+        read_only = make_engine(url, read_only=True)
+        yield engine, Session, read_only
+        read_only.dispose()
+        engine.dispose()
+
+    def counters(self, engine):
+        with engine.connect() as conn:
+            return Counter({(r.dimension, r.key): r.complaints for r in conn.execute(select(ComplaintRollup))
+                            if r.complaints})
+
+    def test_rollups_match_rebuild(self, engines):
+        engine, Session, read_only = engines
+        stats = summary(read_only)
+        assert stats['by_status'] == {'submitted': 7}
+        assert stats['by_category'] == {'cyber_fraud': 7}
+        assert stats['by_day'] == {'2024-03-01': 4, '2024-03-02': 3}
+        assert stats['repeat_reporters'] == {'919999999999': 3}
+        incremental = self.counters(engine)
+        rollups.rebuild(Session)
+        assert self.counters(engine) == incremental
+
+    def test_export_streams_while_writer_holds_lock(self, engines, tmp_path):
+        engine, Session, read_only = engines
+        writer = engine.connect()
+        writer.execute(text("UPDATE complaints SET status = 'in_review' WHERE id = 1"))  # holds the write lock
+        try:
+            out = tmp_path / 'out.csv'
+            result = export(str(out), 'csv', columns=['complaint_id', 'description', 'created_at'],
+                            batch_size=2, engine=read_only)
+            assert result['exported'] == 7
+            rows = list(csv.DictReader(open(out, newline='')))
+            assert rows[0] == {'complaint_id': 'C0000', 'description': 'Complaint 0, with "quotes"',
+                               'created_at': '2024-03-01 09:15:00'}
+
+            out = tmp_path / 'out.jsonl'
+            export(str(out), 'jsonl', status='submitted', engine=read_only)
+            records = [json.loads(line) for line in open(out)]
+            # The uncommitted update is not visible
+            assert len(records) == 7 and records[0]['status'] == 'submitted'
+        finally:
+            writer.rollback()
+            writer.close()
+
+    def test_read_only_engine_refuses_writes(self, engines):
+        engine, Session, read_only = engines
+        with read_only.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text("DELETE FROM complaints"))
+
+    def test_parquet_export(self, engines, tmp_path):
+        pq = pytest.importorskip('pyarrow.parquet')
+        engine, Session, read_only = engines
+        out = tmp_path / 'out.parquet'
+        export(str(out), 'parquet', batch_size=3, engine=read_only)
+        table = pq.read_table(out)
+        assert table.num_rows == 7
+        assert pq.ParquetFile(out).num_row_groups == 3
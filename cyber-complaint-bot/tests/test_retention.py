@@ -0,0 +1,131 @@
+import pytest
+import sys
+import os
+import gzip
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, make_engine
+from models import ConversationState
+from retention import RetentionEngine
+from state_cache import StateCache
+
+NOW = datetime(2024, 3, 20, 12, 0, tzinfo=timezone.utc)
+
+
+class TestRetention:
+    """Test cases for session expiry, cold storage of uploads and incremental vacuum."""
+
+    @pytest.fixture
+    def engine(self, tmp_path):
+        engine = make_engine(f"sqlite:///{tmp_path / 'complaints.db'}")
+        Base.metadata.create_all(bind=engine)
+        yield engine
+        engine.dispose()
+
+    @pytest.fixture
+    def retention(self, engine, tmp_path):
+        return RetentionEngine(sessionmaker(bind=engine), uploads_dir=str(tmp_path / 'uploads'),
+                               archive_dir=str(tmp_path / 'archive'), batch_size=2, pause=0,
+                               state_cache=StateCache())
+
+    def add_session(self, engine, phone, step, age, temp=None):
+        with engine.begin() as conn:
+            conn.execute(insert(ConversationState), {
+                'phone_number': phone, 'current_step': step, 'temp_data': temp or {}, 'updated_at': NOW - age,
+            })
+
+    def test_expire_sessions(self, engine, retention, tmp_path):
+        self.add_session(engine, '911', 'end', timedelta(hours=30), {'complaint_id': 'AB12', 'name': 'Ravi'})
+        self.add_session(engine, '912', 'end', timedelta(hours=2), {'complaint_id': 'CD34'})
+        self.add_session(engine, '913', 'await_name', timedelta(days=3))  # idle, within TTL
+        self.add_session(engine, '914', 'await_edit_choice', timedelta(days=9), {'complaint_id': 'EF56'})
+        self.add_session(engine, '915', 'await_address', timedelta(days=10))  # never created a complaint
+        self.add_session(engine, '916', 'await_name', timedelta(days=2))
+        retention.state_cache.put('911', 'end', {}, 1)
+
+        result = retention.expire_sessions(ended_hours=24, idle_days=7, now=NOW)
+
+        assert result['expired'] == 3
+        assert result['archived'] == 2
+        with engine.connect() as conn:
+            left = conn.execute(select(ConversationState.phone_number).order_by(ConversationState.phone_number))
+            assert left.scalars().all() == ['912', '913', '916']
+        assert retention.state_cache.get('911') is None
+
+        with gzip.open(tmp_path / 'archive' / 'conversations' / '2024-03.jsonl.gz', 'rt', encoding='utf-8') as f:
+            archived = [json.loads(line) for line in f]
+        assert sorted(r['complaint_id'] for r in archived) == ['AB12', 'EF56']
+        assert next(r for r in archived if r['phone_number'] == '911')['temp_data']['name'] == 'Ravi'
+
+        # Nothing left to expire; a second run is a no-op
+        assert retention.expire_sessions(ended_hours=24, idle_days=7, now=NOW)['expired'] == 0
+
+    def test_cold_storage_and_thaw(self, retention, tmp_path):
+        uploads = tmp_path / 'uploads'
+        (uploads / 'evidence' / 'ab').mkdir(parents=True)
+        (uploads / 'evidence' / 'tmp').mkdir()
+        old_pdf = uploads / 'A1-0123.pdf'
+        old_pdf.write_bytes(b'%PDF ' * 2000)
+        old_evidence = uploads / 'evidence' / 'ab' / 'ab12.jpg'
+        old_evidence.write_bytes(b'screenshot')
+        (uploads / 'B2-4567.pdf').write_bytes(b'%PDF recent')
+        (uploads / 'evidence' / 'tmp' / 'partial').write_bytes(b'in flight')
+        (uploads / '.gitkeep').write_bytes(b'')
+        long_ago = time.time() - 100 * 86400
+        for path in (old_pdf, old_evidence, uploads / 'evidence' / 'tmp' / 'partial', uploads / '.gitkeep'):
+            os.utime(path, (long_ago, long_ago))
+
+        result = retention.cold_store_uploads(days=90)
+
+        assert result['moved'] == 2
+        assert result['stored_bytes'] < result['bytes']
+        assert not old_pdf.exists() and not old_evidence.exists()
+        assert (uploads / 'B2-4567.pdf').exists()
+        assert (uploads / 'evidence' / 'tmp' / 'partial').exists()
+        assert (tmp_path / 'archive' / 'uploads' / 'evidence' / 'ab' / 'ab12.jpg.gz').exists()
+
+        restored = retention.thaw('A1-0123.pdf')
+        assert open(restored, 'rb').read() == b'%PDF ' * 2000
+        assert not (tmp_path / 'archive' / 'uploads' / 'A1-0123.pdf.gz').exists()
+        with pytest.raises(ValueError):
+            retention.thaw('../complaints.db')
+
+    def test_incremental_vacuum(self, engine, retention):
+        with engine.begin() as conn:
+            assert conn.execute(text('PRAGMA auto_vacuum')).scalar() == 2  # incremental on a new database
+            conn.execute(insert(ConversationState), [
+                {'phone_number': str(n), 'current_step': 'end', 'temp_data': {'description': 'x' * 400}}
+                for n in range(3000)
+            ])
+        with engine.begin() as conn:
+            conn.execute(text('DELETE FROM conversation_state'))
+
+        partial = retention.incremental_vacuum(pages=100, max_pages=250)
+        assert partial['auto_vacuum'] == 'incremental'
+        assert partial['freed_pages'] == 250
+        rest = retention.incremental_vacuum(pages=100)
+        assert rest['free_pages'] == 0
+        assert rest['freed_pages'] > 0
+
+    def test_connect_does_not_wait_for_a_writer(self, engine, tmp_path):
+        """auto_vacuum is only requested on a new file; on an existing one it waits for the write lock."""
+        writer = sqlite3.connect(tmp_path / 'complaints.db', isolation_level=None)
+        writer.execute('BEGIN IMMEDIATE')
+        other = make_engine(f"sqlite:///{tmp_path / 'complaints.db'}")
+        try:
+            started = time.monotonic()
+            other.raw_connection().close()
+            assert time.monotonic() - started < 1
+        finally:
+            writer.execute('ROLLBACK')
+            writer.close()
+            other.dispose()
@@ -0,0 +1,80 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from models import Complaint
+from migrations import ensure_schema
+from search import search_complaints, to_match_query
+
+
+class TestSearch:
+    """Test cases for full-text complaint search."""
+
+    @pytest.fixture
+    def db(self):
+        engine = create_engine('sqlite://')
+        ensure_schema(engine)
+        session = sessionmaker(bind=engine)()
+
+        def add(complaint_id, description, suspect_details=None, status='submitted'):
+            session.add(Complaint(
+                complaint_id=complaint_id, phone_number='919000000000', name='Test', address='Chennai',
+                description=description, suspect_details=suspect_details, status=status
+            ))
+            session.commit()
+
+        add('A1', 'Paid 5000 to fraud@okaxis for a fake job offer', 'Caller from 98765-43210')
+        add('A2', 'Fake KYC update call, money sent to fraud@okaxis twice. fraud fraud', None)
+        add('A3', 'Harassment on Instagram', 'Account named scam_king', status='draft')
+        yield session
+        session.close()
+
+    def test_upi_handle_and_phone(self, db):
+        hits = search_complaints(db, 'fraud@okaxis').hits
+        assert {h.complaint.complaint_id for h in hits} == {'A1', 'A2'}
+        assert [h.complaint.complaint_id for h in search_complaints(db, '98765-43210').hits] == ['A1']
+        assert '[' in hits[0].snippet
+
+    def test_prefix_and_status_filter(self, db):
+        assert [h.complaint.complaint_id for h in search_complaints(db, 'scam*').hits] == ['A3']
+        assert search_complaints(db, 'scam*', status='submitted').hits == []
+
+    def test_index_follows_updates(self, db):
+        """Edits to the searched columns are re-indexed by the triggers."""
+        complaint = db.query(Complaint).filter_by(complaint_id='A3').one()
+        complaint.description = 'Sextortion via Telegram'
+        db.commit()
+        assert search_complaints(db, 'Instagram').hits == []
+        assert [h.complaint.complaint_id for h in search_complaints(db, 'telegram').hits] == ['A3']
+
+    def test_pagination(self, db):
+        first = search_complaints(db, 'fraud', limit=1)
+        assert len(first.hits) == 1 and first.next_page == 2
+        second = search_complaints(db, 'fraud', page=2, limit=1)
+        assert second.next_page is None
+        assert first.hits[0].complaint.complaint_id != second.hits[0].complaint.complaint_id
+
+    def test_rank_window(self, db):
+        """The window holds the newest matches that pass the status filter, and reports truncation."""
+        db.add(Complaint(complaint_id='A4', phone_number='919000000000', name='Test', address='Chennai',
+                         description='Draft about fraud@okaxis', status='draft'))
+        db.commit()
+        submitted = search_complaints(db, 'fraud@okaxis', status='submitted', rank_window=2)
+        assert {h.complaint.complaint_id for h in submitted.hits} == {'A1', 'A2'}
+        assert not submitted.truncated
+
+        newest = search_complaints(db, 'fraud@okaxis', rank_window=2)
+        assert {h.complaint.complaint_id for h in newest.hits} == {'A2', 'A4'}
+        assert newest.truncated
+        assert not search_complaints(db, 'fraud@okaxis', rank_window=3).truncated
+
+    def test_query_is_escaped(self):
+        assert to_match_query('say "hi" OR x*') == '"say" """hi""" "OR" "x"*'
+        with pytest.raises(ValueError):
+            to_match_query('  * ')
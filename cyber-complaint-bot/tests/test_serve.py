@@ -0,0 +1,89 @@
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app
+import serve
+from config import (
+    SERVER_WORKERS, SERVER_GRACEFUL_TIMEOUT, OUTBOX_GLOBAL_RATE, OUTBOX_PER_NUMBER_RATE, OUTBOX_ENABLED
+)
+from render_service import RenderService
+
+
+class TestServe:
+    """Test cases for the production server hooks."""
+
+    @pytest.fixture
+    def render_service(self, monkeypatch, tmp_path):
+        service = RenderService(workers=8, uploads_dir=str(tmp_path))
+        monkeypatch.setattr(app, 'get_render_service', lambda: service)
+        return service
+
+    @pytest.fixture
+    def fresh_app(self, monkeypatch, tmp_path, session_factory, render_service):
+        """app with no background workers yet, writing to a temporary queue and database."""
+        for name in ('webhook_queue', 'webhook_workers', 'status_recorder', 'outbox_worker'):
+            monkeypatch.setattr(app, name, None)
+        monkeypatch.setattr(app, 'WEBHOOK_QUEUE_PATH', str(tmp_path / 'queue.db'))
+        monkeypatch.setattr(app, 'SessionLocal', session_factory)
+        yield app
+        app.stop_background_workers(timeout=5)
+
+    def test_gunicorn_options(self):
+        """Workers fork from a preloaded master and run the lifecycle hooks."""
+        options = serve.gunicorn_options()
+
+        assert options['workers'] == SERVER_WORKERS
+        assert options['worker_class'] == 'gthread'
+        assert options['preload_app'] is True
+        assert options['graceful_timeout'] == SERVER_GRACEFUL_TIMEOUT
+        assert options['post_fork'] is serve.post_fork
+        assert options['worker_exit'] is serve.worker_exit
+
+    def test_post_fork_starts_workers_with_their_share(self, monkeypatch):
+        start = Mock()
+        monkeypatch.setattr(app, 'start_background_workers', start)
+
+        serve.post_fork(SimpleNamespace(num_workers=4), worker=None)
+
+        start.assert_called_once_with(processes=4)
+
+    def test_worker_exit_stops_workers(self, monkeypatch):
+        stop = Mock()
+        monkeypatch.setattr(app, 'stop_background_workers', stop)
+
+        serve.worker_exit(SimpleNamespace(num_workers=4), worker=None)
+
+        stop.assert_called_once_with(timeout=SERVER_GRACEFUL_TIMEOUT * 0.8)
+
+    def test_nothing_is_built_before_start(self, fresh_app):
+        """Importing app in the gunicorn master opens no queue or Graph API session."""
+        assert fresh_app.webhook_queue is None
+        assert fresh_app.outbox_worker is None
+
+    def test_start_splits_host_limits(self, fresh_app, render_service, monkeypatch):
+        monkeypatch.setattr(fresh_app, 'PDF_RENDER_WORKERS', 8)
+        fresh_app.start_background_workers(processes=4)
+
+        assert fresh_app.webhook_queue is not None
+        assert render_service.workers == 2
+        if OUTBOX_ENABLED:
+            assert fresh_app.outbox_worker.global_bucket.rate == OUTBOX_GLOBAL_RATE / 4
+            assert fresh_app.outbox_worker.per_number_rate == OUTBOX_PER_NUMBER_RATE / 4
+            assert fresh_app.outbox_worker.per_number_burst == 1
+
+    def test_stop_drains_workers(self, fresh_app, render_service):
+        fresh_app.start_background_workers(processes=2)
+        threads = list(fresh_app.webhook_workers._threads)
+        assert threads
+        fresh_app.stop_background_workers(timeout=5)
+
+        assert not any(thread.is_alive() for thread in threads)
+        if OUTBOX_ENABLED:
+            assert fresh_app.outbox_worker._thread is None
+        assert render_service._closed
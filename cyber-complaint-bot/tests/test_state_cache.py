@@ -0,0 +1,44 @@
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from state_cache import StateCache
+
+
+class TestStateCache:
+    """Test cases for the conversation-state cache."""
+
+    def test_hit_returns_private_copy(self):
+        """Mutating a cached snapshot does not change the cache."""
+        cache = StateCache(max_entries=10, ttl=60)
+        cache.put('911', 'await_name', {'category': '1'}, 2)
+        entry = cache.get('911')
+        entry.temp_data['name'] = 'Ravi'
+        assert cache.get('911').temp_data == {'category': '1'}
+        assert cache.get('911').version == 2
+        assert cache.stats()['hits'] == 3
+
+    def test_lru_bound(self):
+        """The least recently used sender is evicted first."""
+        cache = StateCache(max_entries=2, ttl=60)
+        cache.put('a', 'start', {}, 1)
+        cache.put('b', 'start', {}, 1)
+        cache.get('a')
+        cache.put('c', 'start', {}, 1)
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.stats()['evictions'] == 1
+
+    def test_idle_entries_expire(self):
+        """Entries idle past the TTL are misses and are swept."""
+        cache = StateCache(max_entries=10, ttl=0.05)
+        cache.put('a', 'start', {}, 1)
+        cache.put('b', 'start', {}, 1)
+        time.sleep(0.1)
+        assert cache.get('a') is None
+        assert cache.sweep() == 1
+        assert cache.stats()['size'] == 0
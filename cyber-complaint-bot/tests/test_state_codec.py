@@ -0,0 +1,70 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import state_codec
+from database import Base
+from models import ConversationState
+
+
+class TestStateCodec:
+    """Test cases for conversation-state encoding."""
+
+    def test_round_trip(self):
+        """Small states are stored plain, large ones compressed."""
+        small = {'name': 'Ravi', 'city': 'Chennai'}
+        large = {'description': 'UPI fraud via fake KYC call. ' * 100}
+        assert state_codec.encode(small)[:1] == b'j'
+        assert state_codec.encode(large)[:1] == b'z'
+        assert len(state_codec.encode(large)) < len(state_codec.dumps(large))
+        assert state_codec.decode(state_codec.encode(small)) == small
+        assert state_codec.decode(state_codec.encode(large)) == large
+
+    def test_loads_null_as_empty(self):
+        assert state_codec.loads(None) == {}
+        assert state_codec.loads('') == {}
+
+
+class TestConversationStateColumn:
+    """Test cases for change tracking on ConversationState.temp_data."""
+
+    @pytest.fixture
+    def session(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(bind=engine)
+        updates = []
+
+        @event.listens_for(engine, 'before_cursor_execute')
+        def record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('UPDATE conversation_state'):
+                updates.append(statement)
+
+        db = sessionmaker(bind=engine)()
+        db.add(ConversationState(phone_number='911', current_step='await_name', temp_data={}))
+        db.commit()
+        yield db, updates
+        db.close()
+
+    def test_in_place_change_is_persisted(self, session):
+        db, updates = session
+        state = db.get(ConversationState, '911')
+        state.temp_data['name'] = 'Ravi'
+        db.commit()
+        db.expire_all()
+        assert db.get(ConversationState, '911').temp_data == {'name': 'Ravi'}
+        assert len(updates) == 1
+
+    def test_step_change_does_not_rewrite_data(self, session):
+        """Only the columns that changed are written."""
+        db, updates = session
+        state = db.get(ConversationState, '911')
+        state.current_step = 'await_address'
+        db.commit()
+        assert len(updates) == 1
+        assert 'temp_data' not in updates[0]
@@ -0,0 +1,100 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import Complaint, ComplaintRollup, ConversationState
+from conversation import ConversationManager
+from steps import FIELDS, FLOW, Flow, FieldStep
+
+
+def text(body):
+    return {'id': body, 'from': '919000000001', 'type': 'text', 'text': {'body': body}}
+
+
+def reply(reply_id, kind='button_reply'):
+    return {'id': reply_id, 'from': '919000000001', 'type': 'interactive',
+            'interactive': {'type': kind, kind: {'id': reply_id, 'title': reply_id}}}
+
+
+class TestFlowTable:
+    """Test cases for the compiled step table."""
+
+    def test_category_flows(self):
+        assert FLOW.next_step('cyber_fraud', 'await_category') == 'await_name'
+        assert FLOW.next_step('cyber_fraud', 'await_email') == 'await_ifsc'
+        assert FLOW.next_step('cyber_fraud', 'await_description') == 'await_evidence'
+        # Free-text categories get the default flow
+        assert FLOW.next_step('something else', 'await_email') == 'await_description'
+
+    def test_prompt_fallbacks(self):
+        assert FLOW.text('hi', 'name_invalid') == FLOW.text('hi', 'invalid')
+        assert FLOW.text('hi', 'label_ifsc') == 'IFSC'
+        assert FLOW.text('xx', 'name') == FLOW.text('en', 'name')
+        assert "'skip'" in FLOW.text('en', 'ifsc')
+
+    def test_bad_tables_fail_at_compile(self):
+        with pytest.raises(ValueError):
+            Flow(fields=FIELDS + [FieldStep('not_a_column', 'label_name', 'text')])
+        with pytest.raises(ValueError):
+            Flow(flows={'cyber_fraud': ('name', 'pan')})
+        with pytest.raises(ValueError):
+            Flow(fields=[FieldStep('name', 'label_name', 'nmae')], flows={}, default_flow=('name',))
+
+
+class TestTableDrivenConversation:
+    """Test cases for a conversation routed through the step table."""
+
+    @pytest.fixture
+    def manager(self, session_factory):
+        manager = ConversationManager(db=session_factory())
+        manager.whatsapp = MagicMock()
+        manager.renderer = MagicMock()
+        manager.renderer.output_name.return_value = 'draft.pdf'
+        manager.evidence = MagicMock()
+        manager.state_cache = None
+        return manager
+
+    def run(self, manager, *messages):
+        for msg in messages:
+            manager.handle_incoming({'entry': [{'changes': [{'value': {'messages': [msg]}}]}]})
+        return manager.db.get(ConversationState, '919000000001')
+
+    def test_cyber_fraud_complaint(self, manager):
+        state = self.run(
+            manager, text('hi'), reply('cyber_fraud'), text('Ravi Kumar'), text('Chennai'),
+            text('9876543210'), text('ravi@example.com'), text('SBIN0001234'), text('skip'),
+            text('mule@ybl'), text('Paid a fake seller'), text('skip')
+        )
+        assert state.current_step == 'await_edit_choice'
+
+        # Edit the IFSC from the list menu, then submit
+        state = self.run(manager, reply('yes_edit'))
+        rows = manager.whatsapp.send_list.call_args[0][3]
+        assert [r['id'] for r in rows][4:7] == ['edit_ifsc', 'edit_sender_txn_id', 'edit_receiver_txn_id']
+        state = self.run(manager, reply('edit_ifsc', 'list_reply'), text('HDFC0000001'), reply('no_edit'))
+        assert state.current_step == 'end'
+
+        complaint = manager.db.query(Complaint).one()
+        assert complaint.category == 'cyber_fraud'
+        assert complaint.ifsc == 'HDFC0000001'
+        assert complaint.sender_txn_id is None
+        assert complaint.receiver_txn_id == 'mule@ybl'
+        assert complaint.status == 'submitted'
+        counters = {(r.dimension, r.key): r.complaints for r in manager.db.query(ComplaintRollup)}
+        assert counters[('status', 'submitted')] == 1 and counters[('status', 'draft')] == 0
+        assert counters[('category', 'cyber_fraud')] == 1
+
+    def test_invalid_answer_repeats_step(self, manager):
+        state = self.run(manager, text('hi'), reply('cyber_fraud'), text('R2D2'))
+        assert state.current_step == 'await_name'
+        manager.whatsapp.send_text.assert_called_with('919000000001', FLOW.text('en', 'name_invalid'))
+
+    def test_language_switch(self, manager):
+        state = self.run(manager, text('hi'), reply('identity_theft'), text('hindi'))
+        assert state.current_step == 'await_name'
+        assert state.temp_data['lang'] == 'hi'
+        manager.whatsapp.send_text.assert_called_with('919000000001', FLOW.text('hi', 'name'))
@@ -0,0 +1,204 @@
+import pytest
+import sys
+import os
+from unittest.mock import MagicMock
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from sqlalchemy.orm.exc import StaleDataError
+
+from models import ConversationState, OutboxMessage
+from conversation import ConversationManager
+from outbox import OutboxSender
+from state_cache import StateCache
+from unit_of_work import TurnMetrics, UnitOfWork
+
+PHONE = '919000000001'
+
+
+def text(body, message_id=None):
+    return {'id': message_id or body, 'from': PHONE, 'type': 'text', 'text': {'body': body}}
+
+
+class TestUnitOfWork:
+    """Test cases for the one-transaction-per-turn wrapper."""
+
+    @pytest.fixture
+    def db(self, session_factory):
+        session = session_factory()
+        commits = []
+        event.listen(session, 'after_commit', lambda s: commits.append(1))
+        session.info['commits'] = commits
+        yield session
+        session.close()
+
+    def add_state(self, db, step='start'):
+        db.add(ConversationState(phone_number=PHONE, current_step=step, temp_data={}))
+
+    def test_commits_once(self, db):
+        metrics = TurnMetrics()
+        with UnitOfWork(db, metrics):
+            self.add_state(db)
+            db.flush()
+            db.get(ConversationState, PHONE).current_step = 'await_name'
+        assert db.info['commits'] == [1]
+        assert db.get(ConversationState, PHONE).current_step == 'await_name'
+        assert metrics.rolled_back == 0
+
+    def test_exception_rolls_back_everything(self, db):
+        metrics = TurnMetrics()
+        done = []
+        with pytest.raises(RuntimeError):
+            with UnitOfWork(db, metrics) as uow:
+                uow.after_commit(lambda: done.append('rendered'))
+                self.add_state(db)
+                OutboxSender(db).send_text(PHONE, 'hello')
+                db.flush()
+                raise RuntimeError('handler failed')
+
+        assert db.info['commits'] == []
+        assert db.query(ConversationState).count() == 0
+        assert db.query(OutboxMessage).count() == 0
+        assert done == []
+        assert metrics.rolled_back == 1
+
+    def test_callbacks_run_only_on_success(self, db):
+        order = []
+        with UnitOfWork(db, TurnMetrics()) as uow:
+            self.add_state(db)
+            state = db.get(ConversationState, PHONE)
+            uow.before_commit(lambda: order.append(('before', state.version, db.info['commits'] == [])))
+            uow.after_commit(lambda: order.append(('after', len(db.info['commits']))))
+            # A failing after-commit action is logged, not raised
+            uow.after_commit(lambda: 1 / 0)
+            uow.after_commit(lambda: order.append(('after2', len(db.info['commits']))))
+        # before_commit sees the flushed version; after_commit runs once committed
+        assert order == [('before', 1, True), ('after', 1), ('after2', 1)]
+
+    def test_failed_commit_skips_after_commit(self, db):
+        self.add_state(db)
+        db.commit()
+        done = []
+        db.info['commits'].clear()
+
+        def fail():
+            raise RuntimeError('before commit failed')
+
+        with pytest.raises(RuntimeError):
+            with UnitOfWork(db, TurnMetrics()) as uow:
+                uow.before_commit(fail)
+                uow.after_commit(lambda: done.append(1))
+                db.get(ConversationState, PHONE).current_step = 'end'
+        assert done == []
+        assert db.info['commits'] == []
+        assert db.get(ConversationState, PHONE).current_step == 'start'
+
+    def test_round_trip_counts(self, db):
+        metrics = TurnMetrics()
+        with UnitOfWork(db, metrics):
+            self.add_state(db)
+        with UnitOfWork(db, metrics):
+            db.get(ConversationState, PHONE).current_step = 'await_name'
+        stats = metrics.stats()
+        assert stats['db_round_trips']['count'] == 2
+        # INSERT + COMMIT, then SELECT + UPDATE + COMMIT
+        assert stats['db_round_trips']['total'] == 5
+        assert stats['duration']['count'] == 2
+
+
+class TestProcessMessage:
+    """Test cases for how a conversation turn uses the unit of work."""
+
+    @pytest.fixture
+    def manager(self, session_factory):
+        manager = ConversationManager(db=session_factory())
+        manager.whatsapp = OutboxSender(manager.db)
+        manager.renderer = MagicMock()
+        manager.evidence = MagicMock()
+        manager.state_cache = StateCache()
+        commits = []
+        event.listen(manager.db, 'after_commit', lambda s: commits.append(1))
+        manager.commits = commits
+        yield manager
+        manager.db.close()
+
+    def test_one_commit_per_message(self, manager):
+        manager.process_message(PHONE, 'hi', text('hi'))
+        manager.process_message(PHONE, 'cyber_fraud', text('cyber_fraud'))
+        assert manager.commits == [1, 1]
+        state = manager.db.get(ConversationState, PHONE)
+        assert state.current_step == 'await_name'
+        # The prompts were recorded in the same transactions
+        assert manager.db.query(OutboxMessage).count() >= 2
+
+    def test_failed_turn_rolls_back_state_and_messages(self, manager, monkeypatch):
+        manager.process_message(PHONE, 'hi', text('hi'))
+        sent = manager.db.query(OutboxMessage).count()
+        monkeypatch.setattr(manager, 'collect_category', MagicMock(side_effect=RuntimeError('boom')))
+        manager.handlers['await_category'] = manager.collect_category
+
+        with pytest.raises(RuntimeError):
+            manager.process_message(PHONE, 'cyber_fraud', text('cyber_fraud'))
+        assert manager.commits == [1]
+        assert manager.db.get(ConversationState, PHONE).current_step == 'await_category'
+        assert manager.db.query(OutboxMessage).count() == sent
+
+    def test_stale_cache_entry_replays_turn(self, manager):
+        manager.process_message(PHONE, 'hi', text('hi'))
+        cached = manager.state_cache.get(PHONE)
+        assert cached.current_step == 'await_category'
+        # Another process moved the conversation on; this cache is now a version behind
+        manager.db.get(ConversationState, PHONE).current_step = 'await_name'
+        manager.db.get(ConversationState, PHONE).temp_data['category'] = 'cyber_fraud'
+        manager.db.commit()
+        manager.commits.clear()
+
+        manager.process_message(PHONE, 'Ravi Kumar', text('Ravi Kumar'))
+
+        state = manager.db.get(ConversationState, PHONE)
+        assert state.current_step == 'await_address'
+        assert state.temp_data['name'] == 'Ravi Kumar'
+        assert state.version == 3
+        assert manager.state_cache.stats()['stale'] == 1
+        assert manager.state_cache.get(PHONE).version == 3
+        assert manager.commits == [1]
+
+    def test_stale_data_error_replays_turn_once(self, manager, monkeypatch):
+        """The first attempt's writes are rolled back and the turn runs once more."""
+        manager.process_message(PHONE, 'hi', text('hi'))
+        sent = manager.db.query(OutboxMessage).count()
+        manager.commits.clear()
+        route = manager.route_message
+        calls = []
+
+        def stale_first(*args):
+            calls.append(args)
+            route(*args)
+            if len(calls) == 1:
+                raise StaleDataError('conversation_state version changed')
+        monkeypatch.setattr(manager, 'route_message', stale_first)
+
+        manager.process_message(PHONE, 'cyber_fraud', text('cyber_fraud'))
+
+        assert len(calls) == 2
+        assert manager.commits == [1]
+        assert manager.db.get(ConversationState, PHONE).current_step == 'await_name'
+        # Only the replay's prompt was recorded
+        assert manager.db.query(OutboxMessage).count() == sent + 1
+
+    def test_stale_data_error_on_replay_propagates(self, manager, monkeypatch):
+        """A turn is replayed at most once; a second conflict goes to the queue's retry."""
+        manager.process_message(PHONE, 'hi', text('hi'))
+        manager.commits.clear()
+        route = MagicMock(side_effect=StaleDataError('conversation_state version changed'))
+        monkeypatch.setattr(manager, 'route_message', route)
+
+        with pytest.raises(StaleDataError):
+            manager.process_message(PHONE, 'cyber_fraud', text('cyber_fraud'))
+
+        assert route.call_count == 2
+        assert manager.commits == []
+        assert manager.state_cache.get(PHONE) is None
+        assert manager.db.get(ConversationState, PHONE).current_step == 'await_category'
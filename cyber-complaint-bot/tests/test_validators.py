@@ -0,0 +1,77 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from validators import (
+    BAD_DATE, BAD_FORMAT, FUTURE_DATE, OUT_OF_RANGE, REQUIRED, TOO_LONG, TOO_SHORT,
+    InputValidator, check, parse_amount, validate_many
+)
+
+
+class TestChecks:
+    """Test cases for the single-value checks."""
+
+    @pytest.mark.parametrize('kind, value, expected', [
+        ('name', 'Ravi Kumar', None),
+        ('name', 'रवि कुमार', None),
+        ('name', 'R', TOO_SHORT),
+        ('name', 'R2D2', BAD_FORMAT),
+        ('phone', '+91 98765-43210', None),
+        ('phone', '12345', BAD_FORMAT),
+        ('email', 'user.name@domain.co.in', None),
+        ('email', 'test@', BAD_FORMAT),
+        ('ifsc', 'sbin0001234', None),
+        ('ifsc', 'SBIN1001234', BAD_FORMAT),
+        ('upi', 'ravi.k@okhdfcbank', None),
+        ('upi', 'ravi@', BAD_FORMAT),
+        ('payee', '123456789012', None),
+        ('payee', 'mule@ybl', None),
+        ('txn_id', '412345678901', None),
+        ('txn_id', '1234', TOO_SHORT),
+        ('txn_id', 'UTR 1234 5678', BAD_FORMAT),
+        ('amount', 'Rs. 1,25,000', None),
+        ('amount', '0', OUT_OF_RANGE),
+        ('amount', 'lots', BAD_FORMAT),
+        ('date', '15/08/2024', None),
+        ('date', '31/02/2024', BAD_DATE),
+        ('date', '01/01/2999', FUTURE_DATE),
+        ('date', '1999-12-31', OUT_OF_RANGE),
+        ('text', 'x' * 4001, TOO_LONG),
+    ])
+    def test_check(self, kind, value, expected):
+        assert check(kind, value) == expected
+
+    def test_required(self):
+        assert check('email', '  ') == REQUIRED
+        assert check('email', None, required=False) is None
+
+    def test_parse_amount(self):
+        assert str(parse_amount('₹499.50')) == '499.50'
+        assert str(parse_amount('5000/-')) == '5000'
+
+    def test_input_validator_booleans(self):
+        validator = InputValidator()
+        assert validator.validate_email('a@b.co')
+        assert not validator.validate_ifsc('SBI123')
+
+
+class TestValidateMany:
+    """Test cases for batch validation."""
+
+    def test_errors_align_with_records(self):
+        good = {'phone_number': '919000000001', 'name': 'Ravi', 'address': 'Chennai', 'description': 'Fraud'}
+        records = [
+            good,
+            dict(good, ifsc='BAD', email=''),
+            dict(good, name=None, receiver_txn_id='mule@ybl'),
+        ]
+        assert validate_many(records) == [None, {'ifsc': BAD_FORMAT}, {'name': REQUIRED}]
+
+    def test_custom_schema(self):
+        rows = iter([{'amount': '100'}, {'amount': '-5'}, {}])
+        assert validate_many(rows, schema={'amount': ('amount', True)}) == [
+            None, {'amount': BAD_FORMAT}, {'amount': REQUIRED}
+        ]
@@ -0,0 +1,56 @@
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models import MessageStatus
+from conversation import ConversationManager
+from statuses import StatusRecorder, iter_statuses
+
+
+def message(msg_id, sender, timestamp):
+    return {'id': msg_id, 'from': sender, 'timestamp': str(timestamp), 'type': 'text', 'text': {'body': msg_id}}
+
+
+def status(msg_id, state, timestamp=1700000000):
+    return {'id': msg_id, 'status': state, 'timestamp': str(timestamp), 'recipient_id': '919000000001'}
+
+
+BATCH = {
+    'entry': [
+        {'changes': [{'value': {
+            'messages': [message('m2', 'A', 2), message('m1', 'A', 1), message('m3', 'B', 1)],
+            'statuses': [status('w1', 'delivered')],
+        }}]},
+        {'changes': [{'value': {
+            'messages': [message('m4', 'A', 3)],
+            'statuses': [status('w1', 'read'), status('w2', 'failed')],
+        }}]},
+    ]
+}
+
+
+class TestWebhookBatch:
+    """Test cases for batched webhook payloads."""
+
+    def test_every_message_split_per_sender_in_order(self):
+        split = ConversationManager.split_by_sender(BATCH)
+        ids = [(sender, payload['entry'][0]['changes'][0]['value']['messages'][0]['id']) for sender, payload in split]
+        assert ids == [('A', 'm1'), ('A', 'm2'), ('A', 'm4'), ('B', 'm3')]
+
+    def test_statuses_recorded_in_bulk(self, session_factory):
+        recorder = StatusRecorder(session_factory, batch_size=100, flush_interval=60)
+
+        assert recorder.record(iter_statuses(BATCH)) == 3
+        assert recorder.stats()['buffered'] == 3
+        # A redelivered callback is ignored
+        recorder.record([status('w1', 'read')])
+        assert recorder.flush() == 4
+        assert recorder.stats()['flushes'] == 1
+
+        db = session_factory()
+        rows = {(r.provider_message_id, r.status) for r in db.query(MessageStatus)}
+        assert rows == {('w1', 'delivered'), ('w1', 'read'), ('w2', 'failed')}
+        db.close()
@@ -0,0 +1,130 @@
+import pytest
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import requests
+from whatsapp_handler import WhatsAppHandler
+
+
+class StubGraphServer(ThreadingHTTPServer):
+    """Local stand-in for graph.facebook.com that replays scripted responses."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubGraphRequestHandler)
+        self.responses = []
+        self.delays = []
+        self.requests = []
+        self.client_ports = set()
+        self.lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # A client that timed out hangs up before the reply is written
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubGraphRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length))
+        with self.server.lock:
+            self.server.requests.append(payload)
+            self.server.client_ports.add(self.client_address[1])
+            status, headers = self.server.responses.pop(0) if self.server.responses else (200, {})
+            delay = self.server.delays.pop(0) if self.server.delays else 0
+        time.sleep(delay)
+        body = json.dumps({'messages': [{'id': 'wamid.%d' % len(self.server.requests)}]}).encode()
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestWhatsAppHandler:
+    """Test cases for the pooled Graph API client."""
+
+    @pytest.fixture
+    def server(self):
+        server = StubGraphServer()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+    @pytest.fixture
+    def handler(self, server):
+        url = 'http://127.0.0.1:%d/v16.0/123/messages' % server.server_address[1]
+        return WhatsAppHandler(base_url=url, pool_size=4, timeout=(1, 1),
+                               max_retries=2, backoff=0.01, session=requests.Session())
+
+    def test_connections_are_reused(self, handler, server):
+        """Sequential sends reuse one keep-alive connection."""
+        for _ in range(5):
+            handler.send_text('919876543210', 'hello')
+
+        assert len(server.requests) == 5
+        assert len(server.client_ports) == 1
+
+    def test_retries_on_rate_limit(self, handler, server):
+        """429 with Retry-After is retried and eventually succeeds."""
+        server.responses = [(429, {'Retry-After': '0'}), (503, {})]
+
+        result = handler.send_text('919876543210', 'hello')
+
+        assert 'messages' in result
+        assert len(server.requests) == 3
+
+    def test_gives_up_after_max_retries(self, handler, server):
+        """Persistent 5xx returns the last error response."""
+        server.responses = [(500, {})] * 3
+
+        handler.send_text('919876543210', 'hello')
+
+        assert len(server.requests) == 3
+
+    def test_does_not_wait_out_long_rate_limit(self, handler, server):
+        """A Retry-After longer than max_backoff is not slept through."""
+        server.responses = [(429, {'Retry-After': '3600'})]
+
+        handler.send_text('919876543210', 'hello')
+
+        assert len(server.requests) == 1
+
+    def test_read_timeout_is_not_retried(self, handler, server):
+        """The POST may have been delivered, so a read timeout must not send it again."""
+        server.delays = [1.5]
+        result = handler.send_text('919000000001', 'hello')
+        assert result['error']['type'] == 'ReadTimeout'
+        assert len(server.requests) == 1
+
+    def test_send_many_preserves_result_order(self, handler, server):
+        """Batched sends return responses in payload order."""
+        payloads = [
+            handler.text_payload('919876543210', 'Your draft is ready'),
+            handler.buttons_payload('919876543210', 'Edit?', [
+                {"type": "reply", "reply": {"id": "yes_edit", "title": "Yes"}}
+            ]),
+        ]
+
+        results = handler.send_many(payloads)
+
+        assert len(results) == 2
+        assert all('messages' in r for r in results)
+        assert sorted(r['type'] for r in server.requests) == ['interactive', 'text']
@@ -0,0 +1,145 @@
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from work_queue import WorkQueue, QueueWorkerPool
+
+
+class TestWorkQueue:
+    """Test cases for the durable webhook queue."""
+
+    @pytest.fixture
+    def queue(self, tmp_path):
+        return WorkQueue(str(tmp_path / 'queue.db'), max_attempts=2)
+
+    def test_fifo_claim_and_ack(self, queue):
+        """Items are claimed oldest first and removed on ack."""
+        queue.enqueue({'n': 1})
+        queue.enqueue({'n': 2})
+
+        first = queue.claim()
+        assert first.payload == {'n': 1}
+        assert queue.depth()['processing'] == 1
+
+        queue.ack(first)
+        assert queue.claim().payload == {'n': 2}
+        assert queue.stats()['processed'] == 1
+
+    def test_dedup_key_drops_redelivery(self, tmp_path):
+        """A message id is queued once, even after it was processed, until it expires."""
+        queue = WorkQueue(str(tmp_path / 'queue.db'), dedup_ttl=60)
+        assert queue.enqueue({'n': 1}, dedup_key='wamid.1') is not None
+        queue.ack(queue.claim())
+        # Another process sharing the file sees the same keys
+        other = WorkQueue(str(tmp_path / 'queue.db'), dedup_ttl=60)
+        assert other.enqueue({'n': 1}, dedup_key='wamid.1') is None
+        assert other.stats()['duplicates'] == 1
+        assert queue.depth()['pending'] == 0
+
+        assert queue.prune_seen(now=time.time() + 120) == 1
+        assert queue.enqueue({'n': 1}, dedup_key='wamid.1') is not None
+
+    def test_failed_item_retried_then_dead(self, tmp_path):
+        """Failures are retried until max_attempts, then parked."""
+        queue = WorkQueue(str(tmp_path / 'queue.db'), max_attempts=2, retry_backoff=0)
+        queue.enqueue({'n': 1})
+
+        queue.fail(queue.claim(), 'boom')
+        assert queue.depth()['pending'] == 1
+
+        queue.fail(queue.claim(), 'boom again')
+        assert queue.depth()['dead'] == 1
+        assert queue.claim() is None
+
+    def test_failed_item_waits_for_backoff(self, tmp_path):
+        """A failed item is not claimed again before its backoff ends, and holds back its partition."""
+        queue = WorkQueue(str(tmp_path / 'queue.db'), retry_backoff=0.2)
+        queue.enqueue({'n': 1}, partition_key='911111111111')
+        queue.enqueue({'n': 2}, partition_key='911111111111')
+        queue.enqueue({'n': 3}, partition_key='922222222222')
+
+        first = queue.claim()
+        queue.fail(first, 'database is locked')
+        # Other senders go ahead; this sender's next message does not overtake
+        other = queue.claim()
+        assert other.payload == {'n': 3}
+        queue.ack(other)
+        assert queue.claim() is None
+        assert queue.depth()['pending'] == 2
+
+        time.sleep(0.25)
+        retried = queue.claim()
+        assert retried.payload == {'n': 1}
+        assert retried.attempts == 2
+        # The wait doubles with each attempt
+        queue.fail(retried, 'database is locked')
+        available_at = queue._conn().execute(
+            "SELECT available_at FROM webhook_queue WHERE id = ?", (first.id,)
+        ).fetchone()[0]
+        assert 0.3 < available_at - time.time() <= 0.4
+        assert queue.claim() is None
+
+    def test_stale_claim_is_redelivered(self, tmp_path):
+        """An item claimed by a crashed worker becomes visible again."""
+        queue = WorkQueue(str(tmp_path / 'queue.db'), visibility_timeout=0)
+        queue.enqueue({'n': 1})
+        queue.claim()
+
+        time.sleep(0.01)
+        item = queue.claim()
+        assert item is not None
+        assert item.attempts == 2
+
+    def test_stale_claim_dead_after_max_attempts(self, tmp_path):
+        """An item that keeps crashing its worker is parked instead of blocking its partition."""
+        queue = WorkQueue(str(tmp_path / 'queue.db'), max_attempts=2, visibility_timeout=0)
+        queue.enqueue({'n': 1}, partition_key='919000000001')
+        queue.enqueue({'n': 2}, partition_key='919000000001')
+        assert queue.claim().payload == {'n': 1}
+        time.sleep(0.01)
+        assert queue.claim().attempts == 2
+        time.sleep(0.01)
+
+        item = queue.claim()
+        assert item.payload == {'n': 2}
+        assert queue.depth()['dead'] == 1
+
+    def test_partition_has_one_item_in_flight(self, queue):
+        """A sender's next message waits until the previous one is acked."""
+        queue.enqueue({'n': 1}, partition_key='911111111111')
+        queue.enqueue({'n': 2}, partition_key='911111111111')
+        queue.enqueue({'n': 3}, partition_key='922222222222')
+
+        first = queue.claim()
+        other = queue.claim()
+        assert first.payload == {'n': 1}
+        assert other.payload == {'n': 3}
+        assert queue.claim() is None
+
+        queue.ack(first)
+        assert queue.claim().payload == {'n': 2}
+
+    def test_worker_pool_drains_queue(self, queue):
+        """Workers run the handler for every enqueued payload."""
+        seen = []
+        done = threading.Event()
+
+        def handler(payload):
+            seen.append(payload['n'])
+            if len(seen) == 3:
+                done.set()
+
+        pool = QueueWorkerPool(queue, lambda: handler, workers=1, poll_interval=0.05)
+        pool.start()
+        for n in range(3):
+            queue.enqueue({'n': n})
+
+        assert done.wait(5)
+        pool.stop()
+        assert seen == [0, 1, 2]
+        assert queue.stats()['latency']['count'] == 3
@@ -0,0 +1,111 @@
+# unit_of_work.py
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database import begin_write
+from metrics import CountStats, LatencyStats
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, "active", False):
+        _local.round_trips += 1
+
+
+@event.listens_for(Engine, "commit")
+def _count_commit(conn):
+    if getattr(_local, "active", False):
+        _local.round_trips += 1
+
+
+class TurnMetrics:
+    """Per-turn DB round-trips, commits and duration across all workers."""
+
+    def __init__(self):
+        self.round_trips = CountStats()
+        self.duration = LatencyStats()
+        self.rolled_back = 0
+        self._lock = threading.Lock()
+
+    def stats(self) -> dict:
+        return {
+            "db_round_trips": self.round_trips.snapshot(),
+            "duration": self.duration.snapshot(),
+            "rolled_back": self.rolled_back,
+        }
+
+
+turn_metrics = TurnMetrics()
+
+
+class UnitOfWork:
+    """
+    Wraps one inbound message in exactly one transaction.
+
+    Step handlers only modify the session; the commit happens once on exit,
+    and any exception rolls back the state change and outbox messages
+    together. Side effects that must only happen if the turn is persisted
+    (render jobs, evidence downloads) are registered with `after_commit`.
+    `before_commit` callbacks run after the final flush, while flushed
+    values (e.g. new version numbers) are still loaded.
+    """
+
+    def __init__(self, db, metrics: TurnMetrics = turn_metrics):
+        self.db = db
+        self.metrics = metrics
+        self._before_commit = []
+        self._after_commit = []
+
+    def before_commit(self, fn):
+        """Run `fn()` after the final flush, just before committing."""
+        self._before_commit.append(fn)
+
+    def after_commit(self, fn):
+        """Run `fn()` once the turn's transaction has committed."""
+        self._after_commit.append(fn)
+
+    def __enter__(self):
+        # The turn reads its state and then writes, so it takes the SQLite
+        # write lock up front; a caller's open transaction is joined as is
+        if not self.db.in_transaction():
+            begin_write(self.db)
+        _local.active = True
+        _local.round_trips = 0
+        self._started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                if self._before_commit:
+                    self.db.flush()
+                    for fn in self._before_commit:
+                        fn()
+                self.db.commit()
+            else:
+                self.db.rollback()
+                with self.metrics._lock:
+                    self.metrics.rolled_back += 1
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            _local.active = False
+            self.metrics.round_trips.record(_local.round_trips)
+            self.metrics.duration.record(time.monotonic() - self._started)
+
+        if exc_type is None:
+            for fn in self._after_commit:
+                try:
+                    fn()
+                except Exception as e:
+                    logger.error(f"After-commit action failed: {str(e)}", exc_info=True)
+        return False
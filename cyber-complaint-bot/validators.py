@@ -1,16 +1,257 @@
-
 # validators.py
+"""
+Field validation for complaints.
+
+Every check takes the raw value and returns None if it is valid or an error
+code (REQUIRED, TOO_SHORT, ...) saying why not. Patterns are compiled once
+at import. The same checks serve the chat flow, one value at a time, and
+bulk import/backfill jobs through validate_many(), which validates a batch
+of records column by column:
+
+    errors = validate_many(rows)  # [None, {"ifsc": "bad_format"}, ...]
+"""
 import re
+from itertools import compress
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+# Error codes
+REQUIRED = "required"
+TOO_SHORT = "too_short"
+TOO_LONG = "too_long"
+BAD_FORMAT = "bad_format"
+BAD_DATE = "bad_date"
+FUTURE_DATE = "future_date"
+OUT_OF_RANGE = "out_of_range"
+
+_ASCII_NAME = re.compile(r"[A-Za-z]+(?:[ .'-]+[A-Za-z]+)*\.?")
+# A letter, or an Indic vowel sign / virama (combining marks that \w misses)
+_LETTER = r"(?:[^\W\d_]|[\u0900-\u0DFF])"
+_NAME = re.compile(rf"{_LETTER}+(?:[ .'-]+{_LETTER}+)*\.?")
+_PHONE_SEPARATORS = re.compile(r"[\s()-]+")
+_PHONE = re.compile(r"\+?[0-9]{10,15}")
+_EMAIL = re.compile(r"[A-Za-z0-9!#$%&'*+/=?^_`{|}~.-]{1,64}@(?:[A-Za-z0-9-]{1,63}\.)+[A-Za-z]{2,24}")
+_IFSC = re.compile(r"[A-Za-z]{4}0[0-9A-Za-z]{6}")
+_UPI = re.compile(r"[A-Za-z0-9._-]{2,256}@[A-Za-z][A-Za-z0-9]{1,63}")
+_ACCOUNT = re.compile(r"[0-9]{9,18}")
+_TXN_ID = re.compile(r"[A-Za-z0-9]{8,35}")
+_AMOUNT = re.compile(r"(?:rs\.?|inr|₹)?\s*([0-9][0-9,]*(?:\.[0-9]{1,2})?)\s*(?:/-)?", re.IGNORECASE)
+_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%d.%m.%Y")
+
+MAX_AMOUNT = Decimal("10000000000")  # 1000 crore
+EARLIEST_DATE = date(2000, 1, 1)
+
+
+def _length(value: str, low: int, high: int):
+    if len(value) < low:
+        return TOO_SHORT
+    if len(value) > high:
+        return TOO_LONG
+    return None
+
+
+def check_name(value: str):
+    if not 2 <= len(value) <= 50:
+        return _length(value, 2, 50)
+    # Most names are ASCII, and on ASCII input the Unicode pattern accepts exactly
+    # what _ASCII_NAME does, so only non-ASCII names pay for the slower pattern
+    pattern = _ASCII_NAME if value.isascii() else _NAME
+    return None if pattern.fullmatch(value) else BAD_FORMAT
+
+
+def check_address(value: str):
+    return None if 5 <= len(value) <= 300 else _length(value, 5, 300)
+
+
+def check_text(value: str):
+    return None if len(value) <= 4000 else TOO_LONG
+
+
+def check_phone(value: str):
+    if _PHONE.fullmatch(value):
+        return None
+    return None if _PHONE.fullmatch(_PHONE_SEPARATORS.sub("", value)) else BAD_FORMAT
+
+
+def check_email(value: str):
+    if len(value) > 254:
+        return TOO_LONG
+    return None if _EMAIL.fullmatch(value) else BAD_FORMAT
+
+
+def check_ifsc(value: str):
+    return None if _IFSC.fullmatch(value) else BAD_FORMAT
+
+
+def check_upi(value: str):
+    return None if _UPI.fullmatch(value) else BAD_FORMAT
+
+
+def check_account(value: str):
+    return None if _ACCOUNT.fullmatch(value) else BAD_FORMAT
+
+
+def check_payee(value: str):
+    """Where the money went: a UPI id or a bank account number."""
+    return None if _UPI.fullmatch(value) or _ACCOUNT.fullmatch(value) else BAD_FORMAT
+
+
+def check_txn_id(value: str):
+    """UPI/IMPS reference (12 digits) or NEFT/RTGS UTR, 8 to 35 characters."""
+    if len(value) < 8:
+        return TOO_SHORT
+    return None if _TXN_ID.fullmatch(value) else BAD_FORMAT
+
+
+def parse_amount(value: str):
+    """
+    Parse a rupee amount as typed ("Rs. 1,25,000", "₹499.50", "5000/-").
+    :return: Decimal, or None if it isn't an amount
+    """
+    match = _AMOUNT.fullmatch(value)
+    if not match:
+        return None
+    try:
+        return Decimal(match.group(1).replace(",", ""))
+    except InvalidOperation:
+        return None
+
+
+def check_amount(value: str):
+    amount = parse_amount(value)
+    if amount is None:
+        return BAD_FORMAT
+    return None if 0 < amount <= MAX_AMOUNT else OUT_OF_RANGE
+
+
+def parse_date(value: str):
+    """:return: The date (DD/MM/YYYY, DD-MM-YYYY, DD.MM.YYYY or YYYY-MM-DD), or None"""
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def check_date(value: str):
+    """Date of an incident: parseable, not in the future and not before 2000."""
+    parsed = parse_date(value)
+    if parsed is None:
+        return BAD_DATE
+    if parsed > date.today():
+        return FUTURE_DATE
+    return None if parsed >= EARLIEST_DATE else OUT_OF_RANGE
+
+
+CHECKS = {
+    "name": check_name,
+    "address": check_address,
+    "text": check_text,
+    "phone": check_phone,
+    "email": check_email,
+    "ifsc": check_ifsc,
+    "upi": check_upi,
+    "account": check_account,
+    "payee": check_payee,
+    "txn_id": check_txn_id,
+    "amount": check_amount,
+    "date": check_date,
+}
+
+# Checks that are a single pattern; validate_many() matches these directly
+_PATTERNS = {
+    "ifsc": _IFSC,
+    "upi": _UPI,
+    "account": _ACCOUNT,
+}
+
+# Complaint field -> (check, required)
+COMPLAINT_SCHEMA = {
+    "phone_number": ("phone", True),
+    "name": ("name", True),
+    "address": ("address", True),
+    "description": ("text", True),
+    "phone": ("phone", False),
+    "email": ("email", False),
+    "ifsc": ("ifsc", False),
+    "sender_txn_id": ("txn_id", False),
+    "receiver_txn_id": ("payee", False),
+    "suspect_name": ("text", False),
+    "suspect_details": ("text", False),
+}
+
+
+def check(kind: str, value, required: bool = True):
+    """
+    Validate one value.
+    :param kind: Key of CHECKS
+    :param value: Raw value; surrounding whitespace is ignored
+    :param required: Whether an empty value is an error
+    :return: None if valid, else an error code
+    """
+    text = "" if value is None else str(value).strip()
+    if not text:
+        return REQUIRED if required else None
+    return CHECKS[kind](text)
+
+
+def validate_many(records, schema: dict = None) -> list:
+    """
+    Validate a batch of records (dicts), one column at a time so each check
+    runs in a tight loop over the batch.
+    :param records: Sequence of dicts; missing keys count as empty
+    :param schema: field -> (check kind, required); defaults to COMPLAINT_SCHEMA
+    :return: One entry per record: None if valid, else {field: error code}
+    """
+    schema = COMPLAINT_SCHEMA if schema is None else schema
+    records = records if isinstance(records, (list, tuple)) else list(records)
+    errors = [None] * len(records)
+    positions = range(len(records))
+    for field, (kind, required) in schema.items():
+        missing = REQUIRED if required else None
+        texts = [value.strip() if value.__class__ is str else "" if value is None else str(value).strip()
+                 for value in [record.get(field) for record in records]]
+        if kind in _PATTERNS:
+            match = _PATTERNS[kind].fullmatch
+            codes = [(None if match(text) else BAD_FORMAT) if text else missing for text in texts]
+        else:
+            fn = CHECKS[kind]
+            codes = [fn(text) if text else missing for text in texts]
+        # Error codes are truthy strings, so compress() yields only the failed rows
+        for i in compress(positions, codes):
+            if errors[i] is None:
+                errors[i] = {field: codes[i]}
+            else:
+                errors[i][field] = codes[i]
+    return errors
+
+
+def validate_email(email: str) -> bool:
+    return check_email(str(email).strip()) is None
+
+
+def validate_phone(phone: str) -> bool:
+    return check_phone(str(phone).strip()) is None
+
+
+def validate_ifsc(ifsc: str) -> bool:
+    return check_ifsc(str(ifsc).strip()) is None
+
 
 class InputValidator:
+    # Boolean wrappers, kept for existing callers
     def validate_name(self, name: str) -> bool:
-        return bool(re.match(r"^[A-Za-z ]{2,50}$", str(name).strip()))
+        return check("name", name) is None
 
     def validate_phone(self, phone: str) -> bool:
-        return bool(re.match(r"^[0-9]{10,15}$", str(phone).strip()))
+        return check("phone", phone) is None
+
+    def validate_email(self, email: str) -> bool:
+        return check("email", email) is None
 
     def validate_ifsc(self, ifsc: str) -> bool:
-        return bool(re.match(r"^[A-Za-z]{4}0[0-9A-Za-z]{6}$", str(ifsc).strip()))
+        return check("ifsc", ifsc) is None
 
     def validate_transaction_id(self, tid: str) -> bool:
-        return len(str(tid).strip()) >= 8
+        return check("txn_id", tid) is None
@@ -1,16 +1,123 @@
 # whatsapp_handler.py
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
-from config import WHATSAPP_TOKEN, PHONE_NUMBER_ID
+from requests.adapters import HTTPAdapter
+from config import (
+    WHATSAPP_TOKEN, PHONE_NUMBER_ID, GRAPH_API_URL,
+    WHATSAPP_POOL_SIZE, WHATSAPP_CONNECT_TIMEOUT, WHATSAPP_READ_TIMEOUT,
+    WHATSAPP_MAX_RETRIES, WHATSAPP_BACKOFF, WHATSAPP_MAX_BACKOFF
+)
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: rate limited or a Graph API server error
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Error type of a send that timed out after the request went out
+UNCONFIRMED_ERROR = "ReadTimeout"
+
+_session = None
+_executor = None
+_client_lock = threading.Lock()
+
+
+def _shared_client(pool_size: int):
+    """
+    Process-wide keep-alive session and send executor, shared by every
+    handler so all worker threads reuse the same connection pool.
+    """
+    global _session, _executor
+    with _client_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="whatsapp-send")
+        return _session, _executor
+
 
 class WhatsAppHandler:
-    def __init__(self):
+    def __init__(self, base_url: str = None, pool_size: int = None, timeout: tuple = None,
+                 max_retries: int = None, backoff: float = None, session: requests.Session = None):
+        """
+        :param base_url: Messages endpoint; defaults to the Graph API for PHONE_NUMBER_ID
+        :param pool_size: Keep-alive connections (and concurrent batched sends)
+        :param timeout: (connect, read) timeout in seconds
+        :param max_retries: Retries on 429/5xx and connection errors
+        :param backoff: Base delay in seconds for exponential backoff
+        :param session: Use this session instead of the process-wide one
+        """
         # Base URL for WhatsApp Cloud API
-        self.base_url = f"https://graph.facebook.com/v16.0/{PHONE_NUMBER_ID}/messages"
+        self.base_url = base_url or f"{GRAPH_API_URL}/{PHONE_NUMBER_ID}/messages"
         # Authorization header
         self.headers = {
             "Authorization": f"Bearer {WHATSAPP_TOKEN}",
             "Content-Type": "application/json"
         }
+        self.timeout = timeout or (WHATSAPP_CONNECT_TIMEOUT, WHATSAPP_READ_TIMEOUT)
+        self.max_retries = WHATSAPP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = WHATSAPP_BACKOFF if backoff is None else backoff
+        self.max_backoff = WHATSAPP_MAX_BACKOFF
+        pool_size = pool_size or WHATSAPP_POOL_SIZE
+        if session is not None:
+            self.session = session
+            self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="whatsapp-send")
+        else:
+            self.session, self.executor = _shared_client(pool_size)
+
+    @staticmethod
+    def text_payload(to: str, body: str) -> dict:
+        return {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "text",
+            "text": {"body": body}
+        }
+
+    @staticmethod
+    def buttons_payload(to: str, body: str, buttons: list) -> dict:
+        return {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "interactive",
+            "interactive": {
+                "type": "button",
+                "body": {"text": body},
+                "action": {"buttons": buttons}
+            }
+        }
+
+    @staticmethod
+    def list_payload(to: str, body: str, button: str, rows: list) -> dict:
+        return {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "interactive",
+            "interactive": {
+                "type": "list",
+                "body": {"text": body},
+                "action": {"button": button, "sections": [{"rows": rows}]}
+            }
+        }
+
+    @staticmethod
+    def document_payload(to: str, link: str, filename: str, caption: str = "") -> dict:
+        return {
+            "messaging_product": "whatsapp",
+            "to": to,
+            "type": "document",
+            "document": {
+                "link": link,
+                "filename": filename,
+                "caption": caption
+            }
+        }
 
     def send_text(self, to: str, body: str) -> dict:
         """
@@ -19,14 +126,7 @@ class WhatsAppHandler:
         :param body: Text content of the message
         :return: JSON response from the API
         """
-        payload = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "text",
-            "text": {"body": body}
-        }
-        response = requests.post(self.base_url, headers=self.headers, json=payload)
-        return response.json()
+        return self.send(self.text_payload(to, body))
 
     def send_buttons(self, to: str, body: str, buttons: list) -> dict:
         """
@@ -38,18 +138,18 @@ class WhatsAppHandler:
         Example button:
             {"type": "reply", "reply": {"id": "yes_btn", "title": "Yes"}}
         """
-        payload = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "interactive",
-            "interactive": {
-                "type": "button",
-                "body": {"text": body},
-                "action": {"buttons": buttons}
-            }
-        }
-        response = requests.post(self.base_url, headers=self.headers, json=payload)
-        return response.json()
+        return self.send(self.buttons_payload(to, body, buttons))
+
+    def send_list(self, to: str, body: str, button: str, rows: list) -> dict:
+        """
+        Send an interactive list (up to ten rows), for menus too long for buttons.
+        :param to: Recipient phone number
+        :param body: Body text
+        :param button: Label of the button that opens the list
+        :param rows: List of dicts with keys 'id' and 'title'
+        :return: JSON response
+        """
+        return self.send(self.list_payload(to, body, button, rows))
 
     def send_document(self, to: str, link: str, filename: str, caption: str = "") -> dict:
         """
@@ -60,15 +160,102 @@ class WhatsAppHandler:
         :param caption: Optional caption text
         :return: JSON response
         """
-        payload = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "document",
-            "document": {
-                "link": link,
-                "filename": filename,
-                "caption": caption
-            }
-        }
-        response = requests.post(self.base_url, headers=self.headers, json=payload)
-        return response.json()
+        return self.send(self.document_payload(to, link, filename, caption))
+
+    def send_async(self, payload: dict):
+        """
+        Send a message payload on the shared send pool.
+        :return: Future resolving to the JSON response
+        """
+        return self.executor.submit(self.send, payload)
+
+    def send_many(self, payloads: list) -> list:
+        """
+        Send several payloads concurrently over pooled connections, so a turn
+        that sends a text plus buttons waits for roughly one round-trip.
+        WhatsApp does not guarantee delivery order between concurrent sends.
+        :param payloads: Message payloads, e.g. from text_payload/buttons_payload
+        :return: JSON responses in the same order as `payloads`
+        """
+        futures = [self.send_async(payload) for payload in payloads]
+        return [future.result() for future in futures]
+
+    def send(self, payload: dict) -> dict:
+        """
+        POST a message payload, retrying with backoff on 429/5xx and
+        connection errors. A read timeout is not retried: the message may
+        already have been delivered, and sending it again would duplicate it.
+        :param payload: Complete Graph API message payload
+        :return: JSON response, or an {"error": ...} dict if every attempt failed;
+                 see unconfirmed() for a send that may have been delivered
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(
+                    self.base_url, headers=self.headers, json=payload, timeout=self.timeout
+                )
+            except requests.ReadTimeout as e:
+                logger.error(f"WhatsApp send timed out waiting for the response, not retried: {str(e)}")
+                return {"error": {"message": str(e), "type": UNCONFIRMED_ERROR}}
+            except requests.ConnectionError as e:
+                # Includes ConnectTimeout: nothing was sent
+                if attempt >= self.max_retries:
+                    logger.error(f"WhatsApp send failed after {attempt + 1} attempts: {str(e)}")
+                    return {"error": {"message": str(e), "type": type(e).__name__}}
+                delay = self._backoff_delay(attempt)
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    return self._json(response)
+                delay = self._retry_delay(response, attempt)
+                if attempt >= self.max_retries or delay is None:
+                    logger.error(f"WhatsApp send failed with HTTP {response.status_code}")
+                    return self._json(response)
+            attempt += 1
+            logger.warning(f"Retrying WhatsApp send in {delay:.2f}s (attempt {attempt})")
+            time.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def _retry_delay(self, response, attempt: int):
+        """
+        Work out how long to wait before retrying a 429/5xx response, honouring
+        Retry-After and Meta's X-Business-Use-Case-Usage header.
+        :return: Delay in seconds, or None if the wait exceeds max_backoff
+        """
+        retry_after = response.headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = self._backoff_delay(attempt)
+            return delay if delay <= self.max_backoff else None
+
+        usage = response.headers.get("X-Business-Use-Case-Usage")
+        if usage:
+            try:
+                minutes = max(
+                    entry.get("estimated_time_to_regain_access", 0)
+                    for entries in json.loads(usage).values()
+                    for entry in entries
+                )
+            except (ValueError, AttributeError, TypeError):
+                minutes = 0
+            if minutes * 60 > self.max_backoff:
+                return None
+        return self._backoff_delay(attempt)
+
+    @staticmethod
+    def unconfirmed(result: dict) -> bool:
+        """True if `result` is from a send that timed out after the request went out, so it may have been delivered."""
+        error = result.get("error")
+        return isinstance(error, dict) and error.get("type") == UNCONFIRMED_ERROR
+
+    @staticmethod
+    def _json(response) -> dict:
+        try:
+            return response.json()
+        except ValueError:
+            return {"error": {"message": response.text, "code": response.status_code}}
@@ -0,0 +1,315 @@
+# work_queue.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from metrics import LatencyStats
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueueItem:
+    id: int
+    payload: dict
+    attempts: int
+    enqueued_at: float
+
+
+class WorkQueue:
+    """
+    Durable FIFO queue of webhook payloads backed by a local SQLite file.
+
+    The webhook handler only calls `enqueue`, so WhatsApp gets its 200 as soon
+    as the payload is on disk. Workers `claim` items, process them and then
+    `ack` (delete) or `fail` (retry later / mark dead) them. A failed item
+    is not handed out again until its exponential backoff has passed.
+
+    Items may carry a partition key (the sender's phone number). At most one
+    item per partition is in flight at a time, across every worker thread and
+    process sharing the file, so each sender's messages are processed strictly
+    in order while different senders run concurrently. An item waiting out
+    its backoff holds back the rest of its partition.
+
+    Items may also carry a dedup key (the WhatsApp message id). The key is
+    recorded in the same transaction as the item, so a redelivered message
+    is never queued twice, whichever process receives it.
+    """
+
+    def __init__(self, path: str, max_attempts: int = 5, visibility_timeout: float = 300.0,
+                 dedup_ttl: float = 7 * 24 * 3600, retry_backoff: float = 2.0, max_backoff: float = 300.0):
+        """
+        :param path: SQLite file holding the queue (separate from complaints.db)
+        :param max_attempts: Deliveries before an item is parked as 'dead'
+        :param visibility_timeout: Seconds before an unacked claim is handed out again
+        :param dedup_ttl: Seconds a dedup key is remembered
+        :param retry_backoff: Seconds a failed item waits after its first attempt; doubles per attempt
+        :param max_backoff: Upper bound on the wait
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self.visibility_timeout = visibility_timeout
+        self.dedup_ttl = dedup_ttl
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self.latency = LatencyStats()
+        self.processed = 0
+        self.failed = 0
+        self.duplicates = 0
+        self._last_prune = 0.0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+        self._ready = threading.Condition()
+        self._init_schema()
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread; transactions are managed explicitly
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS webhook_queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                partition_key TEXT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                claimed_at REAL,
+                available_at REAL,
+                last_error TEXT
+            )
+            """
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(webhook_queue)")]
+        if "partition_key" not in columns:
+            # Queue files created before partitioning was introduced
+            conn.execute("ALTER TABLE webhook_queue ADD COLUMN partition_key TEXT")
+        if "available_at" not in columns:
+            # Queue files created before retries were delayed; NULL means ready now
+            conn.execute("ALTER TABLE webhook_queue ADD COLUMN available_at REAL")
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_webhook_queue_status ON webhook_queue (status, id)")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_webhook_queue_partition ON webhook_queue (partition_key, status)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen_messages (message_id TEXT PRIMARY KEY, seen_at REAL NOT NULL) WITHOUT ROWID"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_seen_messages_seen_at ON seen_messages (seen_at)")
+
+    def enqueue(self, payload: dict, partition_key: str = None, dedup_key: str = None):
+        """
+        Persist a webhook payload and wake a waiting worker.
+        :param payload: JSON-serialisable event
+        :param partition_key: Items sharing a key are processed one at a time, in order
+        :param dedup_key: Items with a key already seen within dedup_ttl are dropped
+        :return: Queue item id, or None if the item was a duplicate
+        """
+        conn = self._conn()
+        now = time.time()
+        if dedup_key is None:
+            item_id = conn.execute(
+                "INSERT INTO webhook_queue (partition_key, payload, enqueued_at) VALUES (?, ?, ?)",
+                (partition_key, json.dumps(payload), now)
+            ).lastrowid
+        else:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO seen_messages (message_id, seen_at) VALUES (?, ?)", (dedup_key, now)
+                ).rowcount
+                if not inserted:
+                    conn.execute("ROLLBACK")
+                    with self._counter_lock:
+                        self.duplicates += 1
+                    return None
+                item_id = conn.execute(
+                    "INSERT INTO webhook_queue (partition_key, payload, enqueued_at) VALUES (?, ?, ?)",
+                    (partition_key, json.dumps(payload), now)
+                ).lastrowid
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if now - self._last_prune > 3600:
+                self._last_prune = now
+                self.prune_seen(now)
+        with self._ready:
+            self._ready.notify()
+        return item_id
+
+    def prune_seen(self, now: float = None) -> int:
+        """Forget dedup keys older than dedup_ttl. :return: Number removed"""
+        cutoff = (now or time.time()) - self.dedup_ttl
+        return self._conn().execute("DELETE FROM seen_messages WHERE seen_at < ?", (cutoff,)).rowcount
+
+    def claim(self):
+        """
+        Atomically take the oldest pending item that is past its backoff and
+        whose partition has nothing in flight or waiting.
+        :return: QueueItem, or None if nothing is ready
+        """
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Items claimed by a worker that died are handed out again, unless
+            # they have used up their attempts: an item that crashes its
+            # worker would otherwise block its partition forever
+            stale = now - self.visibility_timeout
+            dead = conn.execute(
+                "UPDATE webhook_queue SET status = 'dead', last_error = 'claim expired (worker died?)' "
+                "WHERE status = 'processing' AND claimed_at < ? AND attempts >= ?",
+                (stale, self.max_attempts)
+            ).rowcount
+            conn.execute(
+                "UPDATE webhook_queue SET status = 'pending' "
+                "WHERE status = 'processing' AND claimed_at < ?",
+                (stale,)
+            )
+            if dead:
+                logger.error(f"{dead} webhook item(s) moved to dead letter after expired claims")
+            # A partition whose oldest item is waiting out its backoff is
+            # blocked too, or its later messages would overtake it
+            row = conn.execute(
+                "SELECT id, payload, attempts, enqueued_at FROM webhook_queue "
+                "WHERE status = 'pending' AND (available_at IS NULL OR available_at <= ?) "
+                "AND (partition_key IS NULL OR partition_key NOT IN ("
+                "    SELECT partition_key FROM webhook_queue "
+                "    WHERE partition_key IS NOT NULL AND (status = 'processing' "
+                "        OR (status = 'pending' AND available_at > ?))"
+                ")) ORDER BY id LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE webhook_queue SET status = 'processing', claimed_at = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (now, row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return QueueItem(id=row[0], payload=json.loads(row[1]), attempts=row[2] + 1, enqueued_at=row[3])
+
+    def ack(self, item: QueueItem):
+        """Remove a successfully processed item and record its end-to-end latency."""
+        self._conn().execute("DELETE FROM webhook_queue WHERE id = ?", (item.id,))
+        self.latency.record(time.time() - item.enqueued_at)
+        with self._counter_lock:
+            self.processed += 1
+
+    def fail(self, item: QueueItem, error: str):
+        """
+        Return an item to the queue after a backoff, or park it as 'dead' once
+        attempts are exhausted.
+        """
+        status = "dead" if item.attempts >= self.max_attempts else "pending"
+        delay = min(self.max_backoff, self.retry_backoff * 2 ** (item.attempts - 1))
+        self._conn().execute(
+            "UPDATE webhook_queue SET status = ?, available_at = ?, last_error = ? WHERE id = ?",
+            (status, time.time() + delay, error[:1000], item.id)
+        )
+        with self._counter_lock:
+            self.failed += 1
+        if status == "dead":
+            logger.error(f"Webhook item {item.id} moved to dead letter after {item.attempts} attempts")
+
+    def wait(self, timeout: float):
+        """Block until something is enqueued in this process or `timeout` elapses."""
+        with self._ready:
+            self._ready.wait(timeout)
+
+    def wake_all(self):
+        with self._ready:
+            self._ready.notify_all()
+
+    def depth(self) -> dict:
+        rows = self._conn().execute(
+            "SELECT status, COUNT(*) FROM webhook_queue GROUP BY status"
+        ).fetchall()
+        counts = {"pending": 0, "processing": 0, "dead": 0}
+        counts.update(dict(rows))
+        return counts
+
+    def stats(self) -> dict:
+        """
+        Queue depth by status plus throughput and enqueue-to-ack latency.
+        Used by the /metrics endpoint to size the worker count.
+        """
+        return {
+            "depth": self.depth(),
+            "processed": self.processed,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class QueueWorkerPool:
+    """
+    Pool of threads draining a WorkQueue.
+    `handler_factory` is called once per worker thread and must return a
+    callable taking a payload, so each worker can own its own DB session.
+    """
+
+    def __init__(self, queue: WorkQueue, handler_factory, workers: int = 1, poll_interval: float = 1.0):
+        self.queue = queue
+        self.handler_factory = handler_factory
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"webhook-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.workers} webhook worker(s)")
+
+    def stop(self, timeout: float = 30.0):
+        """Stop claiming new items and wait for in-flight ones to finish."""
+        self._stop.set()
+        self.queue.wake_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _run(self):
+        handler = self.handler_factory()
+        while not self._stop.is_set():
+            try:
+                item = self.queue.claim()
+            except sqlite3.Error as e:
+                logger.error(f"Failed to claim webhook item: {str(e)}")
+                self._stop.wait(self.poll_interval)
+                continue
+            if item is None:
+                # Poll as well as wait, since other processes may enqueue too
+                self.queue.wait(self.poll_interval)
+                continue
+            try:
+                handler(item.payload)
+            except Exception as e:
+                logger.error(f"Error processing webhook item {item.id}: {str(e)}", exc_info=True)
+                self.queue.fail(item, str(e))
+            else:
+                self.queue.ack(item)